@@ -0,0 +1,51 @@
+"""add friendships adjacency table and friend_requests indexes
+
+Replaces the single-column requester/receiver indexes with (column, status) composites.
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = 'f2a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'friendships',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('friend_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('user_id', 'friend_id'),
+    )
+    op.create_index('ix_friendships_friend_user', 'friendships', ['friend_id', 'user_id'])
+    op.create_index('ix_friend_requests_requester_status', 'friend_requests', ['requester_id', 'status'])
+    op.create_index('ix_friend_requests_receiver_status', 'friend_requests', ['receiver_id', 'status'])
+    # The composites lead with the same columns, so the single-column indexes only add write cost
+    op.drop_index('ix_friend_requests_requester_id', table_name='friend_requests')
+    op.drop_index('ix_friend_requests_receiver_id', table_name='friend_requests')
+    # Backfill both directions of every accepted request
+    op.execute(
+        "INSERT INTO friendships (user_id, friend_id, created_at) "
+        "SELECT e.user_id, e.friend_id, CURRENT_TIMESTAMP FROM ("
+        "  SELECT requester_id AS user_id, receiver_id AS friend_id FROM friend_requests WHERE status = 'accepted'"
+        "  UNION"
+        "  SELECT receiver_id, requester_id FROM friend_requests WHERE status = 'accepted'"
+        ") e WHERE e.user_id <> e.friend_id"
+    )
+
+
+def downgrade() -> None:
+    op.create_index('ix_friend_requests_requester_id', 'friend_requests', ['requester_id'])
+    op.create_index('ix_friend_requests_receiver_id', 'friend_requests', ['receiver_id'])
+    op.drop_index('ix_friend_requests_receiver_status', table_name='friend_requests')
+    op.drop_index('ix_friend_requests_requester_status', table_name='friend_requests')
+    op.drop_index('ix_friendships_friend_user', table_name='friendships')
+    op.drop_table('friendships')
@@ -0,0 +1,23 @@
+"""add users.friends_revision for friend list ETags
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a9b0c1d2e3f4'
+down_revision = 'f8a9b0c1d2e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('friends_revision', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'friends_revision')
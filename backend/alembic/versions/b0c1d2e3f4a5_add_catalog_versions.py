@@ -0,0 +1,29 @@
+"""add catalog_versions so every worker can tell when the badge catalog changed
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b0c1d2e3f4a5'
+down_revision = 'a9b0c1d2e3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table(
+        'catalog_versions',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(catalog_versions, [{'name': 'badges', 'version': 1}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
@@ -0,0 +1,36 @@
+"""add pg_trgm search indexes on users display_name and bio
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Other dialects search through the in-process index in app/services/search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_display_name_trgm "
+        "ON users USING gin (lower(coalesce(display_name, '')) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_bio_trgm "
+        "ON users USING gin (lower(coalesce(bio, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_users_bio_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_display_name_trgm")
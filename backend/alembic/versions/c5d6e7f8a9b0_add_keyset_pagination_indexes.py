@@ -0,0 +1,35 @@
+"""add indexes backing keyset pagination
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c5d6e7f8a9b0'
+down_revision = 'b4c5d6e7f8a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_user_badges_user_earned', 'user_badges', ['user_id', 'earned_at', 'id'])
+    # Extend the friend request indexes with the (created_at, id) sort key
+    op.drop_index('ix_friend_requests_requester_status', table_name='friend_requests')
+    op.drop_index('ix_friend_requests_receiver_status', table_name='friend_requests')
+    op.create_index(
+        'ix_friend_requests_requester_status', 'friend_requests', ['requester_id', 'status', 'created_at', 'id']
+    )
+    op.create_index(
+        'ix_friend_requests_receiver_status', 'friend_requests', ['receiver_id', 'status', 'created_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_friend_requests_receiver_status', table_name='friend_requests')
+    op.drop_index('ix_friend_requests_requester_status', table_name='friend_requests')
+    op.create_index('ix_friend_requests_requester_status', 'friend_requests', ['requester_id', 'status'])
+    op.create_index('ix_friend_requests_receiver_status', 'friend_requests', ['receiver_id', 'status'])
+    op.drop_index('ix_user_badges_user_earned', table_name='user_badges')
@@ -0,0 +1,42 @@
+"""add user_stats counters for badge rules
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd6e7f8a9b0c1'
+down_revision = 'c5d6e7f8a9b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('runs', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('minigames_played', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('minigames_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('coins_earned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('fast_completions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_run_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_run_coins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    # Seed totals from recorded runs; streaks and fast completions start from zero
+    op.execute(
+        "INSERT INTO user_stats (user_id, runs, minigames_played, minigames_completed, coins_earned, "
+        "fast_completions, best_streak, best_run_completed, best_run_coins, updated_at) "
+        "SELECT user_id, COUNT(*), SUM(minigames_played), SUM(minigames_completed), SUM(coins_earned), "
+        "0, 0, MAX(minigames_completed), MAX(coins_earned), CURRENT_TIMESTAMP FROM runs GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
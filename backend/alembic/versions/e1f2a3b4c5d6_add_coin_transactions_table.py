@@ -0,0 +1,39 @@
+"""add coin_transactions ledger table
+
+Revision ID: e1f2a3b4c5d6
+Revises: d4567890abcd
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd4567890abcd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(length=32), nullable=False, server_default='adjustment'),
+        sa.Column('idempotency_key', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('user_id', 'idempotency_key', name='uq_coin_transactions_user_key'),
+    )
+    op.create_index('ix_coin_transactions_user_id', 'coin_transactions', ['user_id'])
+    # Open the ledger with each user's current balance so it reconciles from day one
+    op.execute(
+        "INSERT INTO coin_transactions (user_id, amount, reason, created_at) "
+        "SELECT id, coins, 'opening_balance', CURRENT_TIMESTAMP FROM users WHERE coins <> 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_coin_transactions_user_id', table_name='coin_transactions')
+    op.drop_table('coin_transactions')
@@ -0,0 +1,54 @@
+"""add unique (user_id, badge_id) and (user_id, item_id) indexes
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e7f8a9b0c1d2'
+down_revision = 'd6e7f8a9b0c1'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('uq_user_badges_user_badge', 'user_badges', ('user_id', 'badge_id')),
+    ('uq_owned_items_user_item', 'owned_items', ('user_id', 'item_id')),
+)
+
+
+def _dedupe(table: str, columns: tuple[str, ...]) -> None:
+    # Keep the oldest row of every duplicate group
+    cols = ", ".join(columns)
+    op.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {cols})")
+
+
+def upgrade() -> None:
+    for _, table, columns in INDEXES:
+        _dedupe(table, columns)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, list(columns), unique=True)
+        return
+
+    # Build online: CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind; clear it before retrying
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            # Rows duplicated since the first pass would fail the build, so dedupe once more
+            _dedupe(table, columns)
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({', '.join(columns)})")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
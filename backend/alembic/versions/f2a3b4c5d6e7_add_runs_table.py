@@ -0,0 +1,37 @@
+"""add runs table
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('client_run_id', sa.String(length=64), nullable=False),
+        sa.Column('minigames_played', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('minigames_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('coins_earned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lives_remaining', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_remaining', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('user_id', 'client_run_id', name='uq_runs_user_client_run'),
+    )
+    op.create_index('ix_runs_user_id', 'runs', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_runs_user_id', table_name='runs')
+    op.drop_table('runs')
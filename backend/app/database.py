@@ -1,10 +1,158 @@
+import threading
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
 from decouple import config
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.instrumentation import instrument_sql
+from app.utils.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolStats, instrument
+
+
+# Serve requests through the async engine (asyncpg/aiosqlite) or the sync one
+DATABASE_ASYNC = config("DATABASE_ASYNC", default=True, cast=bool)
+
+# Pool sizing is per engine, i.e. per worker process
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=5, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=10, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=30, cast=float)
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", default=1800, cast=int)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", default=True, cast=bool)
+# Transaction-pooling PgBouncer can't keep server-side prepared statements
+DB_PGBOUNCER = config("DB_PGBOUNCER", default=False, cast=bool)
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str | URL) -> URL:
+    """Swap the sync DBAPI in ``url`` for its async counterpart."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No async driver configured for {backend!r}; set DATABASE_ASYNC=false")
+    return url.set(drivername=f"{backend}+{driver}")
+
+
+def engine_options(url: str | URL, *, is_async: bool = False) -> dict:
+    """Pool and driver keyword arguments for ``create_engine``/``create_async_engine``."""
+    url = make_url(url)
+    poolclass = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    options: dict = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # In-memory SQLite needs its own pool; sizing means little for a file
+        if url.database not in (None, "", ":memory:"):
+            options["poolclass"] = poolclass
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_PGBOUNCER and is_async:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return options
+
+
+# Engines are built on first use, so importing this module (and everything
+# that imports it) neither reads DATABASE_URL nor loads a DBAPI driver.
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_engines_lock = threading.Lock()
+pool_stats: dict[str, PoolStats] = {}
+
+
+def get_engine() -> Engine:
+    """The sync engine; it also backs migrations, seeding and scripts."""
+    global _engine
+    if _engine is None:
+        with _engines_lock:
+            if _engine is None:
+                url = config("DATABASE_URL")
+                engine = create_engine(url, **engine_options(url))
+                pool_stats["sync"] = instrument(engine)
+                instrument_sql(engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine | None:
+    """The async engine, or ``None`` when ``DATABASE_ASYNC`` is off."""
+    global _async_engine
+    if not DATABASE_ASYNC:
+        return None
+    if _async_engine is None:
+        with _engines_lock:
+            if _async_engine is None:
+                url = config("DATABASE_URL")
+                engine = create_async_engine(async_url(url), **engine_options(url, is_async=True))
+                pool_stats["async"] = instrument(engine.sync_engine)
+                instrument_sql(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection (on shutdown)."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        await run_in_threadpool(_engine.dispose)
+
+
+def pool_status() -> dict:
+    """Occupancy and wait-time stats for every engine created so far."""
+    engines = {"sync": _engine, "async": _async_engine.sync_engine if _async_engine is not None else None}
+    return {name: pool_stats[name].snapshot(eng.pool) for name, eng in engines.items() if eng is not None}
+
+
+class SyncSessionAdapter:
+    """Awaitable facade over a sync ``Session``.
+
+    Mirrors the ``AsyncSession`` surface the routers use so the same handlers
+    run on the sync engine, with each blocking call pushed to the threadpool.
+    """
+
+    _AWAITABLE = frozenset(
+        {"exec", "execute", "get", "delete", "merge", "commit", "refresh", "flush", "rollback", "scalar", "scalars", "close"}
+    )
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.sync_session, name)
+        if name not in self._AWAITABLE:
+            return attr
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(attr, *args, **kwargs)
+
+        return call
+
 
+@asynccontextmanager
+async def session_scope():
+    """Open a request-style session outside of FastAPI dependency injection."""
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+    else:
+        with Session(get_engine(), expire_on_commit=False) as session:
+            yield SyncSessionAdapter(session)
 
-DATABASE_URL = config("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
 
-def get_db():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+async def get_db():
+    async with session_scope() as session:
+        yield session
@@ -1,10 +1,62 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from decouple import config
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
+from app.database import dispose_engines
+from app.routers import badges, bootstrap, users, friends, health, internal, leaderboards, metrics, runs, traces
+from app.services.badges import refresh_badge_catalog, seed_default_badges
+from app.utils.auth0 import auth0_settings
+from app.utils.fastjson import FastJSONResponse
+from app.utils.instrumentation import InstrumentationMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.profiling import ProfilingMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Seeding is a once-per-deployment step (`python -m app.seed`); workers only load the catalog.
+# Set true for local setups that skip that step.
+SEED_ON_STARTUP = config("SEED_ON_STARTUP", default=False, cast=bool)
+
 
-from app.routers import badges, users, friends
-from app.services.badges import seed_default_badges
+async def warm_up() -> None:
+    """Seed or load the badge catalog, retrying until the database is reachable.
 
-app = FastAPI(title="SKRAWLi")
+    This also opens the first pooled connection, so the first real request
+    does not pay for it.
+    """
+    delay = 0.5
+    while True:
+        try:
+            await run_in_threadpool(seed_default_badges if SEED_ON_STARTUP else refresh_badge_catalog)
+            return
+        except Exception:
+            logger.exception("Startup warm-up failed; retrying in %.1fs", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail at boot, not on the first login, when Auth0 settings are missing
+    auth0_settings()
+    # In the background: the worker serves (and /healthz answers) right away,
+    # /readyz turns ready once this is done
+    app.state.warm_up = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        app.state.warm_up.cancel()
+        await dispose_engines()
+
+
+app = FastAPI(title="SKRAWLi", lifespan=lifespan)
 
 # Configure CORS for Auth0
 app.add_middleware(
@@ -13,14 +65,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing", "X-Profile-Id"],
 )
+# Inside InstrumentationMiddleware, so captures see the request's SQL
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so latency and SQL counts cover the whole stack
+app.add_middleware(InstrumentationMiddleware)
 
 app.include_router(users.router, tags=["users"])
+app.include_router(bootstrap.router, tags=["users"])
 app.include_router(badges.router, tags=["badges"])
 app.include_router(friends.router, tags=["friends"])
+app.include_router(runs.router, tags=["runs"])
+app.include_router(leaderboards.router, tags=["leaderboards"])
+app.include_router(traces.router, tags=["traces"])
+app.include_router(internal.router, tags=["internal"])
+app.include_router(metrics.router)
+app.include_router(health.router)
+
 
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError) -> FastJSONResponse:
+    """FastAPI's 422 body, but a NaN/Infinity input echoed back renders as null instead of a 500."""
+    return FastJSONResponse(
+        {"detail": jsonable_encoder(exc.errors())},
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
 
-@app.on_event("startup")
-def bootstrap_seed() -> None:
-    """Seed default badges on startup."""
-    seed_default_badges()
\ No newline at end of file
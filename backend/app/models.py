@@ -1,3 +1,4 @@
+from sqlalchemy import Index, UniqueConstraint, event, inspect, select
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional
 from datetime import datetime
@@ -14,11 +15,23 @@ class User(SQLModel, table=True):
     display_name: Optional[str] = Field(default=None, max_length=50)
     profile_background: Optional[str] = Field(default="bg-skrawl-purple", max_length=50)
     showcased_badges: Optional[str] = Field(default=None, max_length=200)  # Comma-separated badge codes
+    # Bumped on every ORM write to the row and by app.services.revisions.touch_users; feeds weak ETags
+    revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Bumped when the friend list changes: a friendship added or removed, or a friend's summary edited
+    friends_revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     badges: list["UserBadge"] = Relationship(back_populates="user")
 
+
+@event.listens_for(User, "before_update")
+def _bump_user_revision(mapper, connection, target: User) -> None:
+    # Incremented in SQL so concurrent writers never reuse a revision
+    target.revision = User.revision + 1
+
+
 class OwnedItem(SQLModel, table=True):
     __tablename__ = "owned_items"
+    __table_args__ = (Index("uq_owned_items_user_item", "user_id", "item_id", unique=True),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
@@ -37,8 +50,20 @@ class Badge(SQLModel, table=True):
     owners: list["UserBadge"] = Relationship(back_populates="badge")
 
 
+# Version counters for in-process caches shared by every worker (e.g. the badge catalog)
+class CatalogVersion(SQLModel, table=True):
+    __tablename__ = "catalog_versions"
+
+    name: str = Field(primary_key=True, max_length=32)
+    version: int = Field(default=0)
+
+
 class UserBadge(SQLModel, table=True):
     __tablename__ = "user_badges"
+    __table_args__ = (
+        Index("uq_user_badges_user_badge", "user_id", "badge_id", unique=True),
+        Index("ix_user_badges_user_earned", "user_id", "earned_at", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
@@ -51,10 +76,83 @@ class UserBadge(SQLModel, table=True):
 
 class FriendRequest(SQLModel, table=True):
     __tablename__ = "friend_requests"
+    __table_args__ = (
+        Index("ix_friend_requests_requester_status", "requester_id", "status", "created_at", "id"),
+        Index("ix_friend_requests_receiver_status", "receiver_id", "status", "created_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     requester_id: int = Field(foreign_key="users.id")
     receiver_id: int = Field(foreign_key="users.id")
     status: str = Field(default="pending", max_length=20)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    responded_at: Optional[datetime] = Field(default=None)
\ No newline at end of file
+    responded_at: Optional[datetime] = Field(default=None)
+
+
+# Symmetric adjacency list of accepted friendships: one row per direction
+class Friendship(SQLModel, table=True):
+    __tablename__ = "friendships"
+    __table_args__ = (Index("ix_friendships_friend_user", "friend_id", "user_id"),)
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    friend_id: int = Field(foreign_key="users.id", primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# User columns friend lists show; editing one invalidates every friend's list
+FRIEND_SUMMARY_COLUMNS = ("display_name", "bio", "profile_background", "picture_url", "showcased_badges")
+
+
+@event.listens_for(User, "after_update")
+def _bump_friends_revisions(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in FRIEND_SUMMARY_COLUMNS):
+        users = User.__table__
+        friends = select(Friendship.friend_id).where(Friendship.user_id == target.id)
+        connection.execute(
+            users.update().where(users.c.id.in_(friends)).values(friends_revision=users.c.friends_revision + 1)
+        )
+
+
+# Append-only ledger of coin balance changes; users.coins is its running sum
+class CoinTransaction(SQLModel, table=True):
+    __tablename__ = "coin_transactions"
+    __table_args__ = (UniqueConstraint("user_id", "idempotency_key", name="uq_coin_transactions_user_key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", index=True)
+    amount: int
+    reason: str = Field(default="adjustment", max_length=32)
+    idempotency_key: Optional[str] = Field(default=None, max_length=64)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Run(SQLModel, table=True):
+    __tablename__ = "runs"
+    __table_args__ = (UniqueConstraint("user_id", "client_run_id", name="uq_runs_user_client_run"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", index=True)
+    client_run_id: str = Field(max_length=64)
+    minigames_played: int = Field(default=0)
+    minigames_completed: int = Field(default=0)
+    coins_earned: int = Field(default=0)
+    lives_remaining: int = Field(default=0)
+    time_remaining: Optional[float] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Running per-user totals that badge rules are evaluated against
+class UserStats(SQLModel, table=True):
+    __tablename__ = "user_stats"
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    runs: int = Field(default=0)
+    minigames_played: int = Field(default=0)
+    minigames_completed: int = Field(default=0)
+    coins_earned: int = Field(default=0)
+    fast_completions: int = Field(default=0)
+    best_streak: int = Field(default=0)
+    best_run_completed: int = Field(default=0)
+    best_run_coins: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
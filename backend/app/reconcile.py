@@ -0,0 +1,43 @@
+"""Check coin balances against the ledger, e.g. from an hourly cron job.
+
+    cd backend && python -m app.reconcile
+
+Workers do not run this themselves: one pass is a full-table ``GROUP BY``
+over the ledger, and every worker would repeat it and log the same
+mismatches. Mismatches are logged and make the command exit with status 1.
+"""
+import asyncio
+import logging
+import sys
+
+from app.database import dispose_engines, session_scope
+from app.services.coins import BalanceMismatch, reconcile_balances
+
+logger = logging.getLogger("app.reconcile")
+
+
+async def reconcile() -> list[BalanceMismatch]:
+    """Run one reconciliation pass and log what it found."""
+    try:
+        async with session_scope() as db:
+            mismatches = await reconcile_balances(db)
+    finally:
+        await dispose_engines()
+    for mismatch in mismatches:
+        logger.warning(
+            "Coin balance mismatch for user %s: balance=%s ledger=%s",
+            mismatch.user_id,
+            mismatch.balance,
+            mismatch.ledger_total,
+        )
+    logger.info("Checked coin balances: %d mismatch(es)", len(mismatches))
+    return mismatches
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(1 if asyncio.run(reconcile()) else 0)
+
+
+if __name__ == "__main__":
+    main()
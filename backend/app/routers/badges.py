@@ -1,14 +1,37 @@
 """Badge endpoints for listing and awarding achievements."""
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from datetime import datetime
 
-from app.database import get_db
-from app.models import Badge, User, UserBadge
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_db, session_scope
+from app.models import User, UserBadge
+from app.services.badges import RULE_CODES, badge_catalog, grant_badges
+from app.services.public_cache import CachedResponse, badges_key, invalidate_badges, public_cache
+from app.services.revisions import user_revision
 from app.utils.auth0 import get_current_user
+from app.utils.etag import (
+    PRIVATE_CACHE_CONTROL,
+    PUBLIC_CACHE_CONTROL,
+    etag_matches,
+    not_modified,
+    validator_headers,
+    weak_etag,
+)
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+    split_page,
+)
 
 router = APIRouter()
 
@@ -24,71 +47,141 @@ class AwardBadgeResponse(BaseModel):
     code: str
 
 
+_badge_list = TypeAdapter(list[BadgeResponse])
+
+
 @router.get("/badges", response_model=list[BadgeResponse])
-async def list_badges(db: Session = Depends(get_db)) -> list[BadgeResponse]:
-    """Get all available badge definitions."""
-    badges = db.exec(select(Badge).order_by(Badge.name)).all()
-    return [BadgeResponse(code=b.code, name=b.name, description=b.description) for b in badges]
+async def list_badges(if_none_match: str | None = Header(default=None)) -> Response:
+    """Get all available badge definitions (served from the in-process catalog)."""
+    catalog = await badge_catalog()
+    if etag_matches(if_none_match, catalog.etag):
+        return not_modified(catalog.etag, PUBLIC_CACHE_CONTROL)
+    return Response(
+        content=catalog.body,
+        media_type="application/json",
+        headers=validator_headers(catalog.etag, PUBLIC_CACHE_CONTROL),
+    )
 
 
-@router.get("/users/me/badges", response_model=list[BadgeResponse])
-async def list_user_badges(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> list[BadgeResponse]:
-    """Get all badges earned by the current user."""
+async def _earned_badges_page(
+    db: AsyncSession, user_id: int, cursor: str | None, limit: int | None
+) -> tuple[list[BadgeResponse], str | None]:
+    """One page of a user's badges in earning order, keyed on (earned_at, id)."""
+    limit = clamp_limit(limit)
     stmt = (
         select(UserBadge)
-        .where(UserBadge.user_id == current_user.id)
+        .where(UserBadge.user_id == user_id)
         .options(selectinload(UserBadge.badge))
-        .order_by(UserBadge.earned_at)
+        .order_by(UserBadge.earned_at, UserBadge.id)
+        .limit(limit + 1)
     )
-    records = db.exec(stmt).all()
-    return [
+    if cursor:
+        after = decode_cursor(cursor, t=datetime, id=int)
+        stmt = stmt.where(tuple_(UserBadge.earned_at, UserBadge.id) > tuple_(after["t"], after["id"]))
+    records, more = split_page((await db.exec(stmt)).all(), limit)
+    badges = [
         BadgeResponse(code=record.badge.code, name=record.badge.name, description=record.badge.description)
         for record in records
     ]
+    return badges, encode_cursor(t=records[-1].earned_at, id=records[-1].id) if more else None
+
+
+async def _badges_etag(user_id: int, revision: int, cursor: str | None, limit: int | None) -> str:
+    catalog = await badge_catalog()
+    return weak_etag("badges", user_id, revision, catalog.etag, cursor or "", limit or "")
+
+
+async def _conditional_badges_page(
+    db: AsyncSession,
+    response: Response,
+    user_id: int,
+    cursor: str | None,
+    limit: int | None,
+    if_none_match: str | None,
+    cache_control: str,
+) -> list[BadgeResponse] | Response:
+    """Answer 304 from the user's revision before loading the page when the client is current."""
+    revision = await user_revision(db, user_id)
+    if revision is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    etag = await _badges_etag(user_id, revision, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control)
+    response.headers.update(validator_headers(etag, cache_control))
+    badges, next_cursor = await _earned_badges_page(db, user_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return badges
+
+
+async def _load_public_badges(user_id: int) -> bytes | None:
+    # Runs detached from the request (see TieredCache.get_or_load), so it opens its own session
+    async with session_scope() as db:
+        revision = await user_revision(db, user_id)
+        if revision is None:
+            return None
+        badges, next_cursor = await _earned_badges_page(db, user_id, None, None)
+    body = _badge_list.dump_json(badges)
+    return CachedResponse(body=body, etag=await _badges_etag(user_id, revision, None, None), next_cursor=next_cursor).to_bytes()
+
+
+@router.get("/users/me/badges", response_model=list[BadgeResponse])
+async def list_user_badges(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
+    if_none_match: str | None = Header(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> list[BadgeResponse] | Response:
+    """Get badges earned by the current user (paged via X-Next-Cursor)."""
+    return await _conditional_badges_page(
+        db, response, current_user.id, cursor, limit, if_none_match, PRIVATE_CACHE_CONTROL
+    )
 
 @router.get("/users/{user_id}/badges", response_model=list[BadgeResponse])
-async def list_other_user_badges(user_id: int, db: Session = Depends(get_db)) -> list[BadgeResponse]:
-    """Get all badges earned by another user (public)."""
-    user = db.get(User, user_id)
-    if user is None:
+async def list_other_user_badges(
+    user_id: int,
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> list[BadgeResponse] | Response:
+    """Get badges earned by another user (public, paged via X-Next-Cursor).
+
+    The first page at the default size is served through the public cache.
+    """
+    if cursor is not None or limit is not None:
+        return await _conditional_badges_page(
+            db, response, user_id, cursor, limit, if_none_match, PUBLIC_CACHE_CONTROL
+        )
+    raw = await public_cache.get_or_load(await badges_key(user_id), lambda: _load_public_badges(user_id))
+    if raw is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    stmt = (
-        select(UserBadge)
-        .where(UserBadge.user_id == user_id)
-        .options(selectinload(UserBadge.badge))
-        .order_by(UserBadge.earned_at)
-    )
-    records = db.exec(stmt).all()
-    return [
-        BadgeResponse(code=record.badge.code, name=record.badge.name, description=record.badge.description)
-        for record in records
-    ]
+    entry = CachedResponse.from_bytes(raw)
+    if etag_matches(if_none_match, entry.etag):
+        return not_modified(entry.etag, PUBLIC_CACHE_CONTROL)
+    headers = validator_headers(entry.etag, PUBLIC_CACHE_CONTROL)
+    if entry.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = entry.next_cursor
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @router.post("/users/me/badges/{badge_code}", response_model=AwardBadgeResponse, status_code=status.HTTP_200_OK)
 async def award_badge(
     badge_code: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> AwardBadgeResponse:
-    """Award a badge to the current user."""
-    badge = db.exec(select(Badge).where(Badge.code == badge_code)).first()
+    """Award a badge to the current user (rule badges are only earned through runs)."""
+    badge = (await badge_catalog()).by_code.get(badge_code)
     if badge is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Badge not found")
-
-    existing = db.exec(
-        select(UserBadge).where(
-            UserBadge.user_id == current_user.id,
-            UserBadge.badge_id == badge.id,
-        )
-    ).first()
-    if existing:
-        return AwardBadgeResponse(status="exists", code=badge.code)
-
-    user_badge = UserBadge(user_id=current_user.id, badge_id=badge.id)
-    db.add(user_badge)
-    db.commit()
-    return AwardBadgeResponse(status="awarded", code=badge.code)
+    if badge.code in RULE_CODES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Badge is earned by playing runs")
+
+    awarded = await grant_badges(db, current_user.id, [badge.code])
+    await db.commit()
+    if awarded:
+        await invalidate_badges(current_user.id)
+    return AwardBadgeResponse(status="awarded" if awarded else "exists", code=badge.code)
@@ -0,0 +1,117 @@
+"""Aggregated start-up payload for the signed-in user."""
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import TypeAdapter
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_db
+from app.models import User
+from app.routers.badges import BadgeResponse
+from app.routers.friends import FriendRequestResponse, FriendRequestsList
+from app.routers.users import OwnedItemResponse, serialize_profile
+from app.services.badges import badge_catalog
+from app.services.bootstrap import SECTIONS, BootstrapRow, load_bootstrap_rows
+from app.utils.auth0 import get_current_user
+from app.utils.etag import etag_matches, strong_etag
+from app.utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, split_page
+
+router = APIRouter()
+
+_owned_items = TypeAdapter(list[OwnedItemResponse])
+_badges = TypeAdapter(list[BadgeResponse])
+_etag_map = TypeAdapter(dict[str, str])
+_names = TypeAdapter(list[str])
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    if not fields:
+        return SECTIONS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(SECTIONS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}; expected any of {', '.join(SECTIONS)}",
+        )
+    return tuple(name for name in SECTIONS if name in requested)
+
+
+def _request_page(rows: list[BootstrapRow]) -> tuple[list[FriendRequestResponse], str | None]:
+    page, more = split_page(rows, DEFAULT_PAGE_SIZE)
+    serialized = [
+        FriendRequestResponse(
+            id=row.id,
+            requester_id=row.user_a,
+            receiver_id=row.user_b,
+            status=row.label,
+            created_at=row.at.isoformat(),
+            responded_at=row.responded_at.isoformat() if row.responded_at else None,
+        )
+        for row in page
+    ]
+    return serialized, encode_cursor(t=page[-1].at, id=page[-1].id) if more else None
+
+
+def _section_etag(name: str, body: bytes) -> str:
+    # Salted with the section name: e.g. empty badges and empty owned items are both "[]"
+    return strong_etag(name.encode() + b"\0" + body)
+
+
+@router.get("/users/me/bootstrap")
+async def get_bootstrap(
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Profile, coins, owned items, badges and pending friend requests in one response.
+
+    ``fields`` is a comma-separated subset of sections (default: all). The body
+    carries an ``etags`` map with one strong ETag per section; sections whose
+    ETag is listed in ``If-None-Match`` are left out of the body and named in
+    ``not_modified`` instead, and when every requested section is unchanged
+    the response is a bare 304. The friend request lists hold the first page;
+    continue them through ``/users/me/friends/requests`` with the returned cursors.
+    """
+    sections = _parse_fields(fields)
+    rows = await load_bootstrap_rows(db, current_user.id, set(sections), DEFAULT_PAGE_SIZE)
+
+    bodies: dict[str, bytes] = {}
+    for name in sections:
+        if name == "profile":
+            bodies[name] = serialize_profile(current_user).model_dump_json().encode()
+        elif name == "coins":
+            bodies[name] = str(rows.coins).encode()
+        elif name == "owned_items":
+            bodies[name] = _owned_items.dump_json(
+                [OwnedItemResponse(item_id=row.label, created_at=row.at.isoformat()) for row in rows.owned_items]
+            )
+        elif name == "badges":
+            by_id = (await badge_catalog()).by_id
+            earned = [by_id[row.user_a] for row in rows.badges if row.user_a in by_id]
+            bodies[name] = _badges.dump_json(
+                [BadgeResponse(code=b.code, name=b.name, description=b.description) for b in earned]
+            )
+        elif name == "friend_requests":
+            inbound, inbound_next = _request_page(rows.inbound)
+            outbound, outbound_next = _request_page(rows.outbound)
+            bodies[name] = FriendRequestsList(
+                inbound=inbound,
+                outbound=outbound,
+                inbound_next_cursor=inbound_next,
+                outbound_next_cursor=outbound_next,
+            ).model_dump_json().encode()
+
+    etags = {name: _section_etag(name, body) for name, body in bodies.items()}
+    combined = strong_etag("".join(etags[name] for name in sections).encode())
+    headers = {"ETag": combined, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, combined):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    fresh = [name for name in sections if not etag_matches(if_none_match, etags[name])]
+    if not fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Splice the pre-serialized sections so each ETag covers exactly the bytes sent
+    parts = [b'"%s":%s' % (name.encode(), bodies[name]) for name in fresh]
+    parts.append(b'"etags":' + _etag_map.dump_json(etags))
+    parts.append(b'"not_modified":' + _names.dump_json([n for n in sections if n not in fresh]))
+    return Response(content=b"{" + b",".join(parts) + b"}", media_type="application/json", headers=headers)
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, or_
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import tuple_
+from sqlmodel import select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
 from app.database import get_db
 from app.models import User, FriendRequest
+from app.services import friends as friend_graph
+from app.services.revisions import friends_revision
+from app.services.search import SearchMode, search_users
 from app.utils.auth0 import get_current_user
+from app.utils.etag import PRIVATE_CACHE_CONTROL, etag_matches, not_modified, validator_headers, weak_etag
+from app.utils.fastjson import RowEncoder, fast_json
+from app.utils.pagination import clamp_limit, decode_cursor, encode_cursor, set_next_cursor, split_page
 
 router = APIRouter()
 
@@ -28,43 +36,82 @@ class FriendRequestResponse(BaseModel):
 class FriendRequestsList(BaseModel):
     inbound: list[FriendRequestResponse]
     outbound: list[FriendRequestResponse]
+    inbound_next_cursor: str | None = None
+    outbound_next_cursor: str | None = None
 
-def summarize_user(u: User) -> UserSummary:
+class FriendSuggestion(UserSummary):
+    mutual_friends: int
+
+def summary_display_name(u) -> str | None:
     display_name = (u.display_name or "").strip() or None
     if not display_name:
         display_name = f"Player #{u.id}" if u.id is not None else None
+    return display_name
+
+def summarize_user(u: User) -> UserSummary:
     return UserSummary(
         id=u.id,
-        display_name=display_name,
+        display_name=summary_display_name(u),
         bio=u.bio,
         profile_background=u.profile_background,
         picture_url=u.picture_url,
         showcased_badges=u.showcased_badges,
     )
 
+def serialize_request(fr: FriendRequest) -> FriendRequestResponse:
+    return FriendRequestResponse(
+        id=fr.id,
+        requester_id=fr.requester_id,
+        receiver_id=fr.receiver_id,
+        status=fr.status,
+        created_at=fr.created_at.isoformat(),
+        responded_at=fr.responded_at.isoformat() if fr.responded_at else None,
+    )
+
+# Row fast path for the list endpoints: select just these columns and encode with orjson
+SUMMARY_COLUMNS = (User.id, User.display_name, User.bio, User.profile_background, User.picture_url, User.showcased_badges)
+USER_SUMMARY = RowEncoder(*UserSummary.model_fields, display_name=summary_display_name)
+REQUEST_COLUMNS = tuple(getattr(FriendRequest, name) for name in FriendRequestResponse.model_fields)
+FRIEND_REQUEST = RowEncoder(*FriendRequestResponse.model_fields)
+
 @router.get("/users/browse", response_model=list[UserSummary])
-def browse_users(
+async def browse_users(
+    response: Response,
     query: str | None = None,
+    mode: SearchMode = "contains",
+    cursor: str | None = None,
     offset: int = 0,
     limit: int = 25,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Basic pagination with ordering by newest users first
+    # Searches are relevance-ranked; without a query, newest users come first.
+    # The next page's cursor is returned in X-Next-Cursor; `offset` still works.
     limit = max(1, min(limit, 50))
-    stmt = select(User)
-    if query:
-        q = f"%{query.lower()}%"
-        stmt = stmt.where(or_(User.display_name.ilike(q), User.bio.ilike(q)))
-    stmt = stmt.order_by(User.id.desc()).offset(offset).limit(limit)
-    users = db.exec(stmt).all()
-    return [summarize_user(u) for u in users if u.id != current_user.id]
+    if query and query.strip():
+        # Relevance order has no indexed sort key, so search cursors carry the offset
+        if cursor:
+            offset = decode_cursor(cursor, offset=int)["offset"]
+        users = await search_users(
+            db, query, mode=mode, offset=offset, limit=limit + 1, exclude_id=current_user.id, columns=SUMMARY_COLUMNS
+        )
+        users, more = split_page(users, limit)
+        set_next_cursor(response, encode_cursor(offset=offset + limit) if more else None)
+        return fast_json(USER_SUMMARY.many(users), response)
+    stmt = select(*SUMMARY_COLUMNS).where(User.id != current_user.id).order_by(User.id.desc()).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(User.id < decode_cursor(cursor, id=int)["id"])
+    else:
+        stmt = stmt.offset(offset)
+    users, more = split_page((await db.exec(stmt)).all(), limit)
+    set_next_cursor(response, encode_cursor(id=users[-1].id) if more else None)
+    return fast_json(USER_SUMMARY.many(users), response)
 
 @router.post("/users/friends/request/{target_user_id}", response_model=FriendRequestResponse)
-def create_friend_request(target_user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_friend_request(target_user_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     if target_user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot friend yourself")
-    target = db.get(User, target_user_id)
+    target = await db.get(User, target_user_id)
     if not target:
         raise HTTPException(status_code=404, detail="Target user not found")
     # Check existing (either direction)
@@ -74,42 +121,57 @@ def create_friend_request(target_user_id: int, db: Session = Depends(get_db), cu
             (FriendRequest.requester_id == target_user_id) & (FriendRequest.receiver_id == current_user.id),
         )
     )
-    existing = db.exec(existing_stmt).first()
+    existing = (await db.exec(existing_stmt)).first()
     if existing:
         raise HTTPException(status_code=409, detail="Friend request already exists or users already friends")
     fr = FriendRequest(requester_id=current_user.id, receiver_id=target_user_id, status="pending")
     db.add(fr)
-    db.commit()
-    db.refresh(fr)
-    return FriendRequestResponse(
-        id=fr.id,
-        requester_id=fr.requester_id,
-        receiver_id=fr.receiver_id,
-        status=fr.status,
-        created_at=fr.created_at.isoformat(),
-        responded_at=fr.responded_at.isoformat() if fr.responded_at else None,
+    await db.commit()
+    await db.refresh(fr)
+    return serialize_request(fr)
+
+async def _pending_requests_page(db: AsyncSession, column, user_id: int, cursor: str | None, limit: int):
+    # Oldest first, keyed on (created_at, id) to match the friend_requests indexes
+    stmt = (
+        select(*REQUEST_COLUMNS)
+        .where(column == user_id, FriendRequest.status == "pending")
+        .order_by(FriendRequest.created_at, FriendRequest.id)
+        .limit(limit + 1)
     )
+    if cursor:
+        after = decode_cursor(cursor, t=datetime, id=int)
+        stmt = stmt.where(tuple_(FriendRequest.created_at, FriendRequest.id) > tuple_(after["t"], after["id"]))
+    rows, more = split_page((await db.exec(stmt)).all(), limit)
+    next_cursor = encode_cursor(t=rows[-1].created_at, id=rows[-1].id) if more else None
+    return FRIEND_REQUEST.many(rows), next_cursor
 
 @router.get("/users/me/friends/requests", response_model=FriendRequestsList)
-def list_friend_requests(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    inbound_stmt = select(FriendRequest).where(FriendRequest.receiver_id == current_user.id, FriendRequest.status == "pending")
-    outbound_stmt = select(FriendRequest).where(FriendRequest.requester_id == current_user.id, FriendRequest.status == "pending")
-    inbound = db.exec(inbound_stmt).all()
-    outbound = db.exec(outbound_stmt).all()
-    def serialize(fr: FriendRequest) -> FriendRequestResponse:
-        return FriendRequestResponse(
-            id=fr.id,
-            requester_id=fr.requester_id,
-            receiver_id=fr.receiver_id,
-            status=fr.status,
-            created_at=fr.created_at.isoformat(),
-            responded_at=fr.responded_at.isoformat() if fr.responded_at else None,
-        )
-    return FriendRequestsList(inbound=[serialize(fr) for fr in inbound], outbound=[serialize(fr) for fr in outbound])
+async def list_friend_requests(
+    inbound_cursor: str | None = None,
+    outbound_cursor: str | None = None,
+    limit: int | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    limit = clamp_limit(limit)
+    inbound, inbound_next = await _pending_requests_page(
+        db, FriendRequest.receiver_id, current_user.id, inbound_cursor, limit
+    )
+    outbound, outbound_next = await _pending_requests_page(
+        db, FriendRequest.requester_id, current_user.id, outbound_cursor, limit
+    )
+    return fast_json(
+        {
+            "inbound": inbound,
+            "outbound": outbound,
+            "inbound_next_cursor": inbound_next,
+            "outbound_next_cursor": outbound_next,
+        }
+    )
 
 @router.post("/users/friends/request/{request_id}/accept", response_model=FriendRequestResponse)
-def accept_friend_request(request_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    fr = db.get(FriendRequest, request_id)
+async def accept_friend_request(request_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    fr = await db.get(FriendRequest, request_id)
     if not fr or fr.receiver_id != current_user.id:
         raise HTTPException(status_code=404, detail="Friend request not found")
     if fr.status != "pending":
@@ -117,47 +179,79 @@ def accept_friend_request(request_id: int, db: Session = Depends(get_db), curren
     fr.status = "accepted"
     fr.responded_at = datetime.utcnow()
     db.add(fr)
-    db.commit()
-    db.refresh(fr)
-    return FriendRequestResponse(
-        id=fr.id,
-        requester_id=fr.requester_id,
-        receiver_id=fr.receiver_id,
-        status=fr.status,
-        created_at=fr.created_at.isoformat(),
-        responded_at=fr.responded_at.isoformat() if fr.responded_at else None,
-    )
+    await friend_graph.add_friendship(db, fr.requester_id, fr.receiver_id)
+    await db.commit()
+    await db.refresh(fr)
+    return serialize_request(fr)
 
 @router.post("/users/friends/request/{request_id}/decline")
-def decline_friend_request(request_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    fr = db.get(FriendRequest, request_id)
+async def decline_friend_request(request_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    fr = await db.get(FriendRequest, request_id)
     if not fr or fr.receiver_id != current_user.id:
         raise HTTPException(status_code=404, detail="Friend request not found")
     if fr.status != "pending":
         raise HTTPException(status_code=400, detail="Request already processed")
-    db.delete(fr)
-    db.commit()
+    await db.delete(fr)
+    await db.commit()
     return {"status": "declined"}
 
 @router.get("/users/me/friends", response_model=list[UserSummary])
-def list_friends(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    stmt = select(FriendRequest).where(
-        or_(FriendRequest.requester_id == current_user.id, FriendRequest.receiver_id == current_user.id),
-        FriendRequest.status == "accepted"
+async def list_friends(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Validate against the friend list revision (a primary-key read) before loading the page
+    revision = await friends_revision(db, current_user.id)
+    etag = weak_etag("friends", current_user.id, revision, cursor or "", limit or "")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PRIVATE_CACHE_CONTROL)
+    response.headers.update(validator_headers(etag, PRIVATE_CACHE_CONTROL))
+    limit = clamp_limit(limit)
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else None
+    friends = await friend_graph.list_friends(
+        db, current_user.id, after_id=after_id, limit=limit + 1, columns=SUMMARY_COLUMNS
+    )
+    friends, more = split_page(friends, limit)
+    set_next_cursor(response, encode_cursor(id=friends[-1].id) if more else None)
+    return fast_json(USER_SUMMARY.many(friends), response)
+
+@router.get("/users/me/friends/suggestions", response_model=list[FriendSuggestion])
+async def suggest_friends(
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Friends of friends, most shared friends first
+    limit = max(1, min(limit, 50))
+    ranked = await friend_graph.suggest_friends(db, current_user.id, limit)
+    return [FriendSuggestion(**summarize_user(u).model_dump(), mutual_friends=count) for u, count in ranked]
+
+@router.get("/users/{user_id}/friends/mutual", response_model=list[UserSummary])
+async def list_mutual_friends(
+    user_id: int,
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not await db.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    limit = clamp_limit(limit)
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else None
+    mutual = await friend_graph.mutual_friends(
+        db, current_user.id, user_id, after_id=after_id, limit=limit + 1, columns=SUMMARY_COLUMNS
     )
-    rows = db.exec(stmt).all()
-    friend_ids: set[int] = set()
-    for fr in rows:
-        other_id = fr.receiver_id if fr.requester_id == current_user.id else fr.requester_id
-        friend_ids.add(other_id)
-    if not friend_ids:
-        return []
-    users_stmt = select(User).where(User.id.in_(friend_ids))
-    friends = db.exec(users_stmt).all()
-    return [summarize_user(u) for u in friends]
+    mutual, more = split_page(mutual, limit)
+    set_next_cursor(response, encode_cursor(id=mutual[-1].id) if more else None)
+    return fast_json(USER_SUMMARY.many(mutual), response)
 
 @router.delete("/users/friends/{friend_user_id}")
-def remove_friend(friend_user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def remove_friend(friend_user_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     stmt = select(FriendRequest).where(
         or_(
             (FriendRequest.requester_id == current_user.id) & (FriendRequest.receiver_id == friend_user_id),
@@ -165,9 +259,11 @@ def remove_friend(friend_user_id: int, db: Session = Depends(get_db), current_us
         ),
         FriendRequest.status == "accepted"
     )
-    fr = db.exec(stmt).first()
-    if not fr:
+    fr = (await db.exec(stmt)).first()
+    removed_edges = await friend_graph.remove_friendship(db, current_user.id, friend_user_id)
+    if not fr and not removed_edges:
         raise HTTPException(status_code=404, detail="Friend link not found")
-    db.delete(fr)
-    db.commit()
+    if fr:
+        await db.delete(fr)
+    await db.commit()
     return {"status": "removed"}
\ No newline at end of file
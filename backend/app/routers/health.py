@@ -0,0 +1,41 @@
+"""Liveness and readiness probes."""
+import asyncio
+
+from decouple import config
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.database import session_scope
+
+# How long /readyz waits for the database before reporting not ready
+READYZ_DB_TIMEOUT = config("READYZ_DB_TIMEOUT", default=2, cast=float)
+
+router = APIRouter()
+
+
+async def _ping_database() -> None:
+    async with session_scope() as db:
+        await db.execute(text("SELECT 1"))
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz() -> dict:
+    """The process is up and serving; never touches the database."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request) -> JSONResponse:
+    """Startup work has finished and the database answers."""
+    warm_up = getattr(request.app.state, "warm_up", None)
+    if warm_up is not None and not warm_up.done():
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        await asyncio.wait_for(_ping_database(), READYZ_DB_TIMEOUT)
+    except Exception as exc:
+        return JSONResponse(
+            {"status": "database unavailable", "detail": repr(exc)},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return JSONResponse({"status": "ready"})
@@ -0,0 +1,125 @@
+"""Operational endpoints for telemetry and maintenance checks."""
+import secrets
+
+from decouple import config
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_db, pool_status
+from app.models import Badge
+from app.services.badges import badge_catalog, bump_badge_catalog_version, install_badge_catalog
+from app.services.coins import reconcile_balances
+from app.services.public_cache import public_cache
+from app.utils.profiling import capture_store
+
+# Internal endpoints are disabled unless a token is configured
+INTERNAL_API_TOKEN = config("INTERNAL_API_TOKEN", default="")
+
+
+def require_internal_token(x_internal_token: str | None = Header(default=None)) -> None:
+    """Only allow callers presenting the configured internal token."""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token")
+
+
+router = APIRouter(prefix="/internal", dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/pool")
+async def get_pool_stats() -> dict:
+    """Checked-out/overflow counts and checkout wait-time histograms per engine."""
+    return pool_status()
+
+
+@router.get("/cache")
+async def get_cache_stats() -> dict:
+    """Public profile/badge cache: local tier counters plus loader runs and coalesced waits."""
+    return public_cache.stats()
+
+
+@router.get("/coins/reconcile")
+async def get_coin_mismatches(db: AsyncSession = Depends(get_db)) -> list[dict]:
+    """Users whose coin balance differs from their ledger total."""
+    return [
+        {"user_id": m.user_id, "balance": m.balance, "ledger_total": m.ledger_total}
+        for m in await reconcile_balances(db)
+    ]
+
+
+class BadgeDefinitionIn(BaseModel):
+    name: str = Field(max_length=100)
+    description: str | None = Field(default=None, max_length=255)
+
+
+@router.put("/badges/{code}")
+async def upsert_badge(
+    definition: BadgeDefinitionIn,
+    code: str = Path(max_length=64),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Create or update a badge definition and publish a new catalog version."""
+    badge = (await db.exec(select(Badge).where(Badge.code == code))).first()
+    if badge is None:
+        badge = Badge(code=code)
+    badge.name = definition.name
+    badge.description = definition.description
+    db.add(badge)
+    version = await bump_badge_catalog_version(db)
+    await db.commit()
+    catalog = install_badge_catalog((await db.exec(select(Badge))).all(), version)
+    return {"code": code, "catalog_version": catalog.version, "etag": catalog.etag}
+
+
+@router.get("/badges/catalog")
+async def get_catalog_version() -> dict:
+    """Version and ETag of this worker's badge catalog."""
+    catalog = await badge_catalog()
+    return {"version": catalog.version, "etag": catalog.etag, "badges": len(catalog.by_code)}
+
+
+@router.get("/profiles")
+async def list_profiles() -> list[dict]:
+    """Stored request profiles, newest first."""
+    return await run_in_threadpool(capture_store.list)
+
+
+@router.get("/profiles/{capture_id}")
+async def get_profile(capture_id: str) -> dict:
+    """One capture's metadata, including the SQL it ran."""
+    meta = await run_in_threadpool(capture_store.get, capture_id)
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return meta
+
+
+def _profile_file(capture_id: str, kind: str):
+    path = capture_store.file(capture_id, kind)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return path
+
+
+@router.get("/profiles/{capture_id}/pstats")
+async def download_pstats(capture_id: str) -> FileResponse:
+    """cProfile data, for ``pstats.Stats`` or snakeviz."""
+    return FileResponse(
+        _profile_file(capture_id, "pstats"),
+        media_type="application/octet-stream",
+        filename=f"{capture_id}.pstats",
+    )
+
+
+@router.get("/profiles/{capture_id}/folded")
+async def download_folded(capture_id: str) -> FileResponse:
+    """Folded stacks, for flamegraph.pl or speedscope."""
+    return FileResponse(
+        _profile_file(capture_id, "folded"),
+        media_type="text/plain; charset=utf-8",
+        filename=f"{capture_id}.folded",
+    )
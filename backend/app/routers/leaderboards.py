@@ -0,0 +1,66 @@
+"""Coins-earned and longest-run leaderboards: global, this week, and among friends."""
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_db
+from app.models import User
+from app.routers.friends import summary_display_name
+from app.services.leaderboards import Metric, Scope, Standing, leaderboard_page
+from app.utils.auth0 import get_current_user
+
+router = APIRouter()
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    display_name: str | None
+    picture_url: str | None
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    metric: Metric
+    scope: Scope
+    total: int
+    entries: list[LeaderboardEntry]
+    me: LeaderboardEntry | None
+
+
+@router.get("/leaderboards/{metric}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    metric: Metric,
+    scope: Scope = "global",
+    limit: int = Query(default=10, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> LeaderboardResponse:
+    """A page of the board ranked by ``metric`` plus the caller's own rank."""
+    page = await leaderboard_page(db, metric, scope, current_user.id, offset=offset, limit=limit)
+    standings = [*page.entries, *([page.me] if page.me is not None else [])]
+    ids = {s.user_id for s in standings}
+    users = {}
+    if ids:
+        rows = await db.exec(select(User.id, User.display_name, User.picture_url).where(User.id.in_(ids)))
+        users = {row.id: row for row in rows.all()}
+
+    def entry(standing: Standing) -> LeaderboardEntry:
+        user = users.get(standing.user_id)
+        return LeaderboardEntry(
+            rank=standing.rank,
+            user_id=standing.user_id,
+            display_name=summary_display_name(user) if user is not None else None,
+            picture_url=user.picture_url if user is not None else None,
+            score=standing.score,
+        )
+
+    return LeaderboardResponse(
+        metric=metric,
+        scope=scope,
+        total=page.total,
+        entries=[entry(s) for s in page.entries],
+        me=entry(page.me) if page.me is not None else None,
+    )
@@ -0,0 +1,28 @@
+"""Prometheus scrape endpoint."""
+import secrets
+
+from decouple import config
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.utils.instrumentation import render_metrics
+
+# When set, scrapers must send "Authorization: Bearer <token>" (Prometheus `authorization` config)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+
+def require_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    if not METRICS_TOKEN:
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(_: None = Depends(require_metrics_token)) -> PlainTextResponse:
+    """Request latency, status, SQL count/time and N+1 metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
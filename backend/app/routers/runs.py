@@ -0,0 +1,122 @@
+"""Run ingestion: apply a whole run's rewards, badges and stats in one request."""
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_db
+from app.models import Run, User
+from app.services.badges import (
+    RULE_CODES,
+    MinigameEvent,
+    evaluate_badge_rules,
+    fold_run,
+    grant_badges,
+    record_run_stats,
+)
+from app.services.coins import CoinEntry, apply_coin_entries, get_balance
+from app.services.identity import remember_coins
+from app.services.leaderboards import record_coins, record_run
+from app.services.public_cache import invalidate_badges
+from app.utils.auth0 import get_current_user
+from app.utils.sql import dialect_insert
+
+router = APIRouter()
+
+
+class MinigameResult(BaseModel):
+    minigame: str | None = Field(default=None, max_length=64)
+    success: bool = True
+    reward: int = Field(default=0, ge=0)
+    time_remaining: float | None = None
+
+
+class RunSummaryRequest(BaseModel):
+    run_id: str = Field(min_length=1, max_length=64)
+    minigames: list[MinigameResult] = Field(default_factory=list, max_length=500)
+    lives_remaining: int = Field(default=0, ge=0)
+    time_remaining: float | None = None
+    badges: list[str] = Field(default_factory=list, max_length=50)
+
+
+class RunResponse(BaseModel):
+    run_id: str
+    status: Literal["recorded", "duplicate"]
+    coins: int
+    coins_earned: int
+    minigames_completed: int
+    badges_awarded: list[str]
+
+
+@router.post("/users/me/runs", response_model=RunResponse)
+async def submit_run(
+    request: RunSummaryRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> RunResponse:
+    """Record a finished run and award every badge its counters now satisfy.
+
+    Replaying the same run_id is a no-op.
+    """
+    totals = fold_run(
+        MinigameEvent(success=m.success, reward=m.reward, time_remaining=m.time_remaining)
+        for m in request.minigames
+    )
+
+    insert_run = (
+        dialect_insert(db, Run)
+        .values(
+            user_id=current_user.id,
+            client_run_id=request.run_id,
+            minigames_played=totals.minigames_played,
+            minigames_completed=totals.minigames_completed,
+            coins_earned=totals.coins_earned,
+            lives_remaining=request.lives_remaining,
+            time_remaining=request.time_remaining,
+            created_at=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "client_run_id"])
+        .returning(Run.id)
+    )
+    run_id = (await db.exec(insert_run)).scalar_one_or_none()
+    if run_id is None:
+        existing = (
+            await db.exec(select(Run).where(Run.user_id == current_user.id, Run.client_run_id == request.run_id))
+        ).one()
+        return RunResponse(
+            run_id=request.run_id,
+            status="duplicate",
+            coins=await get_balance(db, current_user.id),
+            coins_earned=existing.coins_earned,
+            minigames_completed=existing.minigames_completed,
+            badges_awarded=[],
+        )
+
+    entries = [
+        CoinEntry(amount=m.reward, reason="run_reward", idempotency_key=f"run:{run_id}:{index}")
+        for index, m in enumerate(request.minigames)
+        if m.success and m.reward
+    ]
+    coins = await apply_coin_entries(db, current_user.id, entries)
+    stats = await record_run_stats(db, current_user.id, totals)
+    # Rule-backed badges are decided by the server; other claimed codes are still honoured
+    earned = evaluate_badge_rules(stats) | (set(request.badges) - RULE_CODES)
+    awarded = await grant_badges(db, current_user.id, earned)
+    await db.commit()
+
+    remember_coins(current_user, coins)
+    if awarded:
+        await invalidate_badges(current_user.id)
+    await record_coins(current_user.id, sum(e.amount for e in entries))
+    await record_run(current_user.id, totals.minigames_completed)
+    return RunResponse(
+        run_id=request.run_id,
+        status="recorded",
+        coins=coins,
+        coins_earned=totals.coins_earned,
+        minigames_completed=totals.minigames_completed,
+        badges_awarded=awarded,
+    )
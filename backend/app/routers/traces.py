@@ -0,0 +1,145 @@
+"""Trace validation: score submitted strokes with the server-side evaluator.
+
+Clients send the shape they were shown and the stroke; the reward and the
+threshold come from the server's shape registry (``trace_eval.registry``),
+looked up by shape id, never from the request.
+"""
+import math
+from typing import TYPE_CHECKING, Annotated, Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+
+from app.utils.auth0 import verify_token
+from app.utils.body import OCTET_STREAM, octet_stream_body
+
+# numpy and the evaluator are imported on the first trace request, not at worker start
+if TYPE_CHECKING:
+    import numpy as np
+
+    from app.services.trace_eval.codec import Stroke
+
+router = APIRouter()
+
+MAX_STROKE_POINTS = 20000
+MAX_STROKE_BYTES = 256 * 1024
+MAX_SHAPE_POINTS = 16
+# Canvas coordinates beyond this are not something the game can draw
+MAX_COORDINATE = 10000.0
+
+Coordinate = Annotated[float, Field(ge=-MAX_COORDINATE, le=MAX_COORDINATE, allow_inf_nan=False)]
+Length = Annotated[float, Field(gt=0, le=MAX_COORDINATE, allow_inf_nan=False)]
+ShapeId = Annotated[str, Field(min_length=1, max_length=64)]
+
+
+class PointIn(BaseModel):
+    x: Coordinate
+    y: Coordinate
+
+
+# Any client-sent `reward` or `threshold` is ignored; the registry decides both
+class PolygonShapeIn(BaseModel):
+    id: ShapeId
+    type: Literal["polygon"]
+    points: list[PointIn] = Field(min_length=2, max_length=MAX_SHAPE_POINTS)
+
+
+class CircleShapeIn(BaseModel):
+    id: ShapeId
+    type: Literal["circle"]
+    center: PointIn
+    radius: Length
+
+
+class EllipseShapeIn(BaseModel):
+    id: ShapeId
+    type: Literal["ellipse"]
+    center: PointIn
+    radiusX: Length
+    radiusY: Length
+    rotation: float | None = Field(default=0, ge=-math.tau, le=math.tau, allow_inf_nan=False)
+
+
+ShapeIn = Annotated[PolygonShapeIn | CircleShapeIn | EllipseShapeIn, Field(discriminator="type")]
+
+
+class TraceSubmission(BaseModel):
+    shape: ShapeIn
+    points: list[PointIn] = Field(max_length=MAX_STROKE_POINTS)
+
+
+class StrokeMeta(BaseModel):
+    """Metadata carried inside a binary stroke payload."""
+
+    shape: ShapeIn
+
+
+class TraceVerdict(BaseModel):
+    shape_id: str
+    success: bool
+    reward: int
+
+
+def score_points(shape_in: ShapeIn, points: "np.ndarray") -> TraceVerdict:
+    from app.services.trace_eval import ShapeRejected, check_shape, evaluate_trace, shape_from_dict
+
+    shape = shape_from_dict(shape_in.model_dump())
+    try:
+        spec = check_shape(shape)
+    except ShapeRejected as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    success = evaluate_trace(points, shape, spec.threshold)
+    return TraceVerdict(shape_id=shape.id, success=success, reward=spec.reward if success else 0)
+
+
+def score_submission(submission: TraceSubmission) -> TraceVerdict:
+    import numpy as np
+
+    points = np.array([(p.x, p.y) for p in submission.points], dtype=np.float64).reshape(-1, 2)
+    return score_points(submission.shape, points)
+
+
+async def stroke_body(body: bytes = Depends(octet_stream_body(MAX_STROKE_BYTES))) -> "Stroke":
+    """Decode a binary stroke request body (see ``trace_eval.codec``)."""
+    from app.services.trace_eval.codec import StrokeDecodeError, decode_stroke
+
+    try:
+        return decode_stroke(body, max_points=MAX_STROKE_POINTS)
+    except StrokeDecodeError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+# Plain `def` handlers: scoring is CPU work, so it runs in the threadpool.
+@router.post("/traces/validate", response_model=TraceVerdict)
+def validate_trace(submission: TraceSubmission, _: dict = Depends(verify_token)) -> TraceVerdict:
+    """Score one stroke against a shape using the same rules as the frontend."""
+    return score_submission(submission)
+
+
+@router.post("/traces/validate/batch", response_model=list[TraceVerdict])
+def validate_traces(
+    submissions: Annotated[list[TraceSubmission], Body(max_length=100)],
+    _: dict = Depends(verify_token),
+) -> list[TraceVerdict]:
+    """Score several strokes in one request."""
+    return [score_submission(s) for s in submissions]
+
+
+@router.post(
+    "/traces/validate/stroke",
+    response_model=TraceVerdict,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {OCTET_STREAM: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+def validate_stroke(stroke: "Stroke" = Depends(stroke_body), _: dict = Depends(verify_token)) -> TraceVerdict:
+    """Score a binary-encoded stroke; its metadata must carry ``shape``."""
+    try:
+        meta = StrokeMeta.model_validate(stroke.meta)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors()) from exc
+    return score_points(meta.shape, stroke.points)
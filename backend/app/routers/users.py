@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from pydantic import BaseModel
+from datetime import datetime
 
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel, Field
+
+from app.database import get_db, session_scope
 from app.models import User, OwnedItem
+from app.services.coins import CoinEntry, get_balance, record_coin_entries, set_balance
+from app.services.identity import remember_coins, remember_user
+from app.services.leaderboards import record_coins
+from app.services.public_cache import CachedResponse, profile_key, public_cache
+from app.services.shop import InsufficientCoinsError, UnknownItemError, purchase_items
 from app.utils.auth0 import get_current_user
+from app.utils.etag import PUBLIC_CACHE_CONTROL, etag_matches, not_modified, validator_headers, weak_etag
+from app.utils.sql import dialect_insert
 
 router = APIRouter()
 
@@ -13,6 +23,7 @@ class CoinsResponse(BaseModel):
 
 class IncrementCoinsRequest(BaseModel):
     amount: int
+    idempotency_key: str | None = Field(default=None, max_length=64)
 
 class SetCoinsRequest(BaseModel):
     coins: int
@@ -24,6 +35,15 @@ class OwnedItemResponse(BaseModel):
     item_id: str
     created_at: str
 
+class PurchaseRequest(BaseModel):
+    item_ids: list[str] = Field(min_length=1, max_length=50)
+
+class PurchaseResponse(BaseModel):
+    purchased: list[str]
+    already_owned: list[str]
+    total: int
+    coins: int
+
 class BioResponse(BaseModel):
     bio: str | None
 
@@ -65,7 +85,7 @@ class UpdateProfileRequest(BaseModel):
     picture_url: str | None = None
 
 
-def _serialize_profile(user: User) -> ProfileResponse:
+def serialize_profile(user: User) -> ProfileResponse:
     return ProfileResponse(
         id=user.id,
         display_name=user.display_name,
@@ -76,19 +96,45 @@ def _serialize_profile(user: User) -> ProfileResponse:
     )
 
 
+def _public_profile_entry(user: User) -> CachedResponse:
+    return CachedResponse(
+        body=serialize_profile(user).model_dump_json().encode(),
+        etag=weak_etag("profile", user.id, user.revision),
+    )
+
+
+async def _profile_changed(user: User) -> None:
+    """Write-through after a committed profile change: identity cache, search index and public cache."""
+    remember_user(user)
+    await public_cache.set(profile_key(user.id), _public_profile_entry(user).to_bytes())
+
+
+async def _reload_fields(db: AsyncSession, user: User, names) -> None:
+    """Re-read ``names`` from the row before a write.
+
+    The resolved user may be an identity snapshot up to ``IDENTITY_CACHE_TTL``
+    old. Setting a field back to a value the snapshot still holds would look
+    unchanged to the ORM and never reach the database.
+    """
+    names = list(names)
+    if names:
+        await db.refresh(user, attribute_names=names)
+
+
 @router.get("/users/me/profile", response_model=ProfileResponse)
 async def get_my_profile(current_user: User = Depends(get_current_user)) -> ProfileResponse:
     """Return the authenticated user's profile."""
-    return _serialize_profile(current_user)
+    return serialize_profile(current_user)
 
 
 @router.put("/users/me/profile", response_model=ProfileResponse)
 async def update_my_profile(
     request: UpdateProfileRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> ProfileResponse:
     """Update mutable profile fields in a single request."""
+    await _reload_fields(db, current_user, request.model_dump(exclude_none=True))
     updated = False
 
     if request.display_name is not None:
@@ -122,70 +168,100 @@ async def update_my_profile(
 
     if updated:
         db.add(current_user)
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
+        await _profile_changed(current_user)
 
-    return _serialize_profile(current_user)
+    return serialize_profile(current_user)
 
 @router.get("/users/me/coins", response_model=CoinsResponse)
 async def get_coins(
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> CoinsResponse:
     """Get the current user's coin balance."""
-    return CoinsResponse(coins=current_user.coins)
+    return CoinsResponse(coins=await get_balance(db, current_user.id))
 
 @router.post("/users/me/coins/increment", response_model=CoinsResponse)
 async def increment_coins(
     request: IncrementCoinsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> CoinsResponse:
     """Increment (or decrement if negative) the user's coins."""
-    current_user.coins += request.amount
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    return CoinsResponse(coins=current_user.coins)
+    entry = CoinEntry(amount=request.amount, reason="increment", idempotency_key=request.idempotency_key)
+    result = await record_coin_entries(db, current_user.id, [entry])
+    await db.commit()
+    remember_coins(current_user, result.coins)
+    await record_coins(current_user.id, result.applied)
+    return CoinsResponse(coins=result.coins)
 
 @router.put("/users/me/coins", response_model=CoinsResponse)
 async def set_coins(
     request: SetCoinsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> CoinsResponse:
     """Set the user's coins to a specific value."""
-    current_user.coins = request.coins
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    return CoinsResponse(coins=current_user.coins)
+    coins = await set_balance(db, current_user.id, request.coins)
+    await db.commit()
+    remember_coins(current_user, coins)
+    return CoinsResponse(coins=coins)
 
 @router.get("/users/me/owned-items", response_model=list[OwnedItemResponse])
 async def get_owned_items(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> list[OwnedItemResponse]:
     stmt = select(OwnedItem).where(OwnedItem.user_id == current_user.id)
-    rows = db.exec(stmt).all()
+    rows = (await db.exec(stmt)).all()
     return [OwnedItemResponse(item_id=r.item_id, created_at=r.created_at.isoformat()) for r in rows]
 
 @router.post("/users/me/owned-items", response_model=OwnedItemResponse)
 async def add_owned_item(
     request: AddOwnedItemRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> OwnedItemResponse:
-    # Prevent duplicates
-    existing_stmt = select(OwnedItem).where(OwnedItem.user_id == current_user.id, OwnedItem.item_id == request.item_id)
-    existing = db.exec(existing_stmt).first()
-    if existing:
-        return OwnedItemResponse(item_id=existing.item_id, created_at=existing.created_at.isoformat())
-
-    owned = OwnedItem(user_id=current_user.id, item_id=request.item_id)
-    db.add(owned)
-    db.commit()
-    db.refresh(owned)
-    return OwnedItemResponse(item_id=owned.item_id, created_at=owned.created_at.isoformat())
+    # One round trip: the unique (user_id, item_id) index turns duplicates into no-ops
+    stmt = (
+        dialect_insert(db, OwnedItem)
+        .values(user_id=current_user.id, item_id=request.item_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["user_id", "item_id"])
+        .returning(OwnedItem.created_at)
+    )
+    created_at = (await db.exec(stmt)).scalar_one_or_none()
+    if created_at is None:
+        existing_stmt = select(OwnedItem.created_at).where(
+            OwnedItem.user_id == current_user.id, OwnedItem.item_id == request.item_id
+        )
+        created_at = (await db.exec(existing_stmt)).one()
+    await db.commit()
+    return OwnedItemResponse(item_id=request.item_id, created_at=created_at.isoformat())
+
+@router.post("/users/me/purchases", response_model=PurchaseResponse)
+async def purchase(
+    request: PurchaseRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> PurchaseResponse:
+    """Buy several shop items at once; items and the coin debit commit together or not at all."""
+    try:
+        result = await purchase_items(db, current_user.id, request.item_ids)
+    except UnknownItemError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except InsufficientCoinsError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Not enough coins") from exc
+    await db.commit()
+    remember_coins(current_user, result.coins)
+    return PurchaseResponse(
+        purchased=result.purchased,
+        already_owned=result.already_owned,
+        total=result.total,
+        coins=result.coins,
+    )
 
 @router.get("/users/me/bio", response_model=BioResponse)
 async def get_bio(
@@ -198,15 +274,17 @@ async def get_bio(
 async def update_bio(
     request: UpdateBioRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> BioResponse:
     """Update the user's bio."""
     if len(request.bio) > 500:
         raise HTTPException(status_code=400, detail="Bio must be 500 characters or less")
+    await _reload_fields(db, current_user, ["bio"])
     current_user.bio = request.bio
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await _profile_changed(current_user)
     return BioResponse(bio=current_user.bio)
 
 @router.get("/users/me/display-name", response_model=DisplayNameResponse)
@@ -220,17 +298,19 @@ async def get_display_name(
 async def update_display_name(
     request: UpdateDisplayNameRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> DisplayNameResponse:
     """Update the user's display name."""
     if len(request.display_name) > 50:
         raise HTTPException(status_code=400, detail="Display name must be 50 characters or less")
     if len(request.display_name.strip()) == 0:
         raise HTTPException(status_code=400, detail="Display name cannot be empty")
+    await _reload_fields(db, current_user, ["display_name"])
     current_user.display_name = request.display_name
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await _profile_changed(current_user)
     return DisplayNameResponse(display_name=current_user.display_name)
 
 @router.get("/users/me/profile-background", response_model=ProfileBackgroundResponse)
@@ -244,13 +324,15 @@ async def get_profile_background(
 async def update_profile_background(
     request: UpdateProfileBackgroundRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> ProfileBackgroundResponse:
     """Update the user's profile background."""
+    await _reload_fields(db, current_user, ["profile_background"])
     current_user.profile_background = request.profile_background
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await _profile_changed(current_user)
     return ProfileBackgroundResponse(profile_background=current_user.profile_background)
 
 @router.get("/users/me/showcased-badges", response_model=ShowcasedBadgesResponse)
@@ -264,19 +346,35 @@ async def get_showcased_badges(
 async def update_showcased_badges(
     request: UpdateShowcasedBadgesRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> ShowcasedBadgesResponse:
     """Update the user's showcased badges (up to 3, comma-separated codes)."""
+    await _reload_fields(db, current_user, ["showcased_badges"])
     current_user.showcased_badges = request.showcased_badges
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await _profile_changed(current_user)
     return ShowcasedBadgesResponse(showcased_badges=current_user.showcased_badges)
 
+async def _load_public_profile(user_id: int) -> bytes | None:
+    # Runs detached from the request (see TieredCache.get_or_load), so it opens its own session
+    async with session_scope() as db:
+        user = await db.get(User, user_id)
+    return _public_profile_entry(user).to_bytes() if user is not None else None
+
+
 @router.get("/users/{user_id}/profile", response_model=ProfileResponse)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)) -> ProfileResponse:
-    """Get public profile information for a user."""
-    user = db.get(User, user_id)
-    if not user:
+async def get_user_profile(user_id: int, if_none_match: str | None = Header(default=None)) -> Response:
+    """Get public profile information for a user (served through the public cache)."""
+    raw = await public_cache.get_or_load(profile_key(user_id), lambda: _load_public_profile(user_id))
+    if raw is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return _serialize_profile(user)
+    entry = CachedResponse.from_bytes(raw)
+    if etag_matches(if_none_match, entry.etag):
+        return not_modified(entry.etag, PUBLIC_CACHE_CONTROL)
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers=validator_headers(entry.etag, PUBLIC_CACHE_CONTROL),
+    )
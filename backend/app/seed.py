@@ -0,0 +1,20 @@
+"""Seed reference data once per deployment, e.g. as a release step after migrations.
+
+    cd backend && alembic upgrade head && python -m app.seed
+
+Workers do not seed at boot (``SEED_ON_STARTUP`` defaults to false); they
+only load the badge catalog this command writes.
+"""
+import logging
+
+from app.services.badges import seed_default_badges
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    created = seed_default_badges()
+    logging.getLogger("app.seed").info("Seeded %d default badge(s)", created)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,40 @@
-"""Badge seeding service for default achievements."""
+"""Badge seeding, the in-process badge catalog and the badge rule engine.
+
+Every worker holds the catalog in memory. Edits bump the ``badges`` row of
+``catalog_versions`` in the same transaction, and workers compare that
+number at most every ``BADGE_CATALOG_CHECK_INTERVAL`` seconds, reloading
+when it differs, so all workers converge on the same names and ETags.
+"""
+import json
+import logging
+import threading
+import time
 from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
 
+from decouple import config
+from sqlalchemy import case, text
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_engine
+from app.models import Badge, CatalogVersion, UserBadge, UserStats
+from app.services.revisions import touch_users
+from app.utils.etag import strong_etag
+from app.utils.sql import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock id shared by everything that seeds badges
+SEED_LOCK_KEY = 0x534B5241
 
-from app.database import engine
-from app.models import Badge
+# How long a worker serves its catalog before comparing it with the stored version
+BADGE_CATALOG_CHECK_INTERVAL = config("BADGE_CATALOG_CHECK_INTERVAL", default=5, cast=float)
+BADGE_CATALOG = "badges"
 
 DEFAULT_BADGES: tuple[dict[str, str | None], ...] = (
     {
@@ -35,21 +65,145 @@ DEFAULT_BADGES: tuple[dict[str, str | None], ...] = (
 )
 
 
+@dataclass(frozen=True)
+class BadgeDefinition:
+    id: int
+    code: str
+    name: str
+    description: str | None
+
+
+@dataclass(frozen=True)
+class BadgeCatalog:
+    """Immutable snapshot of the ``badges`` table plus its pre-serialized ``GET /badges`` body."""
+
+    version: int
+    by_code: Mapping[str, BadgeDefinition]
+    by_id: Mapping[int, BadgeDefinition]
+    body: bytes
+    etag: str
+
+
+_catalog_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_catalog: BadgeCatalog | None = None
+_checked_at = float("-inf")
+
+
+def build_badge_catalog(badges: Iterable[Badge], version: int) -> BadgeCatalog:
+    definitions = sorted(
+        (BadgeDefinition(id=b.id, code=b.code, name=b.name, description=b.description) for b in badges),
+        key=lambda d: d.name,
+    )
+    # Same separators/escaping as FastAPI's JSONResponse, ordered by name as before
+    body = json.dumps(
+        [{"code": d.code, "name": d.name, "description": d.description} for d in definitions],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    return BadgeCatalog(
+        version=version,
+        by_code=MappingProxyType({d.code: d for d in definitions}),
+        by_id=MappingProxyType({d.id: d for d in definitions}),
+        body=body,
+        etag=strong_etag(body),
+    )
+
+
+def install_badge_catalog(badges: Iterable[Badge], version: int) -> BadgeCatalog:
+    """Swap in a catalog built from ``badges`` at the stored ``version``."""
+    global _catalog, _checked_at
+    with _catalog_lock:
+        _catalog = build_badge_catalog(badges, version)
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def _mark_checked(at: float | None = None) -> None:
+    global _checked_at
+    with _catalog_lock:
+        _checked_at = time.monotonic() if at is None else at
+
+
+def _bump_version_stmt(db: Session | AsyncSession):
+    stmt = dialect_insert(db, CatalogVersion).values(name=BADGE_CATALOG, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=["name"], set_={"version": CatalogVersion.version + 1}
+    ).returning(CatalogVersion.version)
+
+
+async def bump_badge_catalog_version(db: AsyncSession) -> int:
+    """Publish a badge edit to every worker; call inside the transaction that makes it."""
+    return (await db.exec(_bump_version_stmt(db))).scalar_one()
+
+
+def _stored_version(session: Session) -> int:
+    stmt = select(CatalogVersion.version).where(CatalogVersion.name == BADGE_CATALOG)
+    return session.exec(stmt).first() or 0
+
+
+def refresh_badge_catalog(session: Session | None = None) -> BadgeCatalog:
+    """Reload the catalog when the database holds another version than this worker (blocking).
+
+    Concurrent callers share one check: whoever waited on the lock reuses the
+    result if it is fresh.
+    """
+    if session is None:
+        with Session(get_engine()) as own_session:
+            return refresh_badge_catalog(own_session)
+    with _reload_lock:
+        catalog = _catalog
+        if catalog is not None and time.monotonic() - _checked_at < BADGE_CATALOG_CHECK_INTERVAL:
+            return catalog
+        version = _stored_version(session)
+        if catalog is not None and catalog.version == version:
+            _mark_checked()
+            return catalog
+        return install_badge_catalog(session.exec(select(Badge)).all(), version)
+
+
+async def badge_catalog() -> BadgeCatalog:
+    """Current catalog for request handlers.
+
+    Served from memory between checks; a due check (or the first load, if a
+    request beats the startup warm-up) runs in the threadpool so it never
+    blocks the event loop. If the check fails, the catalog already held is
+    served.
+    """
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _checked_at < BADGE_CATALOG_CHECK_INTERVAL:
+        return catalog
+    try:
+        return await run_in_threadpool(refresh_badge_catalog)
+    except Exception:
+        if catalog is None:
+            raise
+        logger.warning("Badge catalog check failed; serving version %s", catalog.version, exc_info=True)
+        return catalog
+
+
 def _existing_codes(session: Session) -> set[str]:
     """Get all existing badge codes from database."""
     rows = session.exec(select(Badge.code)).all()
     return set(rows)
 
 
-def seed_default_badges(definitions: Iterable[dict[str, str | None]] | None = None) -> None:
-    """Ensure the default badge definitions exist in the database."""
+def seed_default_badges(definitions: Iterable[dict[str, str | None]] | None = None) -> int:
+    """Ensure the default badge definitions exist in the database; returns how many were added.
+
+    On PostgreSQL a transaction-scoped advisory lock serializes concurrent
+    seeders (workers booting together, or the ``app.seed`` command), so they
+    never race on the unique badge code.
+    """
     badge_definitions = tuple(definitions) if definitions is not None else DEFAULT_BADGES
     if not badge_definitions:
-        return
+        return 0
 
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEED_LOCK_KEY})
         present = _existing_codes(session)
-        created = False
+        created = 0
         for badge in badge_definitions:
             code = badge["code"]
             if code in present:
@@ -61,6 +215,143 @@ def seed_default_badges(definitions: Iterable[dict[str, str | None]] | None = No
                     description=badge.get("description"),
                 )
             )
-            created = True
+            created += 1
         if created:
+            session.execute(_bump_version_stmt(session))
             session.commit()
+            _mark_checked(float("-inf"))
+        refresh_badge_catalog(session)
+    return created
+
+
+# --- Rule engine -----------------------------------------------------------
+
+FAST_COMPLETION_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class MinigameEvent:
+    success: bool
+    reward: int = 0
+    time_remaining: float | None = None
+
+
+@dataclass(frozen=True)
+class RunTotals:
+    """Counters for one run, folded from its minigame events in a single pass."""
+
+    minigames_played: int = 0
+    minigames_completed: int = 0
+    coins_earned: int = 0
+    fast_completions: int = 0
+    best_streak: int = 0
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    """Award ``code`` once the ``UserStats`` counter ``stat`` reaches ``threshold``."""
+
+    code: str
+    stat: str
+    threshold: int
+
+    def satisfied(self, stats: Mapping[str, int]) -> bool:
+        return stats.get(self.stat, 0) >= self.threshold
+
+
+BADGE_RULES: tuple[BadgeRule, ...] = (
+    BadgeRule("FIRST_STEPS", "minigames_completed", 1),
+    BadgeRule("PERFECT_10", "best_streak", 10),
+    BadgeRule("COIN_COLLECTOR", "best_run_coins", 50),
+    BadgeRule("SPEED_DEMON", "fast_completions", 1),
+    BadgeRule("SURVIVOR", "best_run_completed", 20),
+)
+RULE_CODES = frozenset(rule.code for rule in BADGE_RULES)
+
+
+def fold_run(events: Iterable[MinigameEvent]) -> RunTotals:
+    played = completed = coins = fast = streak = best_streak = 0
+    for event in events:
+        played += 1
+        if event.success:
+            completed += 1
+            coins += event.reward
+            streak += 1
+            best_streak = max(best_streak, streak)
+            if event.time_remaining is not None and event.time_remaining > FAST_COMPLETION_SECONDS:
+                fast += 1
+        else:
+            streak = 0
+    return RunTotals(
+        minigames_played=played,
+        minigames_completed=completed,
+        coins_earned=coins,
+        fast_completions=fast,
+        best_streak=best_streak,
+    )
+
+
+def evaluate_badge_rules(stats: Mapping[str, int], rules: Iterable[BadgeRule] = BADGE_RULES) -> set[str]:
+    """Codes of every rule the counters satisfy (earned before or not)."""
+    return {rule.code for rule in rules if rule.satisfied(stats)}
+
+
+def _greatest(current, incoming):
+    # Portable GREATEST(): SQLite has no such function
+    return case((incoming > current, incoming), else_=current)
+
+
+async def record_run_stats(db: AsyncSession, user_id: int, totals: RunTotals) -> dict[str, int]:
+    """Fold a run into the user's counters with one upsert and return the new counters."""
+    table = UserStats.__table__
+    stmt = dialect_insert(db, UserStats).values(
+        user_id=user_id,
+        runs=1,
+        minigames_played=totals.minigames_played,
+        minigames_completed=totals.minigames_completed,
+        coins_earned=totals.coins_earned,
+        fast_completions=totals.fast_completions,
+        best_streak=totals.best_streak,
+        best_run_completed=totals.minigames_completed,
+        best_run_coins=totals.coins_earned,
+        updated_at=datetime.utcnow(),
+    )
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "runs": table.c.runs + 1,
+            "minigames_played": table.c.minigames_played + new.minigames_played,
+            "minigames_completed": table.c.minigames_completed + new.minigames_completed,
+            "coins_earned": table.c.coins_earned + new.coins_earned,
+            "fast_completions": table.c.fast_completions + new.fast_completions,
+            "best_streak": _greatest(table.c.best_streak, new.best_streak),
+            "best_run_completed": _greatest(table.c.best_run_completed, new.best_run_completed),
+            "best_run_coins": _greatest(table.c.best_run_coins, new.best_run_coins),
+            "updated_at": new.updated_at,
+        },
+    ).returning(*(c for c in table.c if c.name not in ("user_id", "updated_at")))
+    return dict((await db.exec(stmt)).mappings().one())
+
+
+async def grant_badges(db: AsyncSession, user_id: int, codes: Iterable[str]) -> list[str]:
+    """Insert every not-yet-earned badge in ``codes`` with one statement; return the new codes.
+
+    The caller owns the transaction (no commit).
+    """
+    by_code = (await badge_catalog()).by_code
+    wanted = {by_code[code].id: code for code in set(codes) if code in by_code}
+    if not wanted:
+        return []
+    earned_at = datetime.utcnow()
+    rows = [{"user_id": user_id, "badge_id": badge_id, "earned_at": earned_at} for badge_id in sorted(wanted)]
+    stmt = (
+        dialect_insert(db, UserBadge)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "badge_id"])
+        .returning(UserBadge.badge_id)
+    )
+    inserted = (await db.exec(stmt)).scalars().all()
+    if inserted:
+        await touch_users(db, [user_id])
+    return sorted(wanted[badge_id] for badge_id in inserted)
@@ -0,0 +1,136 @@
+"""Everything the app needs on load for the signed-in user, in one round trip.
+
+The profile comes from the already-resolved user row. The coin balance
+(which the identity cache never holds), owned items, earned badges and
+pending friend requests are read with a single ``UNION ALL`` whose branches
+share one column layout:
+
+    section | label | user_a | user_b | at | responded_at | id
+
+The balance travels in ``user_a`` of a one-row ``coins`` branch. Only the
+branches for requested sections are included, and each friend request
+direction is limited to one page (plus one row to detect more).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, cast, literal, null, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import FriendRequest, OwnedItem, User, UserBadge
+
+SECTIONS = ("profile", "coins", "owned_items", "badges", "friend_requests")
+
+
+@dataclass(frozen=True)
+class BootstrapRow:
+    label: str | None
+    user_a: int | None
+    user_b: int | None
+    at: datetime | None
+    responded_at: datetime | None
+    id: int
+
+
+@dataclass
+class BootstrapRows:
+    coins: int | None = None
+    owned_items: list[BootstrapRow] = field(default_factory=list)
+    badges: list[BootstrapRow] = field(default_factory=list)
+    inbound: list[BootstrapRow] = field(default_factory=list)
+    outbound: list[BootstrapRow] = field(default_factory=list)
+
+
+def _null(kind):
+    return cast(null(), kind)
+
+
+def _branch(section: str, label, user_a, user_b, at, responded_at, row_id):
+    return select(
+        literal(section, String).label("section"),
+        label.label("label"),
+        user_a.label("user_a"),
+        user_b.label("user_b"),
+        at.label("at"),
+        responded_at.label("responded_at"),
+        row_id.label("id"),
+    )
+
+
+def _pending(section: str, column, user_id: int, limit: int):
+    page = (
+        select(FriendRequest)
+        .where(column == user_id, FriendRequest.status == "pending")
+        .order_by(FriendRequest.created_at, FriendRequest.id)
+        .limit(limit + 1)
+        .subquery()
+    )
+    return _branch(
+        section,
+        page.c.status,
+        page.c.requester_id,
+        page.c.receiver_id,
+        page.c.created_at,
+        page.c.responded_at,
+        page.c.id,
+    )
+
+
+async def load_bootstrap_rows(
+    db: AsyncSession, user_id: int, sections: set[str], request_limit: int
+) -> BootstrapRows:
+    """Fetch the row-backed sections in one query; each list is in (at, id) order."""
+    branches = []
+    if "coins" in sections:
+        branches.append(
+            _branch(
+                "coins",
+                _null(String),
+                User.coins,
+                _null(Integer),
+                _null(DateTime),
+                _null(DateTime),
+                User.id,
+            ).where(User.id == user_id)
+        )
+    if "owned_items" in sections:
+        branches.append(
+            _branch(
+                "owned_items",
+                OwnedItem.item_id,
+                _null(Integer),
+                _null(Integer),
+                OwnedItem.created_at,
+                _null(DateTime),
+                OwnedItem.id,
+            ).where(OwnedItem.user_id == user_id)
+        )
+    if "badges" in sections:
+        branches.append(
+            _branch(
+                "badges",
+                _null(String),
+                UserBadge.badge_id,
+                _null(Integer),
+                UserBadge.earned_at,
+                _null(DateTime),
+                UserBadge.id,
+            ).where(UserBadge.user_id == user_id)
+        )
+    if "friend_requests" in sections:
+        branches.append(_pending("inbound", FriendRequest.receiver_id, user_id, request_limit))
+        branches.append(_pending("outbound", FriendRequest.requester_id, user_id, request_limit))
+
+    rows = BootstrapRows()
+    if not branches:
+        return rows
+    stmt = branches[0] if len(branches) == 1 else union_all(*branches)
+    for section, *values in (await db.exec(stmt)).all():
+        if section == "coins":
+            rows.coins = values[1]
+        else:
+            getattr(rows, section).append(BootstrapRow(*values))
+    for bucket in (rows.owned_items, rows.badges, rows.inbound, rows.outbound):
+        bucket.sort(key=lambda row: (row.at, row.id))
+    return rows
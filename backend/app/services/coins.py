@@ -0,0 +1,113 @@
+"""Coin ledger: atomic balance updates backed by an append-only transaction log."""
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import func, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import CoinTransaction, User
+from app.utils.sql import dialect_insert
+
+
+@dataclass(frozen=True)
+class CoinEntry:
+    amount: int
+    reason: str = "adjustment"
+    idempotency_key: str | None = None
+
+
+@dataclass(frozen=True)
+class BalanceMismatch:
+    user_id: int
+    balance: int
+    ledger_total: int
+
+
+@dataclass(frozen=True)
+class CoinUpdate:
+    coins: int
+    # What the new entries actually added; duplicates skipped by idempotency key count for nothing
+    applied: int
+
+
+async def get_balance(db: AsyncSession, user_id: int) -> int:
+    """The balance as stored right now, via a single-column SELECT."""
+    return (await db.exec(select(User.coins).where(User.id == user_id))).one()
+
+
+async def record_coin_entries(db: AsyncSession, user_id: int, entries: Iterable[CoinEntry]) -> CoinUpdate:
+    """Append ``entries`` to the ledger and add their sum to the user's balance.
+
+    All entries go out in one multi-row INSERT; entries whose idempotency key
+    was already recorded are skipped by ``ON CONFLICT DO NOTHING`` and do not
+    count towards the balance change. The balance itself moves with a single
+    ``UPDATE ... SET coins = coins + :delta RETURNING coins``, so concurrent
+    callers never lose updates. The caller owns the transaction (no commit).
+    """
+    rows = [
+        {"user_id": user_id, "amount": e.amount, "reason": e.reason, "idempotency_key": e.idempotency_key}
+        for e in entries
+    ]
+    delta = 0
+    if rows:
+        stmt = (
+            dialect_insert(db, CoinTransaction)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["user_id", "idempotency_key"])
+            .returning(CoinTransaction.amount)
+        )
+        delta = sum((await db.exec(stmt)).scalars().all())
+
+    if delta == 0:
+        return CoinUpdate(coins=await get_balance(db, user_id), applied=0)
+    stmt = update(User).where(User.id == user_id).values(coins=User.coins + delta).returning(User.coins)
+    return CoinUpdate(coins=(await db.exec(stmt)).scalar_one(), applied=delta)
+
+
+async def apply_coin_entries(db: AsyncSession, user_id: int, entries: Iterable[CoinEntry]) -> int:
+    """``record_coin_entries`` for callers that only need the new balance."""
+    return (await record_coin_entries(db, user_id, entries)).coins
+
+
+async def debit_coins(db: AsyncSession, user_id: int, amount: int, reason: str = "purchase") -> int | None:
+    """Take ``amount`` coins only if the balance covers it; return the new balance, or ``None`` if short.
+
+    The check and the debit are one ``UPDATE ... WHERE coins >= :amount``, so
+    concurrent purchases can never overdraw. The caller owns the transaction.
+    """
+    if amount <= 0:
+        return await get_balance(db, user_id)
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.coins >= amount)
+        .values(coins=User.coins - amount)
+        .returning(User.coins)
+    )
+    coins = (await db.exec(stmt)).scalar_one_or_none()
+    if coins is not None:
+        await db.exec(dialect_insert(db, CoinTransaction).values(user_id=user_id, amount=-amount, reason=reason))
+    return coins
+
+
+async def set_balance(db: AsyncSession, user_id: int, coins: int, reason: str = "set") -> int:
+    """Set an absolute balance, recording the difference in the ledger."""
+    current = (await db.exec(select(User.coins).where(User.id == user_id).with_for_update())).one()
+    return await apply_coin_entries(db, user_id, [CoinEntry(amount=coins - current, reason=reason)])
+
+
+async def reconcile_balances(db: AsyncSession) -> list[BalanceMismatch]:
+    """Return every user whose balance differs from the sum of their ledger entries."""
+    ledger = (
+        select(CoinTransaction.user_id, func.sum(CoinTransaction.amount).label("total"))
+        .group_by(CoinTransaction.user_id)
+        .subquery()
+    )
+    total = func.coalesce(ledger.c.total, 0)
+    stmt = (
+        select(User.id, User.coins, total)
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+        .where(User.coins != total)
+    )
+    rows = (await db.exec(stmt)).all()
+    return [BalanceMismatch(user_id=user_id, balance=coins, ledger_total=int(sum_)) for user_id, coins, sum_ in rows]
@@ -0,0 +1,140 @@
+"""Friend graph queries over the symmetric ``friendships`` adjacency table.
+
+Every accepted friendship is stored as two rows, ``(a, b)`` and ``(b, a)``,
+so "friends of X" is a primary-key range scan on ``user_id = X`` and all
+graph queries are plain joins without ``OR`` conditions.
+"""
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import delete, func, or_
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import FriendRequest, Friendship, User
+from app.services.revisions import touch_friend_lists
+from app.utils.sql import dialect_insert
+
+
+async def add_friendship(db: AsyncSession, user_id: int, friend_id: int) -> None:
+    """Insert both directions of a friendship (idempotent). The caller commits."""
+    now = datetime.utcnow()
+    stmt = (
+        dialect_insert(db, Friendship)
+        .values(
+            [
+                {"user_id": user_id, "friend_id": friend_id, "created_at": now},
+                {"user_id": friend_id, "friend_id": user_id, "created_at": now},
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "friend_id"])
+    )
+    await db.exec(stmt)
+    await touch_friend_lists(db, [user_id, friend_id])
+
+
+async def remove_friendship(db: AsyncSession, user_id: int, friend_id: int) -> int:
+    """Delete both directions of a friendship; return the number of edges removed. The caller commits."""
+    stmt = delete(Friendship).where(
+        or_(
+            (Friendship.user_id == user_id) & (Friendship.friend_id == friend_id),
+            (Friendship.user_id == friend_id) & (Friendship.friend_id == user_id),
+        )
+    )
+    result = await db.exec(stmt)
+    if result.rowcount:
+        await touch_friend_lists(db, [user_id, friend_id])
+    return result.rowcount
+
+
+async def list_friends(
+    db: AsyncSession,
+    user_id: int,
+    after_id: int | None = None,
+    limit: int | None = None,
+    columns: Sequence | None = None,
+) -> list:
+    """Friends ordered by id; ``after_id``/``limit`` page along the primary key.
+
+    Returns ``User`` objects, or rows of just ``columns`` when given.
+    """
+    stmt = (
+        (select(*columns) if columns else select(User))
+        .join(Friendship, Friendship.friend_id == User.id)
+        .where(Friendship.user_id == user_id)
+        .order_by(Friendship.friend_id)
+    )
+    if after_id is not None:
+        stmt = stmt.where(Friendship.friend_id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list((await db.exec(stmt)).all())
+
+
+async def mutual_friends(
+    db: AsyncSession,
+    user_id: int,
+    other_id: int,
+    after_id: int | None = None,
+    limit: int | None = None,
+    columns: Sequence | None = None,
+) -> list:
+    """Users who are friends with both ``user_id`` and ``other_id``, paged by id like ``list_friends``."""
+    mine = aliased(Friendship)
+    theirs = aliased(Friendship)
+    stmt = (
+        (select(*columns) if columns else select(User))
+        .join(mine, (mine.friend_id == User.id) & (mine.user_id == user_id))
+        .join(theirs, (theirs.friend_id == User.id) & (theirs.user_id == other_id))
+        .order_by(mine.friend_id)
+    )
+    if after_id is not None:
+        stmt = stmt.where(mine.friend_id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list((await db.exec(stmt)).all())
+
+
+async def suggest_friends(db: AsyncSession, user_id: int, limit: int = 10) -> list[tuple[User, int]]:
+    """Friends of friends ranked by how many friends they share with ``user_id``.
+
+    Existing friends, the user themself and anyone with a pending request
+    either way are left out.
+    """
+    mine = aliased(Friendship)
+    second = aliased(Friendship)
+    already = aliased(Friendship)
+    candidate = second.friend_id
+    pending = (
+        select(FriendRequest.receiver_id.label("other_id"))
+        .where(FriendRequest.requester_id == user_id, FriendRequest.status == "pending")
+        .union(
+            select(FriendRequest.requester_id)
+            .where(FriendRequest.receiver_id == user_id, FriendRequest.status == "pending")
+        )
+        .subquery()
+    )
+    shared = func.count().label("shared")
+    ranked = (
+        select(candidate.label("candidate_id"), shared)
+        .select_from(mine)
+        .join(second, second.user_id == mine.friend_id)
+        .outerjoin(already, (already.user_id == user_id) & (already.friend_id == candidate))
+        .where(
+            mine.user_id == user_id,
+            candidate != user_id,
+            already.user_id.is_(None),
+            candidate.not_in(select(pending.c.other_id)),
+        )
+        .group_by(candidate)
+        .order_by(shared.desc(), candidate)
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(User, ranked.c.shared)
+        .join(ranked, ranked.c.candidate_id == User.id)
+        .order_by(ranked.c.shared.desc(), User.id)
+    )
+    return [(user, int(count)) for user, count in (await db.exec(stmt)).all()]
@@ -0,0 +1,152 @@
+"""Resolve Auth0 identities to user rows, backed by an in-process cache."""
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+from decouple import config
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import User
+from app.services.public_cache import invalidate_profile
+from app.services.search import user_search_index
+from app.utils.cache import TTLCache
+from app.utils.sql import dialect_insert
+
+IDENTITY_CACHE_TTL = config("IDENTITY_CACHE_TTL", default=60, cast=float)
+IDENTITY_CACHE_SIZE = config("IDENTITY_CACHE_SIZE", default=10000, cast=int)
+
+
+@dataclass(frozen=True)
+class CachedIdentity:
+    """Column snapshot of a user row plus the hash of the claims last synced into it.
+
+    The balance is left out: other workers change it, so handlers read it with
+    ``get_balance`` instead of trusting a copy up to ``IDENTITY_CACHE_TTL`` old.
+    """
+
+    row: dict[str, Any]
+    claims_hash: bytes
+
+
+identity_cache: TTLCache[str, CachedIdentity] = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
+# Columns other workers change behind this one's back; always read from the row
+_UNCACHED_COLUMNS = ("coins", "friends_revision")
+_SNAPSHOT_COLUMNS = tuple(column.name for column in User.__table__.columns if column.name not in _UNCACHED_COLUMNS)
+
+
+def extract_display_name(payload: dict) -> str | None:
+    """Pick a usable display name from the Auth0 token payload."""
+    for key in ("name", "nickname", "preferred_username", "given_name", "email"):
+        value = payload.get(key)
+        if value:
+            trimmed = str(value).strip()
+            if trimmed:
+                return trimmed[:50]
+    return None
+
+
+def claims_hash(picture: str | None, display_name: str | None) -> bytes:
+    """Fingerprint the profile claims we copy onto the user row."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((picture or "").encode())
+    digest.update(b"\0")
+    digest.update((display_name or "").encode())
+    return digest.digest()
+
+
+def remember_user(user: User, claims: bytes | None = None) -> None:
+    """Write-through: refresh the cached snapshot after the row was changed."""
+    user_search_index.update(user.id, user.display_name, user.bio)
+    if claims is None:
+        existing = identity_cache.get(user.auth0_sub)
+        if existing is None:
+            return
+        claims = existing.claims_hash
+    snapshot = {name: getattr(user, name) for name in _SNAPSHOT_COLUMNS}
+    identity_cache.set(user.auth0_sub, CachedIdentity(row=snapshot, claims_hash=claims))
+
+
+def remember_coins(user: User, coins: int) -> None:
+    """Reflect a balance written directly in SQL onto the loaded user (the cache never holds it)."""
+    set_committed_value(user, "coins", coins)
+
+
+def forget_user(auth0_sub: str) -> None:
+    """Drop a cached identity so the next request reloads it."""
+    identity_cache.pop(auth0_sub)
+
+
+async def _attach(db: AsyncSession, row: dict[str, Any]) -> User:
+    """Attach a cached snapshot to ``db`` as a persistent instance without a SELECT.
+
+    Uncached columns are left expired rather than defaulting to 0; read
+    the balance with ``get_balance``.
+    """
+    user = User(**row)
+    make_transient_to_detached(user)
+    user = await db.merge(user, load=False)
+    db.expire(user, list(_UNCACHED_COLUMNS))
+    return user
+
+
+def _sync_claims(user: User, auth0_sub: str, picture: str | None, display_name: str | None) -> bool:
+    """Copy picture/name claims onto the row; return whether anything changed."""
+    updated = False
+    if picture and user.picture_url != picture:
+        user.picture_url = picture
+        updated = True
+    if display_name:
+        parts = auth0_sub.split("|")
+        fallback_identifier = parts[-1] if parts else auth0_sub
+        stored_name = (user.display_name or "").strip()
+        if not stored_name or stored_name in (fallback_identifier, auth0_sub):
+            if user.display_name != display_name:
+                user.display_name = display_name
+                updated = True
+    return updated
+
+
+async def _load_or_create(db: AsyncSession, auth0_sub: str, picture: str | None, display_name: str | None) -> User:
+    user = (await db.exec(select(User).where(User.auth0_sub == auth0_sub))).first()
+    if user is not None:
+        return user
+    # First login: concurrent requests race on the unique index, so let the
+    # database pick a winner and re-read whichever row landed.
+    stmt = (
+        dialect_insert(db, User)
+        .values(auth0_sub=auth0_sub, coins=0, picture_url=picture, display_name=display_name)
+        .on_conflict_do_nothing(index_elements=["auth0_sub"])
+    )
+    await db.exec(stmt)
+    await db.commit()
+    return (await db.exec(select(User).where(User.auth0_sub == auth0_sub))).one()
+
+
+async def resolve_user(db: AsyncSession, payload: dict) -> User:
+    """Return the user for a verified token payload, creating it on first login.
+
+    Cached snapshots are attached to ``db`` without touching the database as
+    long as the picture/name claims hash matches what was last synced; the row
+    is only reloaded after the TTL lapses and only updated when claims change.
+    """
+    auth0_sub = payload["sub"]
+    picture = payload.get("picture")
+    display_name = extract_display_name(payload)
+    claims = claims_hash(picture, display_name)
+
+    cached = identity_cache.get(auth0_sub)
+    if cached is not None and cached.claims_hash == claims:
+        return await _attach(db, cached.row)
+
+    user = await _load_or_create(db, auth0_sub, picture, display_name)
+    if _sync_claims(user, auth0_sub, picture, display_name):
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        await invalidate_profile(user.id)
+    remember_user(user, claims)
+    return user
@@ -0,0 +1,393 @@
+"""Coins-earned and longest-run leaderboards kept in sorted indexes.
+
+Each board (a metric over all time, or over one ISO week starting Monday
+00:00 UTC) lives in a sorted index: an in-process ``SkipList`` by default, or
+a Redis sorted set when ``LEADERBOARD_URL`` points at one, which every worker
+then shares. Writers call ``record_coins`` / ``record_run`` after they commit
+and the index is updated in place, so top-N and a player's rank are O(log n)
+reads instead of ``ORDER BY`` scans. The friends board ranks the player and
+the friends returned by ``list_friends`` by their all-time scores.
+
+A board is built from the database on first read and rebuilt once it is
+older than ``LEADERBOARD_TTL``; with the in-process index that is how writes
+made by other workers show up. Updates that arrive while a rebuild reads the
+database are applied on top of the rebuilt board, because the read may have
+missed their rows (one whose rows it did see counts twice until the next
+rebuild, rather than being lost). Update failures are logged, never raised,
+so they cannot fail the write that triggered them.
+
+Coins earned counts positive ``run_reward`` and ``increment`` ledger entries.
+Longest run is the most minigames completed in one run. Ties are ordered by
+user id in process; Redis orders them by member instead.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Literal, Protocol
+
+from decouple import config
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import CoinTransaction, Run, User, UserStats
+from app.services.friends import list_friends
+from app.utils.skiplist import SkipList
+
+logger = logging.getLogger(__name__)
+
+Metric = Literal["coins", "longest_run"]
+Scope = Literal["global", "weekly", "friends"]
+
+# "" keeps boards in process; "redis://host:6379/0" shares them (needs `pip install redis`, server >= 6.2)
+LEADERBOARD_URL = config("LEADERBOARD_URL", default="")
+# Seconds before a board is rebuilt from the database
+LEADERBOARD_TTL = config("LEADERBOARD_TTL", default=300, cast=float)
+
+EARNING_REASONS = ("run_reward", "increment")
+# Weekly boards outlive their week by a day in Redis, for late readers
+WEEKLY_RETENTION = timedelta(days=8)
+# How long a Redis rebuild may hold a board before another worker can take over
+REBUILD_TIMEOUT = timedelta(seconds=60)
+
+ScoreReader = Callable[[], Awaitable[Mapping[int, int]]]
+
+
+class LeaderboardBackend(Protocol):
+    """Sorted-set operations the leaderboards rely on (members are user ids)."""
+
+    async def loaded(self, board: str) -> bool: ...
+
+    async def load(self, board: str, read_scores: ScoreReader, retention: float | None) -> None: ...
+
+    async def incr(self, board: str, member: int, delta: int) -> None: ...
+
+    async def set_max(self, board: str, member: int, score: int) -> None: ...
+
+    async def top(self, board: str, offset: int, limit: int) -> list[tuple[int, int]]: ...
+
+    async def rank(self, board: str, member: int) -> tuple[int, int] | None: ...
+
+    async def scores(self, board: str, members: list[int]) -> dict[int, int]: ...
+
+    async def size(self, board: str) -> int: ...
+
+
+class _Board:
+    __slots__ = ("index", "scores", "loaded_at")
+
+    def __init__(self, scores: Mapping[int, int], loaded_at: float) -> None:
+        self.scores = {member: score for member, score in scores.items() if score > 0}
+        # Ascending (-score, user id) puts the highest score, then the lowest id, first
+        self.index = SkipList(sorted((-score, member) for member, score in self.scores.items()))
+        self.loaded_at = loaded_at
+
+    def set(self, member: int, score: int) -> None:
+        previous = self.scores.get(member)
+        if previous == score:
+            return
+        if previous is not None:
+            self.index.remove((-previous, member))
+        self.scores[member] = score
+        self.index.insert((-score, member))
+
+    def incr(self, member: int, delta: int) -> None:
+        self.set(member, self.scores.get(member, 0) + delta)
+
+    def set_max(self, member: int, score: int) -> None:
+        if score > self.scores.get(member, 0):
+            self.set(member, score)
+
+
+class MemoryLeaderboards:
+    """Boards as in-process skip lists (one copy per worker)."""
+
+    def __init__(self, ttl: float = LEADERBOARD_TTL, clock=time.monotonic) -> None:
+        self._ttl = ttl
+        self._clock = clock
+        self._boards: dict[str, _Board] = {}
+        # Updates made while a board's rebuild reads the database, replayed once it is built
+        self._pending: dict[str, list[tuple[str, int, int]]] = {}
+
+    def _fresh(self, board: _Board) -> bool:
+        return self._clock() - board.loaded_at < self._ttl
+
+    async def loaded(self, board: str) -> bool:
+        current = self._boards.get(board)
+        return current is not None and self._fresh(current)
+
+    async def load(self, board: str, read_scores: ScoreReader, retention: float | None) -> None:
+        pending = self._pending[board] = []
+        try:
+            scores = await read_scores()
+        finally:
+            del self._pending[board]
+        rebuilt = _Board(scores, self._clock())
+        for operation, member, value in pending:
+            getattr(rebuilt, operation)(member, value)
+        # Stale boards (including past weeks) are rebuilt on their next read anyway
+        self._boards = {name: b for name, b in self._boards.items() if self._fresh(b)}
+        self._boards[board] = rebuilt
+
+    def _apply(self, board: str, operation: str, member: int, value: int) -> None:
+        current = self._boards.get(board)
+        if current is not None:
+            getattr(current, operation)(member, value)
+        pending = self._pending.get(board)
+        if pending is not None:
+            pending.append((operation, member, value))
+
+    async def incr(self, board: str, member: int, delta: int) -> None:
+        self._apply(board, "incr", member, delta)
+
+    async def set_max(self, board: str, member: int, score: int) -> None:
+        self._apply(board, "set_max", member, score)
+
+    async def top(self, board: str, offset: int, limit: int) -> list[tuple[int, int]]:
+        current = self._boards.get(board)
+        if current is None:
+            return []
+        return [(member, -neg_score) for neg_score, member in current.index.slice(offset, offset + limit)]
+
+    async def rank(self, board: str, member: int) -> tuple[int, int] | None:
+        current = self._boards.get(board)
+        score = current.scores.get(member) if current is not None else None
+        if score is None:
+            return None
+        return current.index.rank((-score, member)), score
+
+    async def scores(self, board: str, members: list[int]) -> dict[int, int]:
+        current = self._boards.get(board)
+        if current is None:
+            return {}
+        return {member: current.scores[member] for member in members if member in current.scores}
+
+    async def size(self, board: str) -> int:
+        current = self._boards.get(board)
+        return len(current.index) if current is not None else 0
+
+
+# KEYS: board, rebuild marker, delta set. While a rebuild runs, updates also go to the delta set.
+_REDIS_INCR = """
+redis.call('ZINCRBY', KEYS[1], ARGV[1], ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 1 then redis.call('ZINCRBY', KEYS[3], ARGV[1], ARGV[2]) end
+"""
+_REDIS_SET_MAX = """
+redis.call('ZADD', KEYS[1], 'GT', ARGV[1], ARGV[2])
+if redis.call('EXISTS', KEYS[2]) == 1 then redis.call('ZADD', KEYS[3], 'GT', ARGV[1], ARGV[2]) end
+"""
+# KEYS: rebuild marker, incr deltas, max deltas. Claims the rebuild and starts empty delta sets.
+_REDIS_BEGIN_REBUILD = """
+if not redis.call('SET', KEYS[1], 1, 'NX', 'PX', ARGV[1]) then return 0 end
+redis.call('DEL', KEYS[2], KEYS[3])
+return 1
+"""
+
+
+class RedisLeaderboards:
+    """Boards as Redis sorted sets shared by every worker (needs the optional ``redis`` package).
+
+    A rebuild stages the database scores in a side key, then in one
+    transaction merges in the updates recorded since it started and swaps
+    the result in. Only one worker rebuilds a board at a time; the others
+    keep serving the live set.
+    """
+
+    def __init__(self, url: str, ttl: float = LEADERBOARD_TTL, namespace: str = "skrawli:lb:") -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(f"{url.split('://', 1)[0]}:// leaderboard URLs need the 'redis' package") from None
+        self._client = redis.from_url(url)
+        self._ttl = ttl
+        self._namespace = namespace
+        self._incr = self._client.register_script(_REDIS_INCR)
+        self._set_max = self._client.register_script(_REDIS_SET_MAX)
+        self._begin_rebuild = self._client.register_script(_REDIS_BEGIN_REBUILD)
+
+    def _key(self, board: str) -> str:
+        return self._namespace + board
+
+    async def loaded(self, board: str) -> bool:
+        return bool(await self._client.exists(self._key(board) + ":loaded"))
+
+    def _update_keys(self, board: str, operation: str) -> list[str]:
+        key = self._key(board)
+        return [key, key + ":rebuilding", f"{key}:{operation}"]
+
+    async def load(self, board: str, read_scores: ScoreReader, retention: float | None) -> None:
+        key = self._key(board)
+        marker, incr_deltas, max_deltas = key + ":rebuilding", key + ":incr", key + ":set_max"
+        timeout = int(REBUILD_TIMEOUT.total_seconds() * 1000)
+        if not await self._begin_rebuild(keys=[marker, incr_deltas, max_deltas], args=[timeout]):
+            return
+        try:
+            scores = await read_scores()
+            staged = key + ":staged"
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.delete(staged)
+                mapping = {str(member): score for member, score in scores.items() if score > 0}
+                if mapping:
+                    pipe.zadd(staged, mapping)
+                pipe.zunionstore(key, [staged, incr_deltas], aggregate="SUM")
+                pipe.zunionstore(key, [key, max_deltas], aggregate="MAX")
+                pipe.delete(staged, incr_deltas, max_deltas, marker)
+                if retention is not None:
+                    pipe.expire(key, int(retention))
+                pipe.set(key + ":loaded", 1, px=max(1, int(self._ttl * 1000)))
+                await pipe.execute()
+        except Exception:
+            await self._client.delete(marker, incr_deltas, max_deltas)
+            raise
+
+    async def incr(self, board: str, member: int, delta: int) -> None:
+        await self._incr(keys=self._update_keys(board, "incr"), args=[delta, str(member)])
+
+    async def set_max(self, board: str, member: int, score: int) -> None:
+        await self._set_max(keys=self._update_keys(board, "set_max"), args=[score, str(member)])
+
+    async def top(self, board: str, offset: int, limit: int) -> list[tuple[int, int]]:
+        rows = await self._client.zrevrange(self._key(board), offset, offset + limit - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in rows]
+
+    async def rank(self, board: str, member: int) -> tuple[int, int] | None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(self._key(board), str(member))
+            pipe.zscore(self._key(board), str(member))
+            rank, score = await pipe.execute()
+        return None if rank is None else (int(rank), int(score))
+
+    async def scores(self, board: str, members: list[int]) -> dict[int, int]:
+        if not members:
+            return {}
+        values = await self._client.zmscore(self._key(board), [str(member) for member in members])
+        return {member: int(score) for member, score in zip(members, values) if score is not None}
+
+    async def size(self, board: str) -> int:
+        return await self._client.zcard(self._key(board))
+
+
+def backend_from_url(url: str) -> LeaderboardBackend:
+    """``""``/``memory://`` keep boards in process; ``redis://``/``rediss://``/``unix://`` use sorted sets."""
+    scheme = url.split("://", 1)[0] if url else "memory"
+    if scheme == "memory":
+        return MemoryLeaderboards()
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisLeaderboards(url)
+    raise ValueError(f"Unsupported leaderboard URL scheme {scheme!r}")
+
+
+leaderboard_backend = backend_from_url(LEADERBOARD_URL)
+_build_locks: dict[str, asyncio.Lock] = {}
+
+
+@dataclass(frozen=True)
+class Standing:
+    rank: int  # 1-based
+    user_id: int
+    score: int
+
+
+@dataclass(frozen=True)
+class LeaderboardPage:
+    entries: list[Standing]
+    me: Standing | None
+    total: int
+
+
+def week_start(at: datetime) -> datetime:
+    """Monday 00:00 of ``at``'s ISO week (naive UTC, like the rest of the schema)."""
+    day = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def board_name(metric: Metric, since: datetime | None) -> str:
+    return f"{metric}:all" if since is None else f"{metric}:week:{since:%Y-%m-%d}"
+
+
+async def _scores_from_db(db: AsyncSession, metric: Metric, since: datetime | None) -> dict[int, int]:
+    if metric == "coins":
+        stmt = (
+            select(CoinTransaction.user_id, func.sum(CoinTransaction.amount))
+            .where(CoinTransaction.amount > 0, CoinTransaction.reason.in_(EARNING_REASONS))
+            .group_by(CoinTransaction.user_id)
+        )
+        if since is not None:
+            stmt = stmt.where(CoinTransaction.created_at >= since)
+    elif since is None:
+        # Already folded per user by record_run_stats
+        stmt = select(UserStats.user_id, UserStats.best_run_completed).where(UserStats.best_run_completed > 0)
+    else:
+        stmt = (
+            select(Run.user_id, func.max(Run.minigames_completed))
+            .where(Run.created_at >= since)
+            .group_by(Run.user_id)
+        )
+    return {user_id: int(score) for user_id, score in (await db.exec(stmt)).all() if score}
+
+
+async def _ensure_board(db: AsyncSession, metric: Metric, since: datetime | None) -> str:
+    board = board_name(metric, since)
+    if await leaderboard_backend.loaded(board):
+        return board
+    # One rebuild per board at a time in this process; waiters reuse its result
+    lock = _build_locks.setdefault(board, asyncio.Lock())
+    async with lock:
+        if not await leaderboard_backend.loaded(board):
+            retention = None if since is None else (since + WEEKLY_RETENTION - datetime.utcnow()).total_seconds()
+            await leaderboard_backend.load(board, lambda: _scores_from_db(db, metric, since), retention)
+    return board
+
+
+def _boards(metric: Metric, at: datetime | None) -> tuple[str, str]:
+    return board_name(metric, None), board_name(metric, week_start(at or datetime.utcnow()))
+
+
+async def _update(operation: str, boards: Iterable[str], user_id: int, value: int) -> None:
+    for board in boards:
+        try:
+            await getattr(leaderboard_backend, operation)(board, user_id, value)
+        except Exception:
+            logger.warning("Leaderboard %s on %s failed", operation, board, exc_info=True)
+
+
+async def record_coins(user_id: int, amount: int, at: datetime | None = None) -> None:
+    """Add newly earned coins to the all-time and current-week boards. Call after commit."""
+    if amount > 0:
+        await _update("incr", _boards("coins", at), user_id, amount)
+
+
+async def record_run(user_id: int, minigames_completed: int, at: datetime | None = None) -> None:
+    """Raise the player's longest run on the all-time and current-week boards. Call after commit."""
+    if minigames_completed > 0:
+        await _update("set_max", _boards("longest_run", at), user_id, minigames_completed)
+
+
+async def leaderboard_page(
+    db: AsyncSession,
+    metric: Metric,
+    scope: Scope,
+    user_id: int,
+    offset: int = 0,
+    limit: int = 10,
+) -> LeaderboardPage:
+    """One page of a board plus the player's own standing (``None`` without a score)."""
+    since = week_start(datetime.utcnow()) if scope == "weekly" else None
+    board = await _ensure_board(db, metric, since)
+    if scope == "friends":
+        # A single selected column comes back as plain ids
+        friend_ids = await list_friends(db, user_id, columns=(User.id,))
+        scores = await leaderboard_backend.scores(board, [user_id, *friend_ids])
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        standings = [Standing(rank=i + 1, user_id=member, score=score) for i, (member, score) in enumerate(ranked)]
+        me = next((s for s in standings if s.user_id == user_id), None)
+        return LeaderboardPage(entries=standings[offset:offset + limit], me=me, total=len(standings))
+
+    top = await leaderboard_backend.top(board, offset, limit)
+    entries = [Standing(rank=offset + i + 1, user_id=member, score=score) for i, (member, score) in enumerate(top)]
+    own = await leaderboard_backend.rank(board, user_id)
+    me = Standing(rank=own[0] + 1, user_id=user_id, score=own[1]) if own is not None else None
+    return LeaderboardPage(entries=entries, me=me, total=await leaderboard_backend.size(board))
@@ -0,0 +1,64 @@
+"""Shared cache for the unauthenticated profile and badge reads.
+
+Entries are complete responses (body, ETag and next-page cursor), so a hit
+skips the database session and serialization entirely, and a matching
+``If-None-Match`` turns into a 304 straight from the cache. Profile writes
+store the new entry (write-through); badge grants and claim syncs drop it.
+"""
+import json
+from dataclasses import dataclass
+
+from decouple import config
+
+from app.services.badges import badge_catalog
+from app.utils.cache import TTLCache
+from app.utils.shared_cache import TieredCache, backend_from_url
+
+# "" keeps the cache in-process only; "memory://" or "redis://host:6379/0" adds the shared tier
+PUBLIC_CACHE_URL = config("PUBLIC_CACHE_URL", default="")
+PUBLIC_CACHE_TTL = config("PUBLIC_CACHE_TTL", default=60, cast=float)
+# Bounds how long another worker's write can go unseen by this one
+PUBLIC_CACHE_LOCAL_TTL = config("PUBLIC_CACHE_LOCAL_TTL", default=5, cast=float)
+PUBLIC_CACHE_LOCAL_SIZE = config("PUBLIC_CACHE_LOCAL_SIZE", default=10000, cast=int)
+
+public_cache = TieredCache(
+    TTLCache(maxsize=PUBLIC_CACHE_LOCAL_SIZE, ttl=PUBLIC_CACHE_LOCAL_TTL),
+    backend_from_url(PUBLIC_CACHE_URL),
+    ttl=PUBLIC_CACHE_TTL,
+    namespace="skrawli:public:",
+)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    next_cursor: str | None = None
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({"etag": self.etag, "next": self.next_cursor}, separators=(",", ":"))
+        return header.encode() + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CachedResponse":
+        header, _, body = raw.partition(b"\n")
+        meta = json.loads(header)
+        return cls(body=body, etag=meta["etag"], next_cursor=meta["next"])
+
+
+def profile_key(user_id: int) -> str:
+    return f"profile:{user_id}"
+
+
+async def badges_key(user_id: int) -> str:
+    """First badge page; keyed on the catalog too so a badge edit never serves old names."""
+    catalog_tag = (await badge_catalog()).etag.strip('"')
+    return f"badges:{user_id}:{catalog_tag}"
+
+
+async def invalidate_profile(user_id: int) -> None:
+    await public_cache.invalidate(profile_key(user_id))
+
+
+async def invalidate_badges(user_id: int) -> None:
+    await public_cache.invalidate(await badges_key(user_id))
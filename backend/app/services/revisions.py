@@ -0,0 +1,44 @@
+"""Per-user revision counters behind the weak ETags on read endpoints.
+
+``users.revision`` changes whenever something served by the profile or badge
+endpoints changes. ORM writes to the user row bump it through a
+``before_update`` hook on ``User``; services that write related tables
+(badges) call ``touch_users`` in the same transaction. Coin and owned-item
+writes leave it alone since no revalidated endpoint serves them.
+
+``users.friends_revision`` does the same for the friend list, so validating
+it is a primary-key read: friendship writes call ``touch_friend_lists``, and
+an ``after_update`` hook on ``User`` bumps every friend's counter when one of
+the summary columns the list shows is edited.
+"""
+from collections.abc import Iterable
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import User
+
+
+async def touch_users(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Bump the revision of every user in ``user_ids``. The caller commits."""
+    ids = sorted(set(user_ids))
+    if ids:
+        await db.exec(update(User).where(User.id.in_(ids)).values(revision=User.revision + 1))
+
+
+async def user_revision(db: AsyncSession, user_id: int) -> int | None:
+    """Current revision, or ``None`` when the user does not exist."""
+    return (await db.exec(select(User.revision).where(User.id == user_id))).first()
+
+
+async def touch_friend_lists(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Bump the friend list revision of every user in ``user_ids``. The caller commits."""
+    ids = sorted(set(user_ids))
+    if ids:
+        await db.exec(update(User).where(User.id.in_(ids)).values(friends_revision=User.friends_revision + 1))
+
+
+async def friends_revision(db: AsyncSession, user_id: int) -> int | None:
+    """Current friend list revision, or ``None`` when the user does not exist."""
+    return (await db.exec(select(User.friends_revision).where(User.id == user_id))).first()
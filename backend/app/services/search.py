@@ -0,0 +1,235 @@
+"""User search for ``/users/browse``.
+
+On PostgreSQL, matching runs against ``pg_trgm`` GIN indexes on
+``lower(display_name)`` and ``lower(bio)`` (see the ``add_user_search_indexes``
+migration), which serve ``LIKE '%q%'`` and ``LIKE 'q%'`` without a sequential
+scan. SQLite (development and tests) uses an in-process trigram index with
+the same matching and ranking rules; other dialects are refused.
+
+The in-process index is a single-worker fallback: ``remember_user`` updates
+it only in the worker that handled the write, so other workers match old
+names until ``SEARCH_INDEX_TTL`` reloads them. Multi-worker deployments run
+on PostgreSQL, where search reads the table itself.
+
+Results are ranked by match tier, then by closeness, then newest first:
+
+    4  display name equals the query
+    3  display name starts with the query
+    2  a later word in the display name starts with the query
+    1  display name contains the query
+    0  only the bio contains the query
+
+``prefix`` mode (as-you-type) only returns tiers 2-4.
+"""
+import threading
+import time
+from collections.abc import Sequence
+from typing import Literal
+
+from decouple import config
+from sqlalchemy import case, func, literal, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import User
+
+SearchMode = Literal["contains", "prefix"]
+
+# Seconds before the in-process (SQLite) index reloads rows written by other processes
+SEARCH_INDEX_TTL = config("SEARCH_INDEX_TTL", default=300, cast=float)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def match_tier(name: str, bio: str, query: str, mode: SearchMode) -> int | None:
+    """Rank tier for one lower-cased row, or ``None`` when it does not match."""
+    if name == query:
+        return 4
+    if name.startswith(query):
+        return 3
+    if f" {query}" in name:
+        return 2
+    if mode == "prefix":
+        return None
+    if query in name:
+        return 1
+    if query in bio:
+        return 0
+    return None
+
+
+class UserSearchIndex:
+    """In-process trigram index over lower-cased display names and bios."""
+
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL, clock=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rows: dict[int, tuple[str, str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._loaded_at: float | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None and self._clock() - self._loaded_at < self._ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._postings.clear()
+            self._loaded_at = None
+
+    def load(self, rows) -> None:
+        """Replace the index with ``(id, display_name, bio)`` rows."""
+        rows_by_id: dict[int, tuple[str, str]] = {}
+        postings: dict[str, set[int]] = {}
+        for user_id, display_name, bio in rows:
+            entry = ((display_name or "").lower(), (bio or "").lower())
+            rows_by_id[user_id] = entry
+            for gram in _trigrams(entry[0]) | _trigrams(entry[1]):
+                postings.setdefault(gram, set()).add(user_id)
+        with self._lock:
+            self._rows = rows_by_id
+            self._postings = postings
+            self._loaded_at = self._clock()
+
+    def update(self, user_id: int, display_name: str | None, bio: str | None) -> None:
+        """Apply one row change; a no-op until the index has been loaded."""
+        entry = ((display_name or "").lower(), (bio or "").lower())
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            previous = self._rows.get(user_id)
+            if previous == entry:
+                return
+            if previous is not None:
+                for gram in _trigrams(previous[0]) | _trigrams(previous[1]):
+                    ids = self._postings.get(gram)
+                    if ids is not None:
+                        ids.discard(user_id)
+                        if not ids:
+                            del self._postings[gram]
+            self._rows[user_id] = entry
+            for gram in _trigrams(entry[0]) | _trigrams(entry[1]):
+                self._postings.setdefault(gram, set()).add(user_id)
+
+    def search(
+        self,
+        query: str,
+        mode: SearchMode = "contains",
+        offset: int = 0,
+        limit: int = 25,
+        exclude_id: int | None = None,
+    ) -> list[int]:
+        """Ranked user ids matching ``query``."""
+        query = _normalize(query)
+        with self._lock:
+            grams = _trigrams(query)
+            if grams:
+                # Any row containing the query contains all of its trigrams
+                postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = self._rows.keys()
+            ranked = []
+            for user_id in candidates:
+                if user_id == exclude_id:
+                    continue
+                name, bio = self._rows[user_id]
+                tier = match_tier(name, bio, query, mode)
+                if tier is not None:
+                    ranked.append((-tier, len(name), -user_id))
+        ranked.sort()
+        return [-neg_id for _, _, neg_id in ranked[offset:offset + limit]]
+
+
+user_search_index = UserSearchIndex()
+
+
+async def _search_postgres(
+    db: AsyncSession,
+    query: str,
+    mode: SearchMode,
+    offset: int,
+    limit: int,
+    exclude_id: int | None,
+    columns: Sequence | None,
+) -> list:
+    name = func.lower(func.coalesce(User.display_name, ""))
+    bio = func.lower(func.coalesce(User.bio, ""))
+    escaped = _escape_like(query)
+    starts = name.like(f"{escaped}%", escape="\\")
+    word_starts = name.like(f"% {escaped}%", escape="\\")
+    tier = case(
+        (name == query, 4),
+        (starts, 3),
+        (word_starts, 2),
+        (name.like(f"%{escaped}%", escape="\\"), 1),
+        else_=0,
+    )
+    if mode == "prefix":
+        matches = or_(starts, word_starts)
+    else:
+        matches = or_(name.like(f"%{escaped}%", escape="\\"), bio.like(f"%{escaped}%", escape="\\"))
+    stmt = (select(*columns) if columns else select(User)).where(matches)
+    if exclude_id is not None:
+        stmt = stmt.where(User.id != exclude_id)
+    stmt = (
+        stmt.order_by(tier.desc(), func.similarity(name, literal(query)).desc(), User.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return list((await db.exec(stmt)).all())
+
+
+async def _search_in_process(
+    db: AsyncSession,
+    query: str,
+    mode: SearchMode,
+    offset: int,
+    limit: int,
+    exclude_id: int | None,
+    columns: Sequence | None,
+) -> list:
+    if not user_search_index.loaded:
+        user_search_index.load((await db.exec(select(User.id, User.display_name, User.bio))).all())
+    ids = user_search_index.search(query, mode, offset, limit, exclude_id)
+    if not ids:
+        return []
+    stmt = (select(*columns) if columns else select(User)).where(User.id.in_(ids))
+    users = {u.id: u for u in (await db.exec(stmt)).all()}
+    return [users[user_id] for user_id in ids if user_id in users]
+
+
+async def search_users(
+    db: AsyncSession,
+    query: str,
+    mode: SearchMode = "contains",
+    offset: int = 0,
+    limit: int = 25,
+    exclude_id: int | None = None,
+    columns: Sequence | None = None,
+) -> list:
+    """Relevance-ranked users whose display name (or bio, outside prefix mode) matches ``query``.
+
+    Returns ``User`` objects, or rows of just ``columns`` (which must include ``User.id``) when given.
+    """
+    query = _normalize(query)
+    if not query:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return await _search_postgres(db, query, mode, offset, limit, exclude_id, columns)
+    if dialect == "sqlite":
+        return await _search_in_process(db, query, mode, offset, limit, exclude_id, columns)
+    raise RuntimeError(f"User search needs PostgreSQL (pg_trgm) or SQLite, not {dialect!r}")
@@ -0,0 +1,82 @@
+"""Shop catalog and purchases."""
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import OwnedItem
+from app.services.coins import debit_coins
+from app.utils.sql import dialect_insert
+
+# Prices mirror CATALOG in frontend/src/Shop.tsx
+SHOP_PRICES = MappingProxyType(
+    {
+        "default-brush": 0,
+        "pixel-brush": 100,
+        "rainbow-brush": 200,
+        "splotch": 0,
+        "default-theme": 0,
+        "coffee-theme": 250,
+        "pastel-theme": 250,
+        "rose-theme": 250,
+        "color-picker": 300,
+    }
+)
+
+
+class UnknownItemError(ValueError):
+    def __init__(self, item_ids: list[str]):
+        super().__init__(f"Unknown shop items: {', '.join(item_ids)}")
+        self.item_ids = item_ids
+
+
+class InsufficientCoinsError(Exception):
+    def __init__(self, total: int):
+        super().__init__(f"Purchase costs {total} coins")
+        self.total = total
+
+
+@dataclass(frozen=True)
+class PurchaseResult:
+    purchased: list[str]
+    already_owned: list[str]
+    total: int
+    coins: int
+
+
+async def grant_items(db: AsyncSession, user_id: int, item_ids: list[str]) -> set[str]:
+    """Insert owned items, skipping ones the user has; return the newly added ids. The caller commits."""
+    if not item_ids:
+        return set()
+    now = datetime.utcnow()
+    stmt = (
+        dialect_insert(db, OwnedItem)
+        .values([{"user_id": user_id, "item_id": item_id, "created_at": now} for item_id in sorted(set(item_ids))])
+        .on_conflict_do_nothing(index_elements=["user_id", "item_id"])
+        .returning(OwnedItem.item_id)
+    )
+    return set((await db.exec(stmt)).scalars().all())
+
+
+async def purchase_items(db: AsyncSession, user_id: int, item_ids: list[str]) -> PurchaseResult:
+    """Buy ``item_ids`` in the caller's transaction: only items not yet owned are charged.
+
+    Raises ``InsufficientCoinsError`` when the balance cannot cover them; the
+    caller must roll back in that case (the items were already inserted).
+    """
+    unknown = sorted({item_id for item_id in item_ids if item_id not in SHOP_PRICES})
+    if unknown:
+        raise UnknownItemError(unknown)
+    new_items = await grant_items(db, user_id, item_ids)
+    total = sum(SHOP_PRICES[item_id] for item_id in new_items)
+    coins = await debit_coins(db, user_id, total, reason="purchase")
+    if coins is None:
+        raise InsufficientCoinsError(total)
+    requested = sorted(set(item_ids))
+    return PurchaseResult(
+        purchased=[item_id for item_id in requested if item_id in new_items],
+        already_owned=[item_id for item_id in requested if item_id not in new_items],
+        total=total,
+        coins=coins,
+    )
@@ -0,0 +1,21 @@
+"""Server-side trace scoring shared with the frontend's ``evaluateTrace``."""
+from app.services.trace_eval.evaluate import as_points, evaluate_trace
+from app.services.trace_eval.geometry import PolygonGeometry, polygon_geometry
+from app.services.trace_eval.registry import SHAPE_SPECS, ShapeRejected, ShapeSpec, check_shape
+from app.services.trace_eval.shapes import CircleShape, EllipseShape, PolygonShape, Shape, shape_from_dict
+
+__all__ = [
+    "CircleShape",
+    "EllipseShape",
+    "PolygonGeometry",
+    "PolygonShape",
+    "SHAPE_SPECS",
+    "Shape",
+    "ShapeRejected",
+    "ShapeSpec",
+    "as_points",
+    "check_shape",
+    "evaluate_trace",
+    "polygon_geometry",
+    "shape_from_dict",
+]
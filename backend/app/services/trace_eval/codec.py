@@ -0,0 +1,213 @@
+"""Compact binary stroke format (``application/octet-stream``).
+
+Layout (little endian)::
+
+    0   2   magic  b"SK"
+    2   1   version (1)
+    3   1   flags   FLAG_TIMESTAMPS | FLAG_VARINT | FLAG_META
+    4   4   point count (uint32)
+    8   2   scale: quantization steps per canvas pixel (uint16)
+    10  2   reserved (0)
+    --      [FLAG_META] uint32 length + UTF-8 JSON object (shape, threshold, ...)
+    --      coordinates: (dx, dy) per point, deltas from the previous point
+            (the first from the origin) as int16 pairs, or zigzag varints
+            with FLAG_VARINT
+    --      [FLAG_TIMESTAMPS] millisecond deltas per point: uint16, or
+            unsigned varints with FLAG_VARINT
+
+Fixed-width int16 payloads decode with ``np.frombuffer`` directly over the
+request bytes (no per-point Python objects); varint payloads are decoded
+with vectorized NumPy as well. Compared with ``[{"x": .., "y": ..}]`` JSON
+this is roughly 7x smaller as int16 and over 10x as varints.
+"""
+import json
+import struct
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.services.trace_eval.evaluate import as_points
+
+MAGIC = b"SK"
+VERSION = 1
+CONTENT_TYPE = "application/octet-stream"
+
+FLAG_TIMESTAMPS = 0x01
+FLAG_VARINT = 0x02
+FLAG_META = 0x04
+_KNOWN_FLAGS = FLAG_TIMESTAMPS | FLAG_VARINT | FLAG_META
+
+DEFAULT_SCALE = 4  # quarter-pixel precision
+
+_HEADER = struct.Struct("<2sBBIHH")
+_META_LENGTH = struct.Struct("<I")
+_MAX_VARINT_BYTES = 5  # enough for 32-bit values
+
+
+class StrokeDecodeError(ValueError):
+    """The payload is not a valid encoded stroke."""
+
+
+@dataclass(frozen=True)
+class Stroke:
+    points: np.ndarray  # (n, 2) float64 canvas coordinates
+    timestamps: np.ndarray | None = None  # (n,) int64 milliseconds from the first point
+    meta: dict = field(default_factory=dict)
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def pack_varints(values: np.ndarray) -> bytes:
+    """LEB128-encode non-negative integers below 2**32."""
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size and int(values.max()) >> 32:
+        raise ValueError("varint values must fit in 32 bits")
+    shifts = np.arange(_MAX_VARINT_BYTES, dtype=np.uint64) * np.uint64(7)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)  # (n, 5)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, _MAX_VARINT_BYTES):
+        lengths += values >= (1 << (7 * k))
+    used = np.arange(_MAX_VARINT_BYTES) < lengths[:, None]
+    more = np.arange(_MAX_VARINT_BYTES) < (lengths - 1)[:, None]
+    groups |= np.where(more, np.uint64(0x80), np.uint64(0))
+    return groups[used].astype(np.uint8).tobytes()
+
+
+def unpack_varints(data: memoryview, count: int) -> tuple[np.ndarray, int]:
+    """Decode ``count`` LEB128 varints from the start of ``data``; return them and the bytes consumed."""
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64), 0
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) < count:
+        raise StrokeDecodeError("truncated varint payload")
+    ends = ends[:count]
+    consumed = int(ends[-1]) + 1
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    if int((ends - starts).max()) >= _MAX_VARINT_BYTES:
+        raise StrokeDecodeError("varint longer than 32 bits")
+    raw = raw[:consumed]
+    owner = np.repeat(np.arange(count), ends - starts + 1)
+    position = (np.arange(consumed) - starts[owner]).astype(np.uint64)
+    parts = (raw & 0x7F).astype(np.uint64) << (position * np.uint64(7))
+    return np.add.reduceat(parts, starts), consumed
+
+
+def encode_stroke(
+    points,
+    timestamps=None,
+    *,
+    scale: int = DEFAULT_SCALE,
+    varint: bool = True,
+    meta: dict | None = None,
+) -> bytes:
+    """Encode ``points`` (``(n, 2)`` array-like) and optional millisecond ``timestamps``."""
+    pts = as_points(points)
+    if not 1 <= scale <= 0xFFFF:
+        raise ValueError("scale must be between 1 and 65535")
+    quantized = np.floor(pts * scale + 0.5).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+    flags = 0
+    chunks = []
+    if meta:
+        flags |= FLAG_META
+        blob = json.dumps(meta, separators=(",", ":")).encode()
+        chunks.append(_META_LENGTH.pack(len(blob)) + blob)
+
+    if varint:
+        flags |= FLAG_VARINT
+        if len(deltas) and (deltas.min() < -(1 << 31) or deltas.max() >= 1 << 31):
+            raise ValueError("coordinate deltas must fit in 32 bits")
+        chunks.append(pack_varints(_zigzag(deltas)))
+    else:
+        if len(deltas) and (deltas.min() < -0x8000 or deltas.max() > 0x7FFF):
+            raise ValueError("coordinate deltas do not fit in int16; lower the scale or use varints")
+        chunks.append(deltas.astype("<i2").tobytes())
+
+    if timestamps is not None:
+        flags |= FLAG_TIMESTAMPS
+        ts = np.asarray(timestamps, dtype=np.int64).reshape(-1)
+        if len(ts) != len(pts):
+            raise ValueError("timestamps must have one entry per point")
+        ts_deltas = np.diff(ts, prepend=ts[:1])
+        if len(ts_deltas) and ts_deltas.min() < 0:
+            raise ValueError("timestamps must be non-decreasing")
+        if varint:
+            chunks.append(pack_varints(ts_deltas))
+        else:
+            if len(ts_deltas) and ts_deltas.max() > 0xFFFF:
+                raise ValueError("timestamp gaps do not fit in uint16; use varints")
+            chunks.append(ts_deltas.astype("<u2").tobytes())
+
+    return _HEADER.pack(MAGIC, VERSION, flags, len(pts), scale, 0) + b"".join(chunks)
+
+
+def decode_stroke(data: bytes | bytearray | memoryview, max_points: int | None = None) -> Stroke:
+    """Decode an encoded stroke; fixed-width channels are read in place."""
+    view = memoryview(data).cast("B")
+    if len(view) < _HEADER.size:
+        raise StrokeDecodeError("payload shorter than the stroke header")
+    magic, version, flags, count, scale, _ = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise StrokeDecodeError("not an encoded stroke")
+    if version != VERSION:
+        raise StrokeDecodeError(f"unsupported stroke version {version}")
+    if flags & ~_KNOWN_FLAGS:
+        raise StrokeDecodeError("unknown stroke flags")
+    if scale == 0:
+        raise StrokeDecodeError("scale must be positive")
+    if max_points is not None and count > max_points:
+        raise StrokeDecodeError(f"stroke has more than {max_points} points")
+    offset = _HEADER.size
+
+    meta: dict = {}
+    if flags & FLAG_META:
+        if len(view) < offset + _META_LENGTH.size:
+            raise StrokeDecodeError("truncated metadata length")
+        (length,) = _META_LENGTH.unpack_from(view, offset)
+        offset += _META_LENGTH.size
+        if len(view) < offset + length:
+            raise StrokeDecodeError("truncated metadata")
+        try:
+            meta = json.loads(bytes(view[offset:offset + length]))
+        except ValueError as exc:
+            raise StrokeDecodeError("metadata is not valid JSON") from exc
+        if not isinstance(meta, dict):
+            raise StrokeDecodeError("metadata must be a JSON object")
+        offset += length
+
+    varint = bool(flags & FLAG_VARINT)
+    if varint:
+        packed, used = unpack_varints(view[offset:], 2 * count)
+        deltas = _unzigzag(packed)
+    else:
+        used = 4 * count
+        if len(view) < offset + used:
+            raise StrokeDecodeError("truncated coordinates")
+        deltas = np.frombuffer(view, dtype="<i2", count=2 * count, offset=offset)
+    offset += used
+    points = np.cumsum(deltas.reshape(-1, 2), axis=0, dtype=np.int64) / float(scale)
+
+    timestamps = None
+    if flags & FLAG_TIMESTAMPS:
+        if varint:
+            ts_deltas, used = unpack_varints(view[offset:], count)
+        else:
+            used = 2 * count
+            if len(view) < offset + used:
+                raise StrokeDecodeError("truncated timestamps")
+            ts_deltas = np.frombuffer(view, dtype="<u2", count=count, offset=offset)
+        offset += used
+        timestamps = np.cumsum(ts_deltas, dtype=np.int64)
+
+    if offset != len(view):
+        raise StrokeDecodeError("trailing bytes after stroke payload")
+    return Stroke(points=points, timestamps=timestamps, meta=meta)
@@ -0,0 +1,146 @@
+"""Vectorized port of ``evaluateTrace`` from ``TraceCanvas.tsx``.
+
+Every rule, constant and comparison matches the frontend so the server
+reaches the same verdict for the same stroke. Stroke points are checked
+against nearby segments through cached polygon geometry (``geometry.py``)
+instead of the nested per-point loop, and sums that feed a threshold
+comparison are accumulated in the same order as the JS loop to keep float
+results bit-identical.
+"""
+import numpy as np
+
+from app.services.trace_eval.geometry import polygon_geometry
+from app.services.trace_eval.shapes import CircleShape, EllipseShape, PolygonShape, Shape
+
+MIN_POINTS = 10
+
+# Circle/ellipse angular coverage
+ANGLE_STEP = 10  # degrees per bucket
+REQUIRED_DEGREES = 216  # 60% of 360
+
+
+def as_points(points) -> np.ndarray:
+    """Coerce ``[(x, y), ...]``, ``[{"x":..,"y":..}, ...]`` or an array into an (n, 2) float64 array."""
+    if isinstance(points, np.ndarray):
+        return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if points and isinstance(points[0], dict):
+        points = [(p["x"], p["y"]) for p in points]
+    return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+
+def _ordered_sum(values: np.ndarray) -> float:
+    """Left-to-right float sum, matching a JS ``+=`` loop (np.sum is pairwise)."""
+    if values.size == 0:
+        return 0.0
+    return float(np.cumsum(values)[-1])
+
+
+def _js_round(values: np.ndarray) -> np.ndarray:
+    """``Math.round``: halves round towards +infinity (np.round rounds to even)."""
+    return np.floor(values + 0.5)
+
+
+def _polygon_thresholds(shape_id: str, threshold: float) -> tuple[bool, float, float]:
+    lowered = shape_id.lower()
+    is_square = "square" in lowered
+    is_square_drawing = "squaredrawing" in lowered
+    if is_square_drawing:
+        return is_square, max(threshold * 0.7, 16), 0.5
+    if is_square:
+        return is_square, max(threshold * 0.4, 8), 0.95
+    return is_square, threshold, 0.7
+
+
+def evaluate_polygon(user_pts: np.ndarray, shape: PolygonShape, threshold: float) -> bool:
+    pts = shape.points
+    if len(pts) < 2:
+        return False
+    is_square, distance_threshold, required_coverage = _polygon_thresholds(shape.id, threshold)
+
+    geometry = polygon_geometry(shape)
+    seg_lengths = geometry.lengths
+    total_shape_length = geometry.total_length
+
+    if geometry.segment_count == 1:
+        param, _ = geometry.distances(user_pts)
+        outside = (param < 0) | (param > 1)
+        overshoot_amount = np.where(param < 0, -param, param - 1)
+        overshoot_distance = overshoot_amount * seg_lengths[0]
+        max_allowed = max(threshold * 1.1, seg_lengths[0] * 0.25)
+        if np.any(outside & (overshoot_distance > max_allowed)):
+            return False
+
+    # Only points within the threshold matter, so the grid may skip far ones
+    closest, min_dist = geometry.nearest(user_pts, distance_threshold)
+    hits = min_dist <= distance_threshold
+
+    # Segments count once, in the order they were first reached
+    covered_segments, first_seen = np.unique(closest[hits], return_index=True)
+    covered_length = _ordered_sum(seg_lengths[covered_segments[np.argsort(first_seen)]])
+
+    if total_shape_length == 0:
+        return False
+    coverage_ratio = covered_length / total_shape_length
+
+    if is_square:
+        if len(covered_segments) < geometry.segment_count:
+            return False
+        hit_count = int(np.count_nonzero(hits))
+        if hit_count == 0:
+            return False
+        average_deviation = _ordered_sum(min_dist[hits]) / hit_count
+        return coverage_ratio >= required_coverage and average_deviation <= distance_threshold * 0.5
+
+    return coverage_ratio >= required_coverage
+
+
+def _covered_degrees(angles_rad: np.ndarray) -> int:
+    buckets = _js_round(np.fmod(angles_rad * 180 / np.pi + 360, 360) / ANGLE_STEP) * ANGLE_STEP
+    return len(np.unique(buckets)) * ANGLE_STEP
+
+
+def evaluate_circle(user_pts: np.ndarray, shape: CircleShape, threshold: float) -> bool:
+    cx, cy = shape.center
+    effective_threshold = max(threshold * 1.5, min(18, shape.radius * 0.12))
+    dx = user_pts[:, 0] - cx
+    dy = user_pts[:, 1] - cy
+    dist = np.sqrt(dx * dx + dy * dy)
+    near = np.abs(dist - shape.radius) <= effective_threshold
+    return _covered_degrees(np.arctan2(dy[near], dx[near])) >= REQUIRED_DEGREES
+
+
+def evaluate_ellipse(user_pts: np.ndarray, shape: EllipseShape, threshold: float) -> bool:
+    cx, cy = shape.center
+    rx, ry = shape.radius_x, shape.radius_y
+    cos_r = np.cos(-shape.rotation)
+    sin_r = np.sin(-shape.rotation)
+    effective_threshold = max(threshold * 1.5, min(18, max(rx, ry) * 0.12))
+
+    dx = user_pts[:, 0] - cx
+    dy = user_pts[:, 1] - cy
+    local_x = dx * cos_r - dy * sin_r
+    local_y = dx * sin_r + dy * cos_r
+    angle = np.arctan2(local_y, local_x)
+    distance = np.sqrt(local_x * local_x + local_y * local_y)
+    cos_a = np.cos(angle)
+    sin_a = np.sin(angle)
+    denom = np.sqrt(ry * ry * cos_a * cos_a + rx * rx * sin_a * sin_a)
+    valid = denom != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected_radius = (rx * ry) / denom
+    near = valid & (np.abs(distance - expected_radius) <= effective_threshold)
+    return _covered_degrees(angle[near]) >= REQUIRED_DEGREES
+
+
+def evaluate_trace(user_pts, shape: Shape, threshold: float = 20) -> bool:
+    """Return whether ``user_pts`` traces ``shape`` closely enough (same verdict as the frontend)."""
+    points = as_points(user_pts)
+    if len(points) < MIN_POINTS:
+        return False
+    if isinstance(shape, PolygonShape):
+        return evaluate_polygon(points, shape, threshold)
+    if isinstance(shape, CircleShape):
+        return evaluate_circle(points, shape, threshold)
+    if isinstance(shape, EllipseShape):
+        return evaluate_ellipse(points, shape, threshold)
+    return False
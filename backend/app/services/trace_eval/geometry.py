@@ -0,0 +1,242 @@
+"""Precomputed polygon geometry and a uniform-grid segment index.
+
+Scoring only cares about stroke points that land within the distance
+threshold of some segment, and about which segment is closest for those.
+A grid whose cells are at least that threshold wide lets each point test
+only the segments registered in its own cell: any segment within the
+threshold is guaranteed to be registered there, so the nearest segment
+found among the candidates is the true nearest one whenever it counts.
+
+Segments are registered column by column along their thickened path, so a
+grid costs about one entry per cell the path crosses rather than one per
+cell of its bounding box. Polygons whose grid would still exceed
+``MAX_GRID_ENTRIES`` are scored densely, in blocks of points.
+
+Every polygon the game scores today is a single line (see ``registry``), so
+the endpoints always take the dense path. The index is kept for outlines with
+``INDEX_MIN_SEGMENTS`` or more segments, e.g. future free-drawing shapes, and
+is covered by the parity and geometry tests. Geometry is not cached across
+requests: shapes are placed at random, so a cache keyed on vertices would
+almost never hit.
+"""
+import math
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.services.trace_eval.shapes import PolygonShape
+
+# Below this many segments a dense (points x segments) broadcast is cheaper
+INDEX_MIN_SEGMENTS = 16
+MAX_GRID_CELLS = 1 << 20
+# Segment-to-cell registrations a grid may hold; above this the dense path is used
+MAX_GRID_ENTRIES = 1 << 21
+# (point, segment) pairs evaluated at once on the dense path
+DENSE_BLOCK_PAIRS = 1 << 20
+
+def segment_distances(px, py, sx, sy, cx, cy, len_sq):
+    """Projection parameter and distance from points to segments (elementwise, broadcasting).
+
+    Operation order matches ``evaluateTrace`` exactly so results are bit-identical.
+    """
+    a = px - sx
+    b = py - sy
+    dot = a * cx + b * cy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        param = np.where(len_sq != 0, dot / np.where(len_sq != 0, len_sq, 1), -1.0)
+    clamped = np.clip(param, 0, 1)
+    xx = np.where(param < 0, sx, np.where(param > 1, sx + cx, sx + clamped * cx))
+    yy = np.where(param < 0, sy, np.where(param > 1, sy + cy, sy + clamped * cy))
+    dx = px - xx
+    dy = py - yy
+    return param, np.sqrt(dx * dx + dy * dy)
+
+
+@dataclass(frozen=True)
+class SegmentGrid:
+    """CSR bucket index: cell ``c`` holds ``segments[offsets[c]:offsets[c + 1]]``."""
+
+    origin: tuple[float, float]
+    cell_size: float
+    width: int
+    height: int
+    offsets: np.ndarray
+    segments: np.ndarray
+
+    def cells(self, points: np.ndarray) -> np.ndarray:
+        """Cell id per point, or -1 outside the grid."""
+        ix = np.floor((points[:, 0] - self.origin[0]) / self.cell_size).astype(np.int64)
+        iy = np.floor((points[:, 1] - self.origin[1]) / self.cell_size).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.width) & (iy >= 0) & (iy < self.height)
+        return np.where(inside, iy * self.width + ix, -1)
+
+
+@dataclass(frozen=True)
+class PolygonGeometry:
+    """Segment vectors, lengths and (lazily) grid indexes for one polygon."""
+
+    starts: np.ndarray  # (S, 2)
+    vectors: np.ndarray  # (S, 2)
+    len_sq: np.ndarray  # (S,)
+    lengths: np.ndarray  # (S,)
+    cumulative_lengths: np.ndarray  # (S,) running total, left to right
+    _grids: dict[float, SegmentGrid | None] = field(default_factory=dict, compare=False, repr=False)
+    _grids_lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def total_length(self) -> float:
+        return float(self.cumulative_lengths[-1]) if self.segment_count else 0.0
+
+    def distances(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Dense (N, S) projection parameters and distances."""
+        return segment_distances(
+            points[:, 0:1], points[:, 1:2],
+            self.starts[:, 0], self.starts[:, 1],
+            self.vectors[:, 0], self.vectors[:, 1],
+            self.len_sq,
+        )
+
+    def nearest(self, points: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """Closest segment index and distance per point.
+
+        Exact for every point whose nearest segment is within ``radius``;
+        other points may report ``inf`` (and index -1) when served by the grid.
+        """
+        grid = None
+        if self.segment_count >= INDEX_MIN_SEGMENTS and radius > 0 and math.isfinite(radius):
+            grid = self.grid(radius)
+        if grid is None:
+            return self._nearest_dense(points)
+        return self._nearest_indexed(points, grid)
+
+    def grid(self, radius: float) -> SegmentGrid | None:
+        """The index for ``radius``, or ``None`` when it would exceed ``MAX_GRID_ENTRIES``."""
+        # Bucket radii so nearby thresholds share one index
+        cell = float(2 ** math.ceil(math.log2(radius)))
+        # Threadpool handlers may share an instance; build each grid once
+        with self._grids_lock:
+            if cell not in self._grids:
+                self._grids[cell] = self._build_grid(cell)
+            return self._grids[cell]
+
+    def _nearest_dense(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        block = max(1, DENSE_BLOCK_PAIRS // max(1, self.segment_count))
+        closest = np.empty(len(points), dtype=np.int64)
+        min_dist = np.empty(len(points))
+        for start in range(0, len(points), block):
+            _, dist = self.distances(points[start:start + block])
+            nearest = np.argmin(dist, axis=1)
+            closest[start:start + block] = nearest
+            min_dist[start:start + block] = dist[np.arange(len(nearest)), nearest]
+        return closest, min_dist
+
+    def _build_grid(self, cell: float) -> SegmentGrid | None:
+        ends = self.starts + self.vectors
+        lo = np.minimum(self.starts, ends) - cell
+        hi = np.maximum(self.starts, ends) + cell
+        origin = lo.min(axis=0)
+        extent = hi.max(axis=0) - origin
+        while math.ceil(extent[0] / cell) * math.ceil(extent[1] / cell) > MAX_GRID_CELLS:
+            cell *= 2
+        width = max(1, math.ceil(extent[0] / cell))
+        height = max(1, math.ceil(extent[1] / cell))
+
+        # One (segment, column) pair per grid column the thickened segment spans
+        x0 = np.floor((lo[:, 0] - origin[0]) / cell).astype(np.int64)
+        x1 = np.minimum(np.floor((hi[:, 0] - origin[0]) / cell).astype(np.int64), width - 1)
+        columns = x1 - x0 + 1
+        if int(columns.sum()) > MAX_GRID_ENTRIES:
+            return None
+        pair_seg = np.repeat(np.arange(self.segment_count), columns)
+        pair_col = x0[pair_seg] + np.arange(len(pair_seg)) - np.repeat(np.cumsum(columns) - columns, columns)
+
+        # Part of the segment whose x lies within `cell` of the column, then its y-range widened by `cell`.
+        # A point within `cell` of the segment has its nearest segment point in that part and range.
+        reach = cell * (1 + 1e-9)  # a hair past `cell`, so rounding can't drop a boundary cell
+        sx, sy = self.starts[pair_seg, 0], self.starts[pair_seg, 1]
+        vx, vy = self.vectors[pair_seg, 0], self.vectors[pair_seg, 1]
+        slab_lo = origin[0] + pair_col * cell - reach
+        slab_hi = origin[0] + (pair_col + 1) * cell + reach
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ta = np.where(vx != 0, (slab_lo - sx) / vx, 0.0)
+            tb = np.where(vx != 0, (slab_hi - sx) / vx, 1.0)
+        t_lo = np.clip(np.minimum(ta, tb), 0, 1)
+        t_hi = np.clip(np.maximum(ta, tb), 0, 1)
+        ya = sy + vy * t_lo
+        yb = sy + vy * t_hi
+        row_lo = np.maximum(np.floor((np.minimum(ya, yb) - reach - origin[1]) / cell).astype(np.int64), 0)
+        row_hi = np.minimum(np.floor((np.maximum(ya, yb) + reach - origin[1]) / cell).astype(np.int64), height - 1)
+        rows = np.maximum(row_hi - row_lo + 1, 0)
+        total = int(rows.sum())
+        if total > MAX_GRID_ENTRIES:
+            return None
+
+        segs = np.repeat(pair_seg, rows)
+        row = np.repeat(row_lo, rows) + np.arange(total) - np.repeat(np.cumsum(rows) - rows, rows)
+        cells = row * width + np.repeat(pair_col, rows)
+        order = np.lexsort((segs, cells))  # by cell, then segment index
+        counts = np.bincount(cells, minlength=width * height)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return SegmentGrid(
+            origin=(float(origin[0]), float(origin[1])),
+            cell_size=cell,
+            width=width,
+            height=height,
+            offsets=offsets,
+            segments=segs[order],
+        )
+
+    def _nearest_indexed(self, points: np.ndarray, grid: SegmentGrid) -> tuple[np.ndarray, np.ndarray]:
+        n = len(points)
+        closest = np.full(n, -1, dtype=np.int64)
+        min_dist = np.full(n, np.inf)
+
+        cells = grid.cells(points)
+        begin = np.where(cells >= 0, grid.offsets[np.maximum(cells, 0)], 0)
+        counts = np.where(cells >= 0, grid.offsets[np.maximum(cells, 0) + 1] - begin, 0)
+        total = int(counts.sum())
+        if total == 0:
+            return closest, min_dist
+
+        # Expand to (point, candidate segment) pairs, grouped by point
+        pair_point = np.repeat(np.arange(n), counts)
+        group_start = np.cumsum(counts) - counts
+        within = np.arange(total) - np.repeat(group_start, counts)
+        pair_seg = grid.segments[np.repeat(begin, counts) + within]
+
+        _, dist = segment_distances(
+            points[pair_point, 0], points[pair_point, 1],
+            self.starts[pair_seg, 0], self.starts[pair_seg, 1],
+            self.vectors[pair_seg, 0], self.vectors[pair_seg, 1],
+            self.len_sq[pair_seg],
+        )
+        has_candidates = counts > 0
+        group_min = np.minimum.reduceat(dist, group_start[has_candidates])
+        min_dist[has_candidates] = group_min
+
+        # Ties go to the lowest segment index, like the JS strict `<` scan
+        is_min = dist == min_dist[pair_point]
+        points_hit, first = np.unique(pair_point[is_min], return_index=True)
+        closest[points_hit] = pair_seg[is_min][first]
+        return closest, min_dist
+
+
+def polygon_geometry(shape: PolygonShape) -> PolygonGeometry:
+    """Segment vectors and lengths for ``shape``."""
+    pts = shape.points
+    starts = pts[:-1]
+    vectors = pts[1:] - starts
+    len_sq = vectors[:, 0] * vectors[:, 0] + vectors[:, 1] * vectors[:, 1]
+    lengths = np.sqrt(len_sq)
+    return PolygonGeometry(
+        starts=starts,
+        vectors=vectors,
+        len_sq=len_sq,
+        lengths=lengths,
+        cumulative_lengths=np.cumsum(lengths),
+    )
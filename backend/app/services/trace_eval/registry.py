@@ -0,0 +1,70 @@
+"""Traceable shapes, mirroring the generators in ``frontend/src/Components/minigamesData.ts``.
+
+The frontend draws shapes at random positions, so geometry still comes from
+the client, but what a shape is worth and how strict its trace is are fixed
+here by its id. Shapes whose id is not listed (guides, unknown ids) cannot be
+scored, and geometry is checked against what the generator can produce.
+"""
+import math
+import re
+from dataclasses import dataclass
+
+from app.services.trace_eval.shapes import CircleShape, EllipseShape, PolygonShape, Shape
+
+# Smallest line / radius the generators produce on the smallest supported canvas
+MIN_SEGMENT_LENGTH = 20.0
+MIN_RADIUS = 10.0
+
+
+@dataclass(frozen=True)
+class ShapeSpec:
+    pattern: re.Pattern[str]
+    type: str
+    reward: int
+    threshold: float  # the owning minigame's threshold
+    minigame: str
+    vertices: int | None = None  # polygons only
+
+
+def _spec(pattern: str, type: str, reward: int, threshold: float, minigame: str, vertices: int | None = None):
+    return ShapeSpec(re.compile(pattern), type, reward, threshold, minigame, vertices)
+
+
+SHAPE_SPECS: tuple[ShapeSpec, ...] = (
+    _spec(r"angledLine|horizontalLine", "polygon", reward=5, threshold=60, minigame="m1", vertices=2),
+    _spec(r"squareDrawing-side[0-3]-\d+", "polygon", reward=5, threshold=40, minigame="m2", vertices=2),
+    _spec(r"connectDots-\d+", "polygon", reward=8, threshold=30, minigame="m3", vertices=2),
+    _spec(r"circle", "circle", reward=20, threshold=45, minigame="m4"),
+    _spec(r"ellipsePlanes-(edge[0-3]|diag[01])-\d+", "polygon", reward=5, threshold=40, minigame="m5", vertices=2),
+    _spec(r"ellipsePlanes-ellipse-\d+", "ellipse", reward=20, threshold=40, minigame="m5"),
+)
+
+
+class ShapeRejected(ValueError):
+    """The submitted shape is not one the game can ask the player to trace."""
+
+
+def spec_for(shape_id: str) -> ShapeSpec | None:
+    return next((spec for spec in SHAPE_SPECS if spec.pattern.fullmatch(shape_id)), None)
+
+
+def check_shape(shape: Shape) -> ShapeSpec:
+    """Return the registry entry for ``shape``, or raise ``ShapeRejected``."""
+    spec = spec_for(shape.id)
+    if spec is None:
+        raise ShapeRejected(f"Unknown shape id {shape.id!r}")
+    if shape.type != spec.type:
+        raise ShapeRejected(f"Shape {shape.id!r} must be a {spec.type}")
+    if isinstance(shape, PolygonShape):
+        if spec.vertices is not None and len(shape.points) != spec.vertices:
+            raise ShapeRejected(f"Shape {shape.id!r} must have {spec.vertices} points")
+        lengths = [math.dist(a, b) for a, b in zip(shape.points, shape.points[1:])]
+        if min(lengths, default=0.0) < MIN_SEGMENT_LENGTH:
+            raise ShapeRejected(f"Shape {shape.id!r} is too small")
+    elif isinstance(shape, CircleShape):
+        if shape.radius < MIN_RADIUS:
+            raise ShapeRejected(f"Shape {shape.id!r} is too small")
+    elif isinstance(shape, EllipseShape):
+        if min(shape.radius_x, shape.radius_y) < MIN_RADIUS:
+            raise ShapeRejected(f"Shape {shape.id!r} is too small")
+    return spec
@@ -0,0 +1,61 @@
+"""Shape definitions mirroring ``frontend/src/Components/types.ts``."""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PolygonShape:
+    id: str
+    points: np.ndarray  # (n, 2) float64 vertices, in drawing order
+    reward: int = 0
+    type: str = "polygon"
+
+
+@dataclass(frozen=True)
+class CircleShape:
+    id: str
+    center: tuple[float, float]
+    radius: float
+    reward: int = 0
+    type: str = "circle"
+
+
+@dataclass(frozen=True)
+class EllipseShape:
+    id: str
+    center: tuple[float, float]
+    radius_x: float
+    radius_y: float
+    rotation: float = 0.0
+    reward: int = 0
+    type: str = "ellipse"
+
+
+Shape = PolygonShape | CircleShape | EllipseShape
+
+
+def _xy(point: dict) -> tuple[float, float]:
+    return float(point["x"]), float(point["y"])
+
+
+def shape_from_dict(data: dict) -> Shape:
+    """Build a shape from its frontend JSON form (``radiusX``/``radiusY`` etc.)."""
+    kind = data.get("type")
+    shape_id = str(data.get("id", ""))
+    reward = int(data.get("reward", 0))
+    if kind == "polygon":
+        points = np.array([_xy(p) for p in data.get("points", [])], dtype=np.float64).reshape(-1, 2)
+        return PolygonShape(id=shape_id, points=points, reward=reward)
+    if kind == "circle":
+        return CircleShape(id=shape_id, center=_xy(data["center"]), radius=float(data["radius"]), reward=reward)
+    if kind == "ellipse":
+        return EllipseShape(
+            id=shape_id,
+            center=_xy(data["center"]),
+            radius_x=float(data["radiusX"]),
+            radius_y=float(data["radiusY"]),
+            rotation=float(data.get("rotation") or 0.0),
+            reward=reward,
+        )
+    raise ValueError(f"Unknown shape type: {kind!r}")
@@ -1,49 +1,119 @@
+import hashlib
+import time
+from functools import cache
+
 import jwt
-from jwt import PyJWKClient
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from decouple import config
 
 from app.models import User
 from app.database import get_db
+from app.services.identity import resolve_user
+from app.utils.cache import TTLCache
+from app.utils.jwks import JWKSCache, JWKSUnavailable, file_loader, url_loader
 
-# Auth0 configuration from environment
-AUTH0_DOMAIN = config("AUTH0_DOMAIN")
-AUTH0_AUDIENCE = config("AUTH0_AUDIENCE")
 ALGORITHMS = ["RS256"]
 
+# Signing key cache; AUTH0_JWKS_FILE points at a local JWKS for tests/offline runs
+AUTH0_JWKS_FILE = config("AUTH0_JWKS_FILE", default="")
+AUTH0_JWKS_TTL = config("AUTH0_JWKS_TTL", default=600, cast=float)
+AUTH0_JWKS_REFRESH_AHEAD = config("AUTH0_JWKS_REFRESH_AHEAD", default=60, cast=float)
+AUTH0_JWKS_STALE_TTL = config("AUTH0_JWKS_STALE_TTL", default=3600, cast=float)
+AUTH0_JWKS_MIN_REFETCH = config("AUTH0_JWKS_MIN_REFETCH", default=30, cast=float)
+
+
+@cache
+def auth0_settings() -> tuple[str, str]:
+    """Audience and issuer, read on first use so importing the app needs no Auth0 settings."""
+    return config("AUTH0_AUDIENCE"), f"https://{config('AUTH0_DOMAIN')}/"
+
+
+@cache
+def get_jwks_cache() -> JWKSCache:
+    """Shared signing key cache, built on the first token check."""
+    if AUTH0_JWKS_FILE:
+        loader = file_loader(AUTH0_JWKS_FILE)
+    else:
+        loader = url_loader(f"https://{config('AUTH0_DOMAIN')}/.well-known/jwks.json")
+    return JWKSCache(
+        loader,
+        ttl=AUTH0_JWKS_TTL,
+        refresh_ahead=AUTH0_JWKS_REFRESH_AHEAD,
+        stale_ttl=AUTH0_JWKS_STALE_TTL,
+        min_refetch_interval=AUTH0_JWKS_MIN_REFETCH,
+    )
+
+
+# Verified-token cache: decoded payloads keyed by token hash, kept until `exp`
+AUTH0_TOKEN_CACHE_SIZE = config("AUTH0_TOKEN_CACHE_SIZE", default=4096, cast=int)
+AUTH0_TOKEN_CACHE_MAX_TTL = config("AUTH0_TOKEN_CACHE_MAX_TTL", default=3600, cast=float)
+
+token_cache: TTLCache[bytes, dict] = TTLCache(maxsize=AUTH0_TOKEN_CACHE_SIZE, ttl=AUTH0_TOKEN_CACHE_MAX_TTL)
+
 security = HTTPBearer()
 
+
+def _token_cache_key(token: str) -> bytes:
+    """Hash the token together with the audience and issuer it is checked against."""
+    digest = hashlib.sha256()
+    for part in (*auth0_settings(), token):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _remember_token(cache_key: bytes, payload: dict) -> None:
+    """Cache a verified payload until its expiry (capped by the max TTL)."""
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    remaining = exp - time.time()
+    if remaining > 0:
+        token_cache.set(cache_key, dict(payload), ttl=min(remaining, AUTH0_TOKEN_CACHE_MAX_TTL))
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify Auth0 JWT token and return the payload."""
     token = credentials.credentials
-    
+    cache_key = _token_cache_key(token)
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        # A copy, so callers cannot rewrite the claims other requests will see
+        return dict(cached)
+
     try:
-        # Get the public key from Auth0
-        jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-        jwks_client = PyJWKClient(jwks_url)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-        
+        # Get the public key from the shared JWKS cache
+        signing_key = get_jwks_cache().get_signing_key_from_jwt(token)
+        audience, issuer = auth0_settings()
+
         # Decode and verify the token
         payload = jwt.decode(
             token,
             signing_key.key,
             algorithms=ALGORITHMS,
-            audience=AUTH0_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/"
+            audience=audience,
+            issuer=issuer
         )
+        _remember_token(cache_key, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTClaimsError:
+    except (jwt.InvalidAudienceError, jwt.InvalidIssuerError, jwt.MissingRequiredClaimError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token claims"
         )
+    except JWKSUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Signing keys are temporarily unavailable",
+            headers={"Retry-After": str(int(AUTH0_JWKS_MIN_REFETCH))},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,69 +121,14 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         )
 
 
-def _extract_display_name(payload: dict) -> str | None:
-    """Pick a usable display name from the Auth0 token payload."""
-    for key in ("name", "nickname", "preferred_username", "given_name", "email"):
-        value = payload.get(key)
-        if value:
-            trimmed = str(value).strip()
-            if trimmed:
-                return trimmed[:50]
-    return None
-
-def get_current_user(
+async def get_current_user(
     payload: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get or create the current user from the Auth0 sub claim."""
-    auth0_sub = payload.get("sub")
-    if not auth0_sub:
+    if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token: missing sub claim"
         )
-    
-    # Find existing user or create new one
-    statement = select(User).where(User.auth0_sub == auth0_sub)
-    user = db.exec(statement).first()
-    
-    picture = payload.get("picture")
-    extracted_display_name = _extract_display_name(payload)
-    fallback_identifier = None
-    if auth0_sub:
-        parts = auth0_sub.split("|")
-        fallback_identifier = parts[-1] if parts else auth0_sub
-
-    if not user:
-        user = User(
-            auth0_sub=auth0_sub,
-            coins=0,
-            picture_url=picture,
-            display_name=extracted_display_name,
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    else:
-        updated = False
-        if picture and user.picture_url != picture:
-            user.picture_url = picture
-            updated = True
-        if extracted_display_name:
-            stored_name = (user.display_name or "").strip()
-            should_update_name = False
-            if not stored_name:
-                should_update_name = True
-            elif fallback_identifier and stored_name == fallback_identifier:
-                should_update_name = True
-            elif stored_name == auth0_sub:
-                should_update_name = True
-            if should_update_name:
-                user.display_name = extracted_display_name
-                updated = True
-        if updated:
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-    
-    return user
+    return await resolve_user(db, payload)
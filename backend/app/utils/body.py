@@ -0,0 +1,32 @@
+"""Raw request body parsers for non-JSON payloads."""
+from collections.abc import Awaitable, Callable
+
+from fastapi import HTTPException, Request, status
+
+OCTET_STREAM = "application/octet-stream"
+
+
+def octet_stream_body(max_bytes: int) -> Callable[[Request], Awaitable[bytes]]:
+    """Dependency factory: read an ``application/octet-stream`` body of at most ``max_bytes``.
+
+    The body is streamed so oversized uploads are rejected without buffering them.
+    """
+
+    async def read_body(request: Request) -> bytes:
+        content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if content_type != OCTET_STREAM:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Expected {OCTET_STREAM}",
+            )
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Body too large")
+        body = bytearray()
+        async for chunk in request.stream():
+            body += chunk
+            if len(body) > max_bytes:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Body too large")
+        return bytes(body)
+
+    return read_body
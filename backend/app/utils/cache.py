@@ -0,0 +1,86 @@
+"""Small in-process caching primitives."""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe bounded LRU mapping whose entries expire after a TTL.
+
+    ``ttl`` is the default lifetime; ``set`` can shorten or lengthen it per
+    entry. Expired entries are dropped lazily on access; when the cache is
+    full the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Return the cached value for ``key`` or ``default`` when absent or expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store ``value`` for ``ttl`` seconds (the cache default when omitted)."""
+        lifetime = self.ttl if ttl is None else ttl
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + lifetime, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        """Remove ``key`` and return its value if it was cached."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)  # type: ignore[arg-type]
+        return entry is not None and entry[0] > self._clock()
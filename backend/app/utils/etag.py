@@ -0,0 +1,46 @@
+"""Entity tags and conditional GET helpers."""
+import hashlib
+
+from decouple import config
+from fastapi import Response, status
+
+# Shared caches (CDN) may keep public responses this long before revalidating
+PUBLIC_CACHE_MAX_AGE = config("PUBLIC_CACHE_MAX_AGE", default=30, cast=int)
+PUBLIC_CACHE_CONTROL = f"public, max-age={PUBLIC_CACHE_MAX_AGE}, stale-while-revalidate={PUBLIC_CACHE_MAX_AGE}"
+# Per-user responses: browsers keep them but must revalidate on every use
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator derived from the exact response bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def weak_etag(*parts: object) -> str:
+    """Weak validator derived from version inputs (revisions, cursors) rather than the body."""
+    digest = hashlib.blake2b("\0".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """``If-None-Match`` check; per RFC 9110 it uses weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in if_none_match.split(","))
+
+
+def validator_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Bodiless 304 that repeats the validators, as RFC 9110 requires."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, cache_control))
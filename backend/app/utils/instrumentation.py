@@ -0,0 +1,171 @@
+"""Per-request latency and SQL telemetry.
+
+``InstrumentationMiddleware`` opens a ``RequestStats`` for every HTTP request
+and keeps it in a context variable; the cursor hooks installed by
+``instrument_sql`` add each statement's count and duration to it (context
+variables follow the request into the threadpool and into async-engine
+greenlets). When the request ends, route-level histograms are updated and a
+request that ran one statement ``N_PLUS_ONE_THRESHOLD`` times or more is
+logged and counted as a likely N+1. ``render_metrics`` exposes everything in
+the Prometheus text format.
+
+Routes are labelled with their template (``/users/{user_id}/profile``), never
+the raw path, so label cardinality stays bounded.
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from decouple import config
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.metrics import COUNT_BUCKETS, counter_family, histogram_family, render_family
+
+logger = logging.getLogger(__name__)
+
+# Add a Server-Timing header (app and db durations, query count) to every response
+SERVER_TIMING = config("SERVER_TIMING", default=True, cast=bool)
+# Executions of one statement within a request at which it is flagged as N+1
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=10, cast=int)
+
+REQUEST_SECONDS = histogram_family("skrawli_http_request_duration_seconds", "Request latency by route.")
+REQUESTS = counter_family("skrawli_http_requests_total", "Requests by route and status code.")
+REQUEST_QUERIES = histogram_family(
+    "skrawli_http_request_queries", "SQL statements executed per request.", COUNT_BUCKETS
+)
+REQUEST_SQL_SECONDS = histogram_family("skrawli_http_request_sql_seconds", "Time spent in SQL per request.")
+N_PLUS_ONE = counter_family(
+    "skrawli_http_n_plus_one_total", "Requests that repeated one statement N_PLUS_ONE_THRESHOLD times or more."
+)
+FAMILIES = (REQUEST_SECONDS, REQUESTS, REQUEST_QUERIES, REQUEST_SQL_SECONDS, N_PLUS_ONE)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# Statements kept per request when a profiler capture asks for the SQL log
+SQL_LOG_LIMIT = 500
+
+
+class RequestStats:
+    """SQL counters for the request in progress.
+
+    ``sql_log`` stays ``None`` unless a profiler capture sets it to a list,
+    in which case each statement and its duration are appended.
+    """
+
+    __slots__ = ("queries", "sql_seconds", "statements", "sql_log")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements: dict[str, int] = {}
+        self.sql_log: list[tuple[str, float]] | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.sql_seconds += seconds
+        # Compiled statements are cached, so this usually hashes an already-hashed str
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if self.sql_log is not None and len(self.sql_log) < SQL_LOG_LIMIT:
+            self.sql_log.append((statement, seconds))
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        if not self.statements:
+            return None
+        return max(self.statements.items(), key=lambda item: item[1])
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def instrument_sql(engine: Engine) -> None:
+    """Attribute every cursor execution on ``engine`` to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _server_timing(app_seconds: float, stats: RequestStats) -> bytes:
+    return (
+        f'app;dur={app_seconds * 1000:.1f}, db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries"'
+    ).encode()
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", _server_timing(time.perf_counter() - started, stats)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            self._observe(scope, status_code, time.perf_counter() - started, stats)
+
+    @staticmethod
+    def _observe(scope, status_code: int, seconds: float, stats: RequestStats) -> None:
+        route = _route_template(scope)
+        method = scope["method"]
+        REQUEST_SECONDS.labels(method=method, route=route).observe(seconds)
+        REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+        REQUEST_QUERIES.labels(route=route).observe(stats.queries)
+        REQUEST_SQL_SECONDS.labels(route=route).observe(stats.sql_seconds)
+        repeated = stats.most_repeated()
+        if repeated is not None and repeated[1] >= N_PLUS_ONE_THRESHOLD:
+            N_PLUS_ONE.labels(route=route).inc()
+            logger.warning(
+                "Possible N+1 on %s %s: statement ran %d times (%d queries total): %.200s",
+                method,
+                route,
+                repeated[1],
+                stats.queries,
+                " ".join(repeated[0].split()),
+            )
+
+
+def render_metrics() -> str:
+    """All request metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for family in FAMILIES:
+        lines.extend(render_family(family))
+    return "\n".join(lines) + "\n"
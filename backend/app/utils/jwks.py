@@ -0,0 +1,164 @@
+"""Process-wide cache of JWKS signing keys keyed by ``kid``."""
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import jwt
+from jwt import PyJWK, PyJWKSet
+from jwt.exceptions import PyJWKClientError
+
+logger = logging.getLogger(__name__)
+
+JWKSLoader = Callable[[], dict[str, Any]]
+
+
+class JWKSUnavailable(PyJWKClientError):
+    """No keys are cached and the key set could not be fetched."""
+
+
+def url_loader(url: str, timeout: float = 5.0) -> JWKSLoader:
+    """Build a loader that fetches a JWKS document over HTTPS."""
+
+    def load() -> dict[str, Any]:
+        request = urllib.request.Request(url, headers={"User-Agent": "skrawli-jwks"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)
+
+    return load
+
+
+def file_loader(path: str | Path) -> JWKSLoader:
+    """Build a loader that reads a JWKS document from a local file."""
+
+    def load() -> dict[str, Any]:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    return load
+
+
+def static_loader(jwks: dict[str, Any]) -> JWKSLoader:
+    """Build a loader that always returns an in-memory key set."""
+    return lambda: jwks
+
+
+class JWKSCache:
+    """Shared signing key cache with refresh-ahead and stale-while-revalidate.
+
+    Keys are served from memory while fresh. Once a key set is within
+    ``refresh_ahead`` seconds of its ``ttl`` (or past it, up to ``stale_ttl``)
+    the cached keys keep being served while one background thread refetches.
+    Only an empty or fully stale cache makes callers wait on the network.
+    Unknown ``kid`` values trigger at most one refetch per
+    ``min_refetch_interval``, and every fetch is single-flight: callers queued
+    behind a fetch share its outcome. While the cache is empty and the last
+    attempt failed, callers get ``JWKSUnavailable`` instead of refetching.
+    """
+
+    def __init__(
+        self,
+        loader: JWKSLoader,
+        *,
+        ttl: float = 600.0,
+        refresh_ahead: float = 60.0,
+        stale_ttl: float = 3600.0,
+        min_refetch_interval: float = 30.0,
+    ) -> None:
+        self._loader = loader
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.min_refetch_interval = min_refetch_interval
+
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at: float | None = None
+        self._last_attempt: float = float("-inf")
+        self._generation = 0
+        self._fetch_lock = threading.Lock()
+
+    def get_signing_key(self, kid: str) -> PyJWK:
+        """Return the signing key for ``kid``, fetching only when necessary."""
+        age = self._age()
+        if age is None:
+            # Join an in-flight fetch, or start one if the last failure is old enough
+            if self._fetch_lock.locked() or self._may_refetch():
+                self._refresh(wait=True)
+            if self._fetched_at is None:
+                raise JWKSUnavailable("Signing keys are unavailable; the JWKS fetch failed")
+        elif age >= self.stale_ttl and self._may_refetch():
+            self._refresh(wait=True)
+        elif age >= self.ttl - self.refresh_ahead:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # A new kid usually means the provider rotated keys: refetch once.
+        if self._may_refetch():
+            self._refresh(wait=True)
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+        raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+
+    def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        """Return the signing key named by the token's ``kid`` header."""
+        header = jwt.get_unverified_header(token)
+        kid = header.get("kid")
+        if not kid:
+            raise PyJWKClientError("Token header is missing the 'kid' field")
+        return self.get_signing_key(kid)
+
+    def load(self, jwks: dict[str, Any]) -> None:
+        """Install a key set directly, bypassing the loader."""
+        key_set = PyJWKSet.from_dict(jwks)
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        self._fetched_at = time.monotonic()
+        self._generation += 1
+
+    def clear(self) -> None:
+        """Drop all cached keys so the next lookup refetches."""
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = float("-inf")
+
+    def _age(self) -> float | None:
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def _may_refetch(self) -> bool:
+        return time.monotonic() - self._last_attempt >= self.min_refetch_interval
+
+    def _refresh(self, *, wait: bool) -> bool:
+        """Fetch the key set once; concurrent callers share the same fetch."""
+        generation = self._generation
+        if not self._fetch_lock.acquire(blocking=wait):
+            return False
+        try:
+            if self._generation != generation:
+                # Another thread refreshed while we were waiting on the lock.
+                return True
+            if not self._may_refetch():
+                # Another thread's fetch just failed; don't retry it back to back.
+                return False
+            self._last_attempt = time.monotonic()
+            try:
+                self.load(self._loader())
+            except Exception:
+                logger.warning("JWKS refresh failed; serving cached keys", exc_info=True)
+                return False
+            return True
+        finally:
+            self._fetch_lock.release()
+
+    def _refresh_in_background(self) -> None:
+        if self._fetch_lock.locked() or not self._may_refetch():
+            return
+        threading.Thread(target=self._refresh, kwargs={"wait": False}, daemon=True).start()
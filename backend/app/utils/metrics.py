@@ -0,0 +1,145 @@
+"""Lightweight in-process metric primitives."""
+import threading
+from bisect import bisect_left
+
+# Seconds; tuned for DB waits and request latencies.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram with cumulative snapshots (Prometheus semantics)."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """``(upper_bound, count)`` pairs, ending with ``+Inf``."""
+        with self._lock:
+            counts = list(self._counts)
+        running = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile (``None`` when empty)."""
+        pairs = self.cumulative()
+        total = pairs[-1][1]
+        if total == 0:
+            return None
+        target = q * total
+        for bound, running in pairs:
+            if running >= target:
+                return bound
+        return pairs[-1][0]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): running for bound, running in self.cumulative()},
+        }
+
+
+# Query counts per request; small integers, so bucket on them directly.
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Family:
+    """One named metric split by label values, e.g. a histogram per route.
+
+    Children are created on first use; callers must keep label values
+    bounded (route templates, not raw paths).
+    """
+
+    def __init__(self, name: str, help_text: str, kind: str, factory) -> None:
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._factory = factory
+        self._children: dict[Labels, Histogram | Counter] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str):
+        key = tuple(sorted(labels.items()))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def items(self) -> list[tuple[Labels, Histogram | Counter]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+def histogram_family(name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Family:
+    return Family(name, help_text, "histogram", lambda: Histogram(buckets))
+
+
+def counter_family(name: str, help_text: str) -> Family:
+    """``name`` should end in ``_total``; samples use it unchanged."""
+    return Family(name, help_text, "counter", Counter)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    pairs = [*labels, extra] if extra else list(labels)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_family(family: Family) -> list[str]:
+    """Prometheus text exposition (format 0.0.4) lines for one family."""
+    lines = [f"# HELP {family.name} {family.help}", f"# TYPE {family.name} {family.kind}"]
+    for labels, child in sorted(family.items()):
+        if isinstance(child, Counter):
+            lines.append(f"{family.name}{_label_text(labels)} {_number(child.value)}")
+            continue
+        for bound, running in child.cumulative():
+            lines.append(f"{family.name}_bucket{_label_text(labels, ('le', _number(bound)))} {running}")
+        lines.append(f"{family.name}_sum{_label_text(labels)} {_number(round(child.sum, 9))}")
+        lines.append(f"{family.name}_count{_label_text(labels)} {child.count}")
+    return lines
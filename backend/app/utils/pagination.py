@@ -0,0 +1,58 @@
+"""Opaque keyset cursors for list endpoints.
+
+A cursor is the sort key of the last row on a page, serialized as
+URL-safe base64 JSON. List endpoints return it in the ``X-Next-Cursor``
+header (so their JSON bodies stay plain arrays); it is absent on the last
+page. Passing it back as ``?cursor=`` resumes right after that row with an
+index range scan, so every page costs the same regardless of depth.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(**keys: Any) -> str:
+    payload = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in keys.items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, **types: type) -> dict[str, Any]:
+    """Decode ``cursor`` and coerce each key to its type (``int`` or ``datetime``); 400 if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = {}
+        for key, kind in types.items():
+            value = payload[key]
+            if kind is datetime:
+                values[key] = datetime.fromisoformat(value)
+            elif kind is int and isinstance(value, int) and not isinstance(value, bool):
+                values[key] = value
+            else:
+                raise ValueError(key)
+        return values
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+
+
+def clamp_limit(limit: int | None, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    return max(1, min(limit or default, maximum))
+
+
+def split_page(rows: list, limit: int) -> tuple[list, bool]:
+    """Split rows fetched with ``LIMIT limit + 1`` into the page and whether more follow."""
+    return rows[:limit], len(rows) > limit
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
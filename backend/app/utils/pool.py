@@ -0,0 +1,90 @@
+"""Connection pool telemetry: checkout wait times and pool occupancy."""
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.utils.metrics import Histogram
+
+
+class PoolStats:
+    """Counters and a checkout wait-time histogram for one engine's pool."""
+
+    def __init__(self) -> None:
+        self.wait_seconds = Histogram()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def snapshot(self, pool: Pool) -> dict:
+        stats = {
+            "pool_class": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+            )
+        return stats
+
+
+class _TimedGetMixin:
+    """Time how long ``connect()`` waits for a free (or new) connection."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.wait_seconds.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine: Engine) -> PoolStats:
+    """Attach pool event listeners to ``engine`` and return its stats object."""
+    pool = engine.pool
+    stats = getattr(pool, "stats", None) or PoolStats()
+    pool.stats = stats
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+    return stats
@@ -0,0 +1,334 @@
+"""On-demand request profiling and slow-request capture.
+
+A request is captured when one of these applies:
+
+* it carries ``X-Profile: sample`` or ``X-Profile: cprofile`` together with a
+  valid ``X-Internal-Token`` (the response then names the capture in
+  ``X-Profile-Id``);
+* it is picked at random with probability ``PROFILE_SAMPLE_RATE``;
+* ``PROFILE_SLOW_SECONDS`` is set: every request is sampled and the capture
+  is kept only if the request ran over that budget.
+
+Sampling runs on one daemon thread that wakes every
+``PROFILE_SAMPLE_INTERVAL`` seconds. For each captured request it records the
+event loop thread's stack while the request's task is running, and the
+task's suspended coroutine chain (marked ``<await>``) while it is waiting, so
+the result is a wall-clock profile. ``cprofile`` captures use ``cProfile``
+for exact call counts; it is process-wide on the loop thread, so concurrent
+requests show up in it too, and only one runs at a time (others fall back to
+sampling).
+
+Each capture keeps the request's SQL statements with their durations and is
+written to a bounded ring buffer of files in ``PROFILE_DIR``: ``<id>.json``
+metadata plus ``<id>.folded`` (flamegraph.pl / speedscope folded stacks) or
+``<id>.pstats`` (``pstats.Stats``/snakeviz).
+"""
+import asyncio
+import cProfile
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from decouple import config
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.instrumentation import current_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = config("PROFILE_DIR", default=os.path.join(tempfile.gettempdir(), "skrawli-profiles"))
+PROFILE_MAX_CAPTURES = config("PROFILE_MAX_CAPTURES", default=50, cast=int)
+PROFILE_SAMPLE_RATE = config("PROFILE_SAMPLE_RATE", default=0.0, cast=float)
+PROFILE_SAMPLE_INTERVAL = config("PROFILE_SAMPLE_INTERVAL", default=0.005, cast=float)
+# 0 disables slow-request capture
+PROFILE_SLOW_SECONDS = config("PROFILE_SLOW_SECONDS", default=0.0, cast=float)
+# Header-triggered profiles need the internal API token
+PROFILE_TOKEN = config("INTERNAL_API_TOKEN", default="")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+MODES = ("sample", "cprofile")
+
+_CAPTURE_ID = re.compile(r"^\d{13}-\d+-\d+$")
+
+
+def _frame_label(code) -> str:
+    path = Path(code.co_filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({'/'.join(path.parts[-2:])}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _awaiting_stack(coro) -> list[str]:
+    """Outermost-first frames of a suspended coroutine chain."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            labels.append(_frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    labels.append("<await>")
+    return labels
+
+
+@dataclass
+class Capture:
+    capture_id: str
+    mode: str
+    trigger: str
+    task: asyncio.Task
+    loop: asyncio.AbstractEventLoop
+    loop_thread: int
+    stacks: Counter = field(default_factory=Counter)
+    profile: cProfile.Profile | None = None
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Sampler:
+    """Background thread sampling the stacks of registered captures."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self._active: dict[str, Capture] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register(self, capture: Capture) -> None:
+        with self._lock:
+            self._active[capture.capture_id] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="skrawli-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unregister(self, capture: Capture) -> None:
+        with self._lock:
+            self._active.pop(capture.capture_id, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                captures = list(self._active.values())
+                if not captures:
+                    self._wake.clear()
+            if not captures:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for capture in captures:
+                try:
+                    self._sample(capture, frames)
+                except Exception:  # a frame changing under us must never kill the thread
+                    logger.debug("Profiler sample failed", exc_info=True)
+            del frames
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _sample(capture: Capture, frames) -> None:
+        if capture.task.done():
+            return
+        if asyncio.current_task(capture.loop) is capture.task:
+            frame = frames.get(capture.loop_thread)
+            if frame is None:
+                return
+            stack = _thread_stack(frame)
+        else:
+            stack = _awaiting_stack(capture.task.get_coro())
+        capture.stacks[";".join(stack)] += 1
+
+
+class CaptureStore:
+    """Bounded ring buffer of capture files in one directory (shared by all workers)."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_captures: int = PROFILE_MAX_CAPTURES) -> None:
+        self.directory = Path(directory)
+        self.max_captures = max_captures
+        self._counter = itertools.count()
+
+    def new_id(self) -> str:
+        # Millisecond timestamp first, so name order is age order across workers
+        return f"{int(time.time() * 1000):013d}-{os.getpid()}-{next(self._counter)}"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def save(self, capture: Capture, meta: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self.directory / capture.capture_id
+        if capture.profile is not None:
+            capture.profile.dump_stats(str(base) + ".pstats")
+        else:
+            self._write(base.with_suffix(".folded"), capture.folded().encode())
+        # Metadata last: a capture is listed only once its data file exists
+        self._write(base.with_suffix(".json"), json.dumps(meta, indent=1).encode())
+        self._trim()
+
+    def _ids(self) -> list[str]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(p.stem for p in self.directory.glob("*.json") if _CAPTURE_ID.match(p.stem))
+
+    def _trim(self) -> None:
+        ids = self._ids()
+        for capture_id in ids[: max(0, len(ids) - self.max_captures)]:
+            for path in self.directory.glob(f"{capture_id}.*"):
+                path.unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, Any]]:
+        """Metadata of every capture, newest first (without the SQL log)."""
+        entries = []
+        for capture_id in reversed(self._ids()):
+            meta = self.get(capture_id)
+            if meta is not None:
+                meta.pop("sql", None)
+                entries.append(meta)
+        return entries
+
+    def get(self, capture_id: str) -> dict[str, Any] | None:
+        path = self.file(capture_id, "json")
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def file(self, capture_id: str, kind: str) -> Path | None:
+        """Path of one capture file (``json``, ``folded`` or ``pstats``) if it exists."""
+        if not _CAPTURE_ID.match(capture_id):
+            return None
+        path = self.directory / f"{capture_id}.{kind}"
+        return path if path.is_file() else None
+
+
+sampler = Sampler()
+capture_store = CaptureStore()
+_cprofile_lock = threading.Lock()
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _requested_mode(scope) -> str | None:
+    mode = _header(scope, PROFILE_HEADER)
+    if mode not in MODES or not PROFILE_TOKEN:
+        return None
+    token = _header(scope, b"x-internal-token") or ""
+    return mode if secrets.compare_digest(token, PROFILE_TOKEN) else None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; costs one header scan per request unless a trigger is configured."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    def _select(self, scope) -> tuple[str, str] | None:
+        mode = _requested_mode(scope)
+        if mode is not None:
+            return mode, "header"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample", "rate"
+        if PROFILE_SLOW_SECONDS > 0:
+            return "sample", "slow"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        selected = self._select(scope) if scope["type"] == "http" else None
+        if selected is None:
+            await self.app(scope, receive, send)
+            return
+        mode, trigger = selected
+        if mode == "cprofile" and not _cprofile_lock.acquire(blocking=False):
+            mode = "sample"
+        capture = Capture(
+            capture_id=capture_store.new_id(),
+            mode=mode,
+            trigger=trigger,
+            task=asyncio.current_task(),
+            loop=asyncio.get_running_loop(),
+            loop_thread=threading.get_ident(),
+        )
+        stats = current_request.get()
+        if stats is not None:
+            stats.sql_log = []
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "header":
+                    headers = [*message.get("headers", ()), (PROFILE_ID_HEADER, capture.capture_id.encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        if mode == "cprofile":
+            capture.profile = cProfile.Profile()
+            capture.profile.enable()
+        else:
+            sampler.register(capture)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if capture.profile is not None:
+                capture.profile.disable()
+                _cprofile_lock.release()
+            else:
+                sampler.unregister(capture)
+            seconds = time.perf_counter() - started
+        if trigger == "slow" and seconds < PROFILE_SLOW_SECONDS:
+            return
+        route = scope.get("route")
+        meta = {
+            "id": capture.capture_id,
+            "mode": mode,
+            "trigger": trigger,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 3),
+            "captured_at": time.time(),
+            "samples": sum(capture.stacks.values()),
+            "queries": stats.queries if stats is not None else None,
+            "sql_ms": round(stats.sql_seconds * 1000, 3) if stats is not None else None,
+            "sql": [
+                {"statement": statement, "ms": round(sql_seconds * 1000, 3)}
+                for statement, sql_seconds in (stats.sql_log or [])
+            ] if stats is not None else [],
+            "formats": ["pstats"] if mode == "cprofile" else ["folded"],
+        }
+        try:
+            await run_in_threadpool(capture_store.save, capture, meta)
+        except OSError:
+            logger.warning("Could not store profile capture %s", capture.capture_id, exc_info=True)
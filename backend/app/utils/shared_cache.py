@@ -0,0 +1,169 @@
+"""Two-tier read-through cache: an in-process LRU in front of a shared store.
+
+Reads check the local ``TTLCache`` first, then the external backend (Redis,
+or the in-process ``MemoryBackend`` stand-in), and only then run the loader.
+Concurrent misses for one key within a process share a single loader call.
+Writers call ``set`` (write-through) or ``invalidate`` after they commit;
+both tiers of this process are updated immediately, other processes see the
+change in the shared tier at once and in their local tier within its TTL.
+Backend failures are logged and treated as misses, so an outage of the
+shared store degrades to database reads instead of errors.
+"""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Byte-oriented subset of the Redis command set the cache relies on."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class MemoryBackend:
+    """Process-local stand-in for Redis (``GET`` / ``SET PX`` / ``DEL``), for development and tests."""
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self._data: TTLCache[str, bytes] = TTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key)
+
+
+class RedisBackend:
+    """Shared tier on a Redis-compatible server (needs the optional ``redis`` package)."""
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(f"{url.split('://', 1)[0]}:// cache URLs need the 'redis' package") from None
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+
+def backend_from_url(url: str) -> CacheBackend | None:
+    """``""`` disables the shared tier; ``memory://`` and ``redis://``/``rediss://``/``unix://`` select a backend."""
+    if not url:
+        return None
+    scheme = url.split("://", 1)[0]
+    if scheme == "memory":
+        return MemoryBackend()
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported cache URL scheme {scheme!r}")
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Future
+    # Set when the key is invalidated mid-load: waiters still get the result, but it is not stored
+    stale: bool = field(default=False)
+
+
+class TieredCache:
+    """Read-through cache of byte values keyed by string."""
+
+    def __init__(
+        self,
+        local: TTLCache[str, bytes],
+        backend: CacheBackend | None = None,
+        ttl: float = 60.0,
+        namespace: str = "",
+    ) -> None:
+        self.local = local
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self._flights: dict[str, _Flight] = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    async def _backend_call(self, operation: str, *args):
+        try:
+            return await getattr(self.backend, operation)(*args)
+        except Exception:
+            logger.warning("Shared cache %s failed; falling back", operation, exc_info=True)
+            return None
+
+    async def get(self, key: str) -> bytes | None:
+        value = self.local.get(key)
+        if value is not None or self.backend is None:
+            return value
+        value = await self._backend_call("get", self.namespace + key)
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Write-through: replace ``key`` in both tiers."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.stale = True
+        self.local.set(key, value)
+        if self.backend is not None:
+            await self._backend_call("set", self.namespace + key, value, self.ttl)
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.stale = True
+            self.local.pop(key)
+        if self.backend is not None and keys:
+            await self._backend_call("delete", *(self.namespace + key for key in keys))
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[bytes | None]]) -> bytes | None:
+        """Cached value for ``key``, loading (and storing) it on a miss; ``None`` results are not cached.
+
+        The loader runs in its own task so a cancelled caller does not abort
+        the load for the others waiting on it; it must therefore not borrow
+        the caller's database session.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(flight.task)
+        flight = _Flight(asyncio.ensure_future(loader()))
+        self._flights[key] = flight
+        self.loads += 1
+        try:
+            value = await asyncio.shield(flight.task)
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if value is not None and not flight.stale:
+            await self.set(key, value)
+        return value
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        return {"local": self.local.stats(), "loads": self.loads, "coalesced": self.coalesced}
@@ -0,0 +1,135 @@
+"""Indexable skip list: a sorted set with O(log n) insert, remove, rank and slicing by rank.
+
+Every forward link also stores how many bottom-level nodes it skips, so the
+rank of a key is the sum of the spans walked to reach it, and the element at
+rank ``i`` is found by walking spans down to ``i``, the same way Redis
+implements sorted sets.
+"""
+import random
+from collections.abc import Iterable
+from typing import Any
+
+MAX_LEVEL = 32
+# Probability that a node also appears on the next level up
+P = 0.25
+
+
+class _Node:
+    __slots__ = ("key", "forward", "span")
+
+    def __init__(self, key: Any, level: int) -> None:
+        self.key = key
+        self.forward: list[_Node | None] = [None] * level
+        self.span: list[int] = [0] * level
+
+
+class SkipList:
+    """Keys kept in ascending order; keys must be unique and mutually comparable."""
+
+    def __init__(self, keys: Iterable[Any] = (), seed: int | None = None) -> None:
+        self._random = random.Random(seed)
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._length = 0
+        for key in keys:
+            self.insert(key)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        node = self._head.forward[0]
+        while node is not None:
+            yield node.key
+            node = node.forward[0]
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < P:
+            level += 1
+        return level
+
+    def insert(self, key: Any) -> None:
+        update: list[_Node] = [self._head] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            rank[i] = rank[i + 1] if i + 1 < self._level else 0
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = self._length
+            self._level = level
+        new = _Node(key, level)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._length += 1
+
+    def remove(self, key: Any) -> bool:
+        """Remove ``key``; returns whether it was present."""
+        update: list[_Node] = [self._head] * MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+        target = node.forward[0]
+        if target is None or target.key != key:
+            return False
+        for i in range(self._level):
+            if update[i].forward[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].forward[i] = target.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        self._length -= 1
+        return True
+
+    def rank(self, key: Any) -> int | None:
+        """0-based position of ``key``, or ``None`` if absent."""
+        rank = 0
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                rank += node.span[i]
+                node = node.forward[i]
+            if node is not self._head and node.key == key:
+                return rank - 1
+        return None
+
+    def _node_at(self, index: int) -> _Node | None:
+        traversed = 0
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and traversed + node.span[i] <= index + 1:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == index + 1:
+                return node
+        return None
+
+    def slice(self, start: int, stop: int) -> list[Any]:
+        """Keys at positions ``start`` (inclusive) to ``stop`` (exclusive)."""
+        start = max(start, 0)
+        stop = min(stop, self._length)
+        if start >= stop:
+            return []
+        node = self._node_at(start)
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.forward[0]
+        return keys
@@ -0,0 +1,19 @@
+"""Dialect helpers for statements SQLAlchemy Core can't express portably."""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.schema import Table
+from sqlmodel import Session
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, table: Table | type):
+    """Return an INSERT for the session's dialect that supports ``on_conflict_*``."""
+    name = db.get_bind().dialect.name
+    try:
+        insert = _INSERTS[name]
+    except KeyError:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {name}") from None
+    return insert(table)
@@ -0,0 +1,192 @@
+"""Seeded dataset for benchmarks: users, friend graph, requests, badges, items and coins.
+
+The schema comes from the Alembic migrations, so PostgreSQL gets the same
+indexes as production. The same ``--seed`` always produces the same rows.
+Users are ``bench|0`` .. ``bench|N-1`` (see ``benchmarks.stubs`` for tokens).
+
+    cd backend && python -m benchmarks.dataset --users 5000 --friends 30
+    DATABASE_URL=postgresql://localhost/skrawli_bench python -m benchmarks.dataset --reset
+"""
+import argparse
+import os
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.stubs import BENCH_DIR, LocalAuth
+
+for _name, _value in LocalAuth().env().items():
+    os.environ.setdefault(_name, _value)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(BENCH_DIR) / 'bench.db'}")
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import func, insert, text  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.database import get_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Badge,
+    CoinTransaction,
+    FriendRequest,
+    Friendship,
+    OwnedItem,
+    User,
+    UserBadge,
+)
+from app.services.badges import seed_default_badges  # noqa: E402
+from app.services.shop import SHOP_PRICES  # noqa: E402
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+SUB_PREFIX = "bench|"
+BACKGROUNDS = ("bg-skrawl-purple", "bg-skrawl-orange", "bg-skrawl-magenta", "bg-skrawl-cyan")
+WORDS = ("brush", "doodle", "ink", "sketch", "swirl", "pixel", "neon", "pastel", "comet", "maple")
+# Fixed so two runs with the same seed write identical rows
+EPOCH = datetime(2026, 1, 1)
+
+
+@dataclass
+class DatasetSummary:
+    users: int
+    friendships: int
+    friend_requests: int
+    user_badges: int
+    owned_items: int
+    seed: int
+
+
+def bench_sub(index: int) -> str:
+    return f"{SUB_PREFIX}{index}"
+
+
+def migrate(reset: bool = False) -> None:
+    """Bring the schema to head, dropping every table first when ``reset``."""
+    if reset:
+        SQLModel.metadata.drop_all(get_engine())
+        with get_engine().begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    command.upgrade(Config(str(ALEMBIC_INI)), "head")
+
+
+def _friend_pairs(rng: random.Random, users: int, degree: int) -> set[tuple[int, int]]:
+    target = min(users * degree // 2, users * (users - 1) // 2)
+    pairs: set[tuple[int, int]] = set()
+    while len(pairs) < target:
+        a, b = rng.randrange(users), rng.randrange(users)
+        if a != b:
+            pairs.add((min(a, b), max(a, b)))
+    return pairs
+
+
+def generate(
+    users: int = 1000,
+    friends: int = 20,
+    requests: int = 3,
+    badges: int = 3,
+    items: int = 3,
+    seed: int = 42,
+) -> DatasetSummary:
+    """Insert the dataset into an empty, migrated database.
+
+    ``friends``, ``requests``, ``badges`` and ``items`` are per-user averages
+    (pending inbound requests, earned badges, owned shop items).
+    """
+    rng = random.Random(seed)
+    seed_default_badges()
+    item_ids = sorted(SHOP_PRICES)
+    with Session(get_engine()) as session:
+        if session.exec(select(func.count()).select_from(User)).one():
+            raise SystemExit("Database already has users; pass --reset to start over")
+        badge_ids = sorted(session.exec(select(Badge.id)).all())
+
+        user_rows = []
+        for i in range(users):
+            words = rng.sample(WORDS, 2)
+            user_rows.append(
+                {
+                    "auth0_sub": bench_sub(i),
+                    "display_name": f"{words[0].title()} {words[1]} {i}",
+                    "bio": f"Likes {words[0]}s and {rng.choice(WORDS)}s" if rng.random() < 0.7 else None,
+                    "picture_url": f"https://example.invalid/avatars/{i}.png",
+                    "profile_background": rng.choice(BACKGROUNDS),
+                    "coins": 0,
+                }
+            )
+        session.execute(insert(User), user_rows)
+        ids = dict(session.execute(select(User.auth0_sub, User.id).where(User.auth0_sub.startswith(SUB_PREFIX))).all())
+        user_ids = [ids[bench_sub(i)] for i in range(users)]
+
+        pairs = _friend_pairs(rng, users, friends)
+        friendship_rows = []
+        for a, b in sorted(pairs):
+            at = EPOCH + timedelta(minutes=rng.randrange(500_000))
+            friendship_rows.append({"user_id": user_ids[a], "friend_id": user_ids[b], "created_at": at})
+            friendship_rows.append({"user_id": user_ids[b], "friend_id": user_ids[a], "created_at": at})
+        if friendship_rows:
+            session.execute(insert(Friendship), friendship_rows)
+
+        request_pairs: set[tuple[int, int]] = set()
+        for _ in range(users * requests if users > 1 else 0):
+            a, b = rng.randrange(users), rng.randrange(users)
+            if a != b and (min(a, b), max(a, b)) not in pairs and (b, a) not in request_pairs:
+                request_pairs.add((a, b))
+        request_rows = [
+            {
+                "requester_id": user_ids[a],
+                "receiver_id": user_ids[b],
+                "status": "pending",
+                "created_at": EPOCH + timedelta(minutes=rng.randrange(500_000)),
+            }
+            for a, b in sorted(request_pairs)
+        ]
+        if request_rows:
+            session.execute(insert(FriendRequest), request_rows)
+
+        badge_rows, item_rows, coin_rows = [], [], []
+        for user_id in user_ids:
+            for badge_id in rng.sample(badge_ids, min(len(badge_ids), rng.randint(0, 2 * badges))):
+                earned = EPOCH + timedelta(minutes=rng.randrange(500_000))
+                badge_rows.append({"user_id": user_id, "badge_id": badge_id, "earned_at": earned})
+            for item_id in rng.sample(item_ids, min(len(item_ids), rng.randint(0, 2 * items))):
+                item_rows.append({"user_id": user_id, "item_id": item_id, "created_at": EPOCH})
+            coin_rows.append({"user_id": user_id, "amount": rng.randrange(0, 2000), "reason": "seed"})
+        for model, rows in ((UserBadge, badge_rows), (OwnedItem, item_rows), (CoinTransaction, coin_rows)):
+            if rows:
+                session.execute(insert(model), rows)
+        # Balances equal the ledger, so coin reconciliation stays quiet
+        session.execute(
+            text(
+                "UPDATE users SET coins = (SELECT COALESCE(SUM(amount), 0) FROM coin_transactions"
+                " WHERE coin_transactions.user_id = users.id)"
+            )
+        )
+        session.commit()
+    return DatasetSummary(
+        users=users,
+        friendships=len(pairs),
+        friend_requests=len(request_rows),
+        user_badges=len(badge_rows),
+        owned_items=len(item_rows),
+        seed=seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--friends", type=int, default=20, help="average friends per user")
+    parser.add_argument("--requests", type=int, default=3, help="average pending inbound requests per user")
+    parser.add_argument("--badges", type=int, default=3, help="average badges per user")
+    parser.add_argument("--items", type=int, default=3, help="average owned items per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop every table before migrating")
+    args = parser.parse_args()
+
+    migrate(reset=args.reset)
+    summary = generate(args.users, args.friends, args.requests, args.badges, args.items, args.seed)
+    print(f"{get_engine().url.render_as_string(hide_password=True)}: {asdict(summary)}")
+
+
+if __name__ == "__main__":
+    main()
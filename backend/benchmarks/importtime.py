@@ -0,0 +1,115 @@
+"""Worker start-up cost: ``import app.main`` and time to the first ready response.
+
+Each run is a fresh interpreter with ``python -X importtime``: the import is
+broken down by module, then the lifespan is started and ``/healthz`` and
+``/readyz`` are polled in-process, which measures how soon a new worker can
+take traffic. Medians over ``--runs`` are printed.
+
+    cd backend && python -m benchmarks.importtime --runs 7 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.stubs import BENCH_DIR, LocalAuth
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; prints one JSON line with the timings
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def probe():
+    import httpx
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        lifespan = time.perf_counter()
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            assert (await client.get("/healthz")).status_code == 200
+            healthy = time.perf_counter()
+            while (await client.get("/readyz")).status_code != 200:
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter()
+    return lifespan, healthy, ready
+
+lifespan, healthy, ready = asyncio.run(probe())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (lifespan - started) * 1000,
+    "healthz_ms": (healthy - started) * 1000,
+    "readyz_ms": (ready - started) * 1000,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, int]]:
+    """``(depth, module, cumulative us)`` for each line of ``-X importtime`` output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        # Module names are indented two spaces per nesting level after one separator space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative)))
+    return entries
+
+
+def run_once(env: dict[str, str]) -> tuple[dict, list[tuple[int, str, int]]]:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(out.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(out.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="slowest modules to list")
+    args = parser.parse_args()
+
+    env = {**os.environ, **LocalAuth().env()}
+    env.setdefault("DATABASE_URL", f"sqlite:///{Path(BENCH_DIR) / 'importtime.db'}")
+    env.setdefault("COIN_RECONCILE_INTERVAL", "0")
+    # One untimed run warms the filesystem cache and creates the bytecode
+    run_once(env)
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"median of {args.runs} fresh interpreters")
+    for key in ("import_ms", "lifespan_ms", "healthz_ms", "readyz_ms"):
+        print(f"  {key:<12} {statistics.median(r[0][key] for r in runs):8.1f}")
+
+    top_level: dict[str, list[int]] = defaultdict(list)
+    app_modules: dict[str, list[int]] = defaultdict(list)
+    for _, entries in runs:
+        for depth, name, us in entries:
+            if depth == 0:
+                top_level[name].append(us)
+            if name.startswith("app."):
+                app_modules[name].append(us)
+    print("\nslowest imports made directly by the start-up code (cumulative ms)")
+    for name, values in sorted(top_level.items(), key=lambda item: -statistics.median(item[1]))[: args.top]:
+        print(f"  {statistics.median(values) / 1000:8.1f}  {name}")
+    print("\napp modules (cumulative ms, including what they import first)")
+    for name, values in sorted(app_modules.items(), key=lambda item: -statistics.median(item[1])):
+        print(f"  {statistics.median(values) / 1000:8.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
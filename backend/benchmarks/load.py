@@ -0,0 +1,343 @@
+"""Asyncio load driver replaying the frontend's API call mix.
+
+Each virtual user signs in as one seeded ``bench|N`` user (tokens from
+``benchmarks.stubs``) and loops over weighted calls modelled on
+``frontend/src/lib/api.ts`` until ``--duration`` runs out. By default the app
+runs in this process through ``httpx.ASGITransport`` against a fresh dataset
+in ``DATABASE_URL`` (a SQLite file in ``BENCH_DIR`` unless set); ``--url``
+drives a running server instead, which must share the stub settings
+(``eval "$(python -m benchmarks.stubs)"``) and an already seeded database.
+
+Per endpoint it reports throughput, p50/p95/p99 latency and SQL statements
+per request (read from the ``Server-Timing`` header). ``--save`` writes the
+report as JSON; ``--compare`` diffs a run against such a file and exits 1 when
+an endpoint runs more queries or its p95 grows past ``--tolerance``.
+
+    cd backend && python -m benchmarks.load --duration 20 --save benchmarks/baseline.json
+    python -m benchmarks.load --duration 20 --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import httpx
+
+# Imported first: it points the app's settings at the stubs before app modules load
+from benchmarks.dataset import bench_sub, generate, migrate
+from benchmarks.stubs import LocalAuth
+from app.database import DATABASE_ASYNC, get_engine
+from app.services.trace_eval.codec import CONTENT_TYPE, encode_stroke
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+STROKE_SHAPE = {"id": "circle", "type": "circle", "center": {"x": 200, "y": 200}, "radius": 80}
+
+
+@dataclass
+class VirtualUser:
+    index: int
+    headers: dict[str, str]
+    user_id: int = 0
+    # Users whose public pages this one visits: seeded users met at warm-up and its friends
+    others: list[int] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class Call:
+    label: str
+    weight: int
+    build: Callable[[VirtualUser, random.Random], dict]
+
+
+def _other(vu: VirtualUser, rng: random.Random) -> int:
+    return rng.choice(vu.others) if vu.others else vu.user_id
+
+
+def _run_payload(vu: VirtualUser, rng: random.Random) -> dict:
+    minigames = [
+        {"minigame": rng.choice(("trace", "color", "memory")), "success": rng.random() < 0.8, "reward": 5,
+         "time_remaining": round(rng.uniform(0, 10), 2)}
+        for _ in range(rng.randint(3, 8))
+    ]
+    return {"run_id": uuid.UUID(int=rng.getrandbits(128)).hex, "minigames": minigames, "lives_remaining": 1}
+
+
+def _stroke(rng: random.Random) -> bytes:
+    points = [
+        (200 + 80 * math.cos(t / 32 * math.tau) + rng.uniform(-4, 4),
+         200 + 80 * math.sin(t / 32 * math.tau) + rng.uniform(-4, 4))
+        for t in range(33)
+    ]
+    return encode_stroke(points, meta={"shape": STROKE_SHAPE})
+
+
+# Weights approximate a session: start-up reads, browsing friends, playing runs
+CALL_MIX = (
+    Call("GET /users/me/bootstrap", 10, lambda vu, rng: {"method": "GET", "url": "/users/me/bootstrap"}),
+    Call("GET /users/me/profile", 6, lambda vu, rng: {"method": "GET", "url": "/users/me/profile"}),
+    Call("GET /users/me/coins", 6, lambda vu, rng: {"method": "GET", "url": "/users/me/coins"}),
+    Call("GET /users/me/owned-items", 3, lambda vu, rng: {"method": "GET", "url": "/users/me/owned-items"}),
+    Call("GET /badges", 3, lambda vu, rng: {"method": "GET", "url": "/badges"}),
+    Call("GET /users/me/badges", 4, lambda vu, rng: {"method": "GET", "url": "/users/me/badges"}),
+    Call(
+        "GET /users/{user_id}/profile", 10,
+        lambda vu, rng: {"method": "GET", "url": f"/users/{_other(vu, rng)}/profile"},
+    ),
+    Call(
+        "GET /users/{user_id}/badges", 6,
+        lambda vu, rng: {"method": "GET", "url": f"/users/{_other(vu, rng)}/badges"},
+    ),
+    Call("GET /users/me/friends", 8, lambda vu, rng: {"method": "GET", "url": "/users/me/friends"}),
+    Call("GET /users/me/friends/requests", 5, lambda vu, rng: {"method": "GET", "url": "/users/me/friends/requests"}),
+    Call(
+        "GET /users/me/friends/suggestions", 3,
+        lambda vu, rng: {"method": "GET", "url": "/users/me/friends/suggestions", "params": {"limit": 10}},
+    ),
+    Call(
+        "GET /users/{user_id}/friends/mutual", 3,
+        lambda vu, rng: {"method": "GET", "url": f"/users/{_other(vu, rng)}/friends/mutual"},
+    ),
+    Call(
+        "GET /users/browse", 5,
+        lambda vu, rng: {
+            "method": "GET", "url": "/users/browse",
+            "params": {"query": rng.choice(("ink", "neon", "Comet")), "limit": 24},
+        },
+    ),
+    Call(
+        "GET /leaderboards/{metric}", 4,
+        lambda vu, rng: {
+            "method": "GET", "url": f"/leaderboards/{rng.choice(('coins', 'longest_run'))}",
+            "params": {"scope": rng.choice(("global", "global", "weekly", "friends"))},
+        },
+    ),
+    Call(
+        "POST /users/me/runs", 4,
+        lambda vu, rng: {"method": "POST", "url": "/users/me/runs", "json": _run_payload(vu, rng)},
+    ),
+    Call(
+        "POST /traces/validate/stroke", 6,
+        lambda vu, rng: {
+            "method": "POST", "url": "/traces/validate/stroke",
+            "content": _stroke(rng), "headers": {"Content-Type": CONTENT_TYPE},
+        },
+    ),
+    Call(
+        "PUT /users/me/profile", 2,
+        lambda vu, rng: {
+            "method": "PUT", "url": "/users/me/profile", "json": {"bio": f"Bench bio {rng.randrange(1000)}"},
+        },
+    ),
+    Call(
+        "POST /users/me/purchases", 1,
+        lambda vu, rng: {
+            "method": "POST", "url": "/users/me/purchases", "json": {"item_ids": ["default-brush", "splotch"]},
+        },
+    ),
+)
+
+
+@dataclass
+class Sample:
+    seconds: float
+    status: int
+    queries: int | None
+
+
+def _queries(response: httpx.Response) -> int | None:
+    match = _QUERIES.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+
+async def _warm_up(client: httpx.AsyncClient, vus: list[VirtualUser]) -> None:
+    """Learn each virtual user's id and friends (also signs them in once)."""
+    for vu in vus:
+        response = await client.get("/users/me/profile", headers=vu.headers)
+        response.raise_for_status()
+        vu.user_id = response.json()["id"]
+    ids = [vu.user_id for vu in vus]
+    for vu in vus:
+        response = await client.get("/users/me/friends", headers=vu.headers)
+        response.raise_for_status()
+        vu.others = [u for u in ids if u != vu.user_id] + [friend["id"] for friend in response.json()]
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    vu: VirtualUser,
+    rng: random.Random,
+    deadline: float,
+    samples: dict[str, list[Sample]],
+) -> None:
+    weights = [call.weight for call in CALL_MIX]
+    while time.perf_counter() < deadline:
+        call = rng.choices(CALL_MIX, weights)[0]
+        request = call.build(vu, rng)
+        headers = {**vu.headers, **request.pop("headers", {})}
+        started = time.perf_counter()
+        try:
+            response = await client.request(headers=headers, **request)
+            status = response.status_code
+            queries = _queries(response)
+        except httpx.HTTPError:
+            status, queries = 0, None
+        samples[call.label].append(Sample(time.perf_counter() - started, status, queries))
+
+
+def _percentiles(seconds: list[float]) -> tuple[float, float, float]:
+    if len(seconds) == 1:
+        return (seconds[0],) * 3
+    cuts = statistics.quantiles(seconds, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def _summarize(samples: list[Sample], elapsed: float) -> dict:
+    seconds = [s.seconds for s in samples]
+    p50, p95, p99 = _percentiles(seconds)
+    queries = [s.queries for s in samples if s.queries is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not 200 <= s.status < 400),
+        "rps": round(len(samples) / elapsed, 2),
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "queries": round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    meta: dict = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "target": args.url or "in-process",
+        "database": get_engine().url.get_backend_name(),
+        "database_async": DATABASE_ASYNC,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "seed": args.seed,
+    }
+    if args.url is None or args.fresh:
+        migrate(reset=True)
+        meta["dataset"] = asdict(generate(users=args.users, friends=args.friends, seed=args.seed))
+    if args.url is None:
+        from app.main import app
+
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+    else:
+        transport, base_url = httpx.AsyncHTTPTransport(), args.url
+
+    auth = LocalAuth()
+    rng = random.Random(args.seed)
+    picked = rng.sample(range(args.users), min(args.concurrency, args.users))
+    vus = [
+        VirtualUser(index=i, headers={"Authorization": f"Bearer {auth.token(bench_sub(i))}"})
+        for i in picked
+    ]
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=30) as client:
+        await _warm_up(client, vus)
+        if args.warmup:
+            warm_deadline = time.perf_counter() + args.warmup
+            discarded: dict[str, list[Sample]] = defaultdict(list)
+            await asyncio.gather(
+                *(_drive(client, vu, random.Random(args.seed + vu.index), warm_deadline, discarded) for vu in vus)
+            )
+        samples: dict[str, list[Sample]] = defaultdict(list)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(_drive(client, vu, random.Random(args.seed * 7919 + vu.index), deadline, samples) for vu in vus)
+        )
+        elapsed = time.perf_counter() - started
+
+    endpoints = {label: _summarize(samples[label], elapsed) for label in sorted(samples)}
+    total = _summarize([s for label in samples for s in samples[label]], elapsed)
+    return {"meta": meta, "endpoints": endpoints, "total": total}
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'endpoint':<38} {'reqs':>6} {'err':>4} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7}"
+    )
+    rows = [*report["endpoints"].items(), ("TOTAL", report["total"])]
+    for label, s in rows:
+        queries = "-" if s["queries"] is None else f"{s['queries']:.1f}"
+        print(
+            f"{label:<38} {s['requests']:>6} {s['errors']:>4} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {queries:>7}"
+        )
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the change per endpoint and return the regressed endpoints."""
+    regressions = []
+    print(f"\nvs. baseline {baseline['meta'].get('commit') or '?'} (p95 tolerance {tolerance:.0%})")
+    print(f"{'endpoint':<38} {'p95 ms':>17} {'change':>8} {'queries':>13}")
+    for label, s in report["endpoints"].items():
+        base = baseline["endpoints"].get(label)
+        if base is None:
+            print(f"{label:<38} {'(new)':>17}")
+            continue
+        change = s["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        more_queries = s["queries"] is not None and base["queries"] is not None and s["queries"] > base["queries"] + 0.5
+        slower = change > tolerance
+        flag = "  <-- regression" if slower or more_queries else ""
+        if flag:
+            regressions.append(label)
+        print(
+            f"{label:<38} {base['p95_ms']:>8.2f}->{s['p95_ms']:<8.2f} {change:>+7.0%} "
+            f"{base['queries'] or 0:>5.1f}->{s['queries'] or 0:<5.1f}{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--fresh", action="store_true", help="with --url: reseed DATABASE_URL before the run")
+    parser.add_argument("--users", type=int, default=1000, help="seeded users (sign-ins are picked from these)")
+    parser.add_argument("--friends", type=int, default=20, help="average friends per seeded user")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=15, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="write the report to this JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth before flagging")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Compare the model/response_model path with the row + orjson fast path.
+
+Builds an in-memory SQLite database with one user who has ``--friends``
+friends and as many pending friend requests, then times both ways of
+producing the ``/users/me/friends``, ``/users/browse`` and
+``/users/me/friends/requests`` bodies, checking that they are byte-identical.
+
+    cd backend && python -m benchmarks.serializers --friends 5000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("AUTH0_DOMAIN", "bench.invalid")
+os.environ.setdefault("AUTH0_AUDIENCE", "bench")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from app.models import FriendRequest, Friendship, User  # noqa: E402
+from app.routers.friends import (  # noqa: E402
+    FRIEND_REQUEST,
+    REQUEST_COLUMNS,
+    SUMMARY_COLUMNS,
+    USER_SUMMARY,
+    FriendRequestsList,
+    UserSummary,
+    serialize_request,
+    summarize_user,
+)
+from app.utils.fastjson import FastJSONResponse  # noqa: E402
+
+_summaries = TypeAdapter(list[UserSummary])
+_requests = TypeAdapter(FriendRequestsList)
+
+
+def seed(session: Session, friends: int) -> int:
+    me = User(auth0_sub="bench|me", display_name="Me")
+    session.add(me)
+    session.flush()
+    start = datetime(2026, 1, 1)
+    others = [
+        User(
+            auth0_sub=f"bench|{i}",
+            display_name=f"Player {i}" if i % 7 else "  ",
+            bio=f"Bio for player {i} – ünïcödé" if i % 3 else None,
+            picture_url=f"https://example.invalid/{i}.png",
+            showcased_badges="FIRST_STEPS,PERFECT_10" if i % 5 == 0 else None,
+        )
+        for i in range(friends)
+    ]
+    session.add_all(others)
+    session.flush()
+    for i, other in enumerate(others):
+        session.add(Friendship(user_id=me.id, friend_id=other.id, created_at=start))
+        session.add(
+            FriendRequest(
+                requester_id=other.id,
+                receiver_id=me.id,
+                status="pending",
+                created_at=start + timedelta(seconds=i, microseconds=i % 2),
+            )
+        )
+    session.commit()
+    return me.id
+
+
+def _friends_query(user_id: int, columns=None):
+    return (
+        (select(*columns) if columns else select(User))
+        .join(Friendship, Friendship.friend_id == User.id)
+        .where(Friendship.user_id == user_id)
+        .order_by(Friendship.friend_id)
+    )
+
+
+def _browse_query(user_id: int, columns=None):
+    return (select(*columns) if columns else select(User)).where(User.id != user_id).order_by(User.id.desc())
+
+
+def _requests_query(user_id: int, columns=None):
+    return (
+        (select(*columns) if columns else select(FriendRequest))
+        .where(FriendRequest.receiver_id == user_id, FriendRequest.status == "pending")
+        .order_by(FriendRequest.created_at, FriendRequest.id)
+    )
+
+
+def model_users(session: Session, stmt) -> bytes:
+    # What FastAPI does with response_model=list[UserSummary]: build, validate again, dump
+    session.expunge_all()
+    models = [summarize_user(u) for u in session.exec(stmt).all()]
+    return _summaries.dump_json(_summaries.validate_python(models))
+
+
+def fast_users(session: Session, stmt) -> bytes:
+    return FastJSONResponse(USER_SUMMARY.many(session.exec(stmt).all())).body
+
+
+def model_requests(session: Session, stmt) -> bytes:
+    session.expunge_all()
+    inbound = [serialize_request(fr) for fr in session.exec(stmt).all()]
+    payload = FriendRequestsList(inbound=inbound, outbound=[])
+    return _requests.dump_json(_requests.validate_python(payload))
+
+
+def fast_requests(session: Session, stmt) -> bytes:
+    content = {
+        "inbound": FRIEND_REQUEST.many(session.exec(stmt).all()),
+        "outbound": [],
+        "inbound_next_cursor": None,
+        "outbound_next_cursor": None,
+    }
+    return FastJSONResponse(content).body
+
+
+def timed(fn, session: Session, stmt, repeat: int) -> tuple[float, bytes]:
+    samples = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(session, stmt)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--friends", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user_id = seed(session, args.friends)
+        cases = [
+            ("friends", model_users, _friends_query(user_id), fast_users, _friends_query(user_id, SUMMARY_COLUMNS)),
+            ("browse", model_users, _browse_query(user_id), fast_users, _browse_query(user_id, SUMMARY_COLUMNS)),
+            (
+                "requests",
+                model_requests,
+                _requests_query(user_id),
+                fast_requests,
+                _requests_query(user_id, REQUEST_COLUMNS),
+            ),
+        ]
+        print(f"{args.friends} rows, median of {args.repeat} runs")
+        print(f"{'endpoint':<10} {'model ms':>10} {'fast ms':>10} {'speedup':>8}  identical")
+        for name, slow_fn, slow_stmt, fast_fn, fast_stmt in cases:
+            slow_ms, slow_body = timed(slow_fn, session, slow_stmt, args.repeat)
+            fast_ms, fast_body = timed(fast_fn, session, fast_stmt, args.repeat)
+            same = slow_body == fast_body
+            print(f"{name:<10} {slow_ms:>10.2f} {fast_ms:>10.2f} {slow_ms / fast_ms:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
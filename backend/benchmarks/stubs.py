@@ -0,0 +1,76 @@
+"""Local stand-in for Auth0: an RSA keypair, its JWKS and token minting.
+
+The key and ``jwks.json`` live in ``BENCH_DIR`` (created on first use) and
+are reused afterwards, so a server started with ``env()`` accepts tokens the
+load driver mints in another process. The app reads the JWKS through its
+regular ``AUTH0_JWKS_FILE`` loader, so no network call is made.
+
+    cd backend && eval "$(python -m benchmarks.stubs)"   # export the settings
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+BENCH_DIR = os.environ.get("BENCH_DIR", os.path.join(tempfile.gettempdir(), "skrawli-bench"))
+BENCH_DOMAIN = "bench.invalid"
+BENCH_AUDIENCE = "skrawli-bench"
+KEY_ID = "bench-key"
+
+
+class LocalAuth:
+    """RSA signing key plus the matching JWKS file."""
+
+    def __init__(self, directory: str = BENCH_DIR) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.jwks_path = self.directory / "jwks.json"
+        key_path = self.directory / "key.pem"
+        if key_path.exists():
+            self.key = serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+        else:
+            self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            key_path.write_bytes(
+                self.key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+        if not self.jwks_path.exists():
+            jwk = json.loads(RSAAlgorithm.to_jwk(self.key.public_key()))
+            jwk.update(kid=KEY_ID, use="sig", alg="RS256")
+            self.jwks_path.write_text(json.dumps({"keys": [jwk]}))
+
+    def env(self) -> dict[str, str]:
+        """Settings that make the app trust this key instead of Auth0."""
+        return {
+            "AUTH0_DOMAIN": BENCH_DOMAIN,
+            "AUTH0_AUDIENCE": BENCH_AUDIENCE,
+            "AUTH0_JWKS_FILE": str(self.jwks_path),
+        }
+
+    def token(self, sub: str, ttl: int = 3600, **claims) -> str:
+        payload = {
+            "sub": sub,
+            "aud": BENCH_AUDIENCE,
+            "iss": f"https://{BENCH_DOMAIN}/",
+            "exp": int(time.time()) + ttl,
+            **claims,
+        }
+        return jwt.encode(payload, self.key, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def main() -> None:
+    for name, value in LocalAuth().env().items():
+        print(f"export {name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Shared fixtures: each test that uses ``client`` starts from empty tables and caches."""
+import tests.helpers  # noqa: F401  (exports the test settings first)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401
+from app.database import get_engine
+from app.services import badges, leaderboards
+from app.services.identity import identity_cache
+from app.services.public_cache import public_cache
+from app.services.search import user_search_index
+
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def database(engine, monkeypatch):
+    """Empty tables and in-process caches for one test."""
+    monkeypatch.setattr(leaderboards, "leaderboard_backend", leaderboards.MemoryLeaderboards())
+    yield engine
+    with engine.begin() as conn:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            conn.execute(table.delete())
+    identity_cache.clear()
+    public_cache.local.clear()
+    user_search_index.clear()
+    badges._mark_checked(float("-inf"))
+
+
+@pytest.fixture
+def client(database):
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
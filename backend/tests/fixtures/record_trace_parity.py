@@ -0,0 +1,135 @@
+"""Record the frontend's ``evaluateTrace`` verdicts for ``test_trace_parity.py``.
+
+The function is taken straight from ``TraceCanvas.tsx`` (type annotations
+stripped) and run under Node on a seeded set of strokes, so the fixture
+reflects the shipped frontend rather than a hand copy. Re-record after
+changing either evaluator's rules:
+
+    cd backend && python tests/fixtures/record_trace_parity.py
+"""
+import json
+import math
+import random
+import re
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+TRACE_CANVAS = HERE.parents[2] / "frontend" / "src" / "Components" / "TraceCanvas.tsx"
+FIXTURE = HERE / "trace_parity.json"
+
+CASES = 600
+SEED = 20240611
+
+# Type-only syntax used inside evaluateTrace
+_TS_SYNTAX = [
+    (re.compile(r"^export function evaluateTrace\(.*\): boolean \{", re.M), "function evaluateTrace(userPts, shape, threshold) {"),
+    (re.compile(r" as (Polygon|Circle|Ellipse)Shape\b"), ""),
+    (re.compile(r"new Set<\w+>\(\)"), "new Set()"),
+]
+
+
+def extract_evaluate_trace() -> str:
+    source = TRACE_CANVAS.read_text(encoding="utf-8")
+    start = source.index("export function evaluateTrace(")
+    end = source.index("\n}\n", start) + 3
+    body = source[start:end]
+    for pattern, replacement in _TS_SYNTAX:
+        body = pattern.sub(replacement, body)
+    return body
+
+
+def _point(x: float, y: float) -> dict:
+    return {"x": round(x, 2), "y": round(y, 2)}
+
+
+def _ring(shape_id: str, vertices: int, radius: float, cx: float, cy: float, wobble: float) -> dict:
+    points = []
+    for k in range(vertices):
+        angle = k * math.tau / vertices
+        r = radius + wobble * math.sin(7 * angle)
+        points.append(_point(cx + r * math.cos(angle), cy + r * math.sin(angle)))
+    return {"id": shape_id, "type": "polygon", "points": points + [points[0]], "reward": 10}
+
+
+# Shapes the minigames generate (fewer than 16 segments: the dense path) plus
+# many-segment outlines that go through the grid index
+SHAPES = [
+    {"id": "angledLine", "type": "polygon", "points": [_point(120, 340), _point(430, 150)], "reward": 5},
+    {"id": "horizontalLine", "type": "polygon", "points": [_point(60, 200), _point(760, 200)], "reward": 5},
+    {"id": "squareDrawing-side1-4", "type": "polygon", "points": [_point(300, 100), _point(300, 280)], "reward": 5},
+    {"id": "connectDots-7", "type": "polygon", "points": [_point(150, 150), _point(330, 260)], "reward": 8},
+    {"id": "square", "type": "polygon", "points": [_point(50, 50), _point(150, 50), _point(150, 150), _point(50, 150), _point(50, 50)], "reward": 15},
+    {"id": "triangle1", "type": "polygon", "points": [_point(100, 50), _point(150, 150), _point(50, 150), _point(100, 50)], "reward": 10},
+    {"id": "circle", "type": "circle", "center": _point(250, 200), "radius": 75, "reward": 20},
+    {"id": "ellipsePlanes-ellipse-2", "type": "ellipse", "center": _point(300, 200), "radiusX": 120, "radiusY": 60, "rotation": 0.4, "reward": 20},
+    _ring("squareDrawing-free", 200, 120, 300, 250, 15),
+    _ring("blob", 400, 150, 320, 260, 30),
+    _ring("squareDense", 64, 80, 200, 200, 0),
+    # Duplicated vertices and zero-length segments: nearest-segment ties
+    {
+        "id": "zigzag",
+        "type": "polygon",
+        "points": [_point(100 + 10 * i, 100 + (i % 2) * 10) for i in range(40)] + [_point(490, 100), _point(490, 100)],
+        "reward": 5,
+    },
+]
+
+
+def _trace(shape: dict, rng: random.Random) -> list[list[float]]:
+    """A stroke along part of ``shape`` with Gaussian noise and sometimes an overshoot."""
+    fraction = rng.uniform(0.2, 1.0)
+    noise = rng.choice([0, 1, 3, 6, 10, 20])
+    count = rng.choice([5, rng.randint(10, 150)])
+    pts = []
+    if shape["type"] == "polygon":
+        vertices = [(p["x"], p["y"]) for p in shape["points"]]
+        segments = list(zip(vertices, vertices[1:]))
+        for k in range(count):
+            t = k / (count - 1) * fraction * len(segments)
+            i = min(int(t), len(segments) - 1)
+            (x1, y1), (x2, y2) = segments[i]
+            u = t - i
+            pts.append((x1 + (x2 - x1) * u, y1 + (y2 - y1) * u))
+        if rng.random() < 0.3:
+            (x1, y1), (x2, y2) = segments[-1]
+            overshoot = rng.random()
+            pts.append((x2 + (x2 - x1) * overshoot, y2 + (y2 - y1) * overshoot))
+    else:
+        rx = shape.get("radius", shape.get("radiusX"))
+        ry = shape.get("radius", shape.get("radiusY"))
+        rotation = shape.get("rotation", 0)
+        cx, cy = shape["center"]["x"], shape["center"]["y"]
+        for k in range(count):
+            a = k / (count - 1) * fraction * math.tau
+            x, y = rx * math.cos(a), ry * math.sin(a)
+            pts.append((cx + x * math.cos(rotation) - y * math.sin(rotation), cy + x * math.sin(rotation) + y * math.cos(rotation)))
+    return [[round(x + rng.gauss(0, noise), 2), round(y + rng.gauss(0, noise), 2)] for x, y in pts]
+
+
+def main() -> None:
+    rng = random.Random(SEED)
+    cases = []
+    for _ in range(CASES):
+        shape = rng.choice(SHAPES)
+        threshold = rng.choice([10, 15, 20, 25, 30, 40, 45, 60])
+        cases.append({"shape": shape["id"], "threshold": threshold, "points": _trace(shape, rng)})
+    recorded = {"source": "frontend/src/Components/TraceCanvas.tsx", "seed": SEED, "shapes": SHAPES, "cases": cases}
+
+    script = extract_evaluate_trace() + (
+        "\nconst data = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "\nconst shapes = Object.fromEntries(data.shapes.map((s) => [s.id, s]));"
+        "\nconst verdicts = data.cases.map((c) =>"
+        "\n  evaluateTrace(c.points.map(([x, y]) => ({ x, y })), shapes[c.shape], c.threshold));"
+        "\nprocess.stdout.write(JSON.stringify(verdicts));\n"
+    )
+    out = subprocess.run(["node", "-e", script], input=json.dumps(recorded), capture_output=True, text=True, check=True)
+    for case, verdict in zip(cases, json.loads(out.stdout)):
+        case["expected"] = verdict
+
+    FIXTURE.write_text(json.dumps(recorded, separators=(",", ":")), encoding="utf-8")
+    print(f"wrote {len(cases)} cases ({sum(c['expected'] for c in cases)} passing) to {FIXTURE}")
+
+
+if __name__ == "__main__":
+    main()
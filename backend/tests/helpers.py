@@ -0,0 +1,31 @@
+"""Test settings and helpers, imported by ``conftest.py`` before anything under ``app``.
+
+The app reads a temporary SQLite database and trusts the ``benchmarks.stubs``
+key instead of Auth0.
+"""
+import os
+import re
+import tempfile
+
+from benchmarks.stubs import LocalAuth
+
+TEST_DIR = tempfile.mkdtemp(prefix="skrawli-tests-")
+
+auth = LocalAuth(TEST_DIR)
+os.environ.update(auth.env())
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{TEST_DIR}/test.db",
+    SEED_ON_STARTUP="false",
+)
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def headers(sub: str = "auth0|1", **claims) -> dict[str, str]:
+    """Bearer header for a token the app under test accepts."""
+    return {"Authorization": "Bearer " + auth.token(sub, **claims)}
+
+
+def queries(response) -> int:
+    """SQL statements the request ran, from its ``Server-Timing`` header."""
+    return int(_QUERIES.search(response.headers["server-timing"]).group(1))
@@ -0,0 +1,60 @@
+"""Every worker's badge catalog follows the version stored in the database."""
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from app.services import badges
+from tests.helpers import headers
+
+
+def _edit_elsewhere(engine, code: str, name: str) -> None:
+    # What another worker's PUT /internal/badges/{code} commits, leaving this one's catalog alone
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE badges SET name = :name WHERE code = :code"), {"name": name, "code": code})
+        conn.execute(text("UPDATE catalog_versions SET version = version + 1 WHERE name = 'badges'"))
+
+
+def _names(client) -> list[str]:
+    return [badge["name"] for badge in client.get("/badges").json()]
+
+
+def test_seeding_publishes_a_new_version(client, database):
+    before = asyncio.run(badges.badge_catalog()).version
+    assert badges.seed_default_badges() == len(badges.DEFAULT_BADGES)
+    catalog = asyncio.run(badges.badge_catalog())
+    assert catalog.version == before + 1
+    assert set(catalog.by_code) == {badge["code"] for badge in badges.DEFAULT_BADGES}
+
+
+def test_edit_by_another_worker_is_picked_up_after_the_check_interval(client, database, monkeypatch):
+    badges.seed_default_badges()
+    etag = client.get("/badges").headers["etag"]
+    _edit_elsewhere(database, "SURVIVOR", "Last One Standing")
+
+    assert "Last One Standing" not in _names(client)
+    monkeypatch.setattr(badges, "BADGE_CATALOG_CHECK_INTERVAL", 0)
+    assert "Last One Standing" in _names(client)
+    assert client.get("/badges").headers["etag"] != etag
+
+
+def test_due_check_runs_off_the_event_loop(database, monkeypatch):
+    threads = []
+    stored_version = badges._stored_version
+
+    def record(session):
+        threads.append(threading.get_ident())
+        return stored_version(session)
+
+    monkeypatch.setattr(badges, "_stored_version", record)
+    asyncio.run(badges.badge_catalog())
+    assert threads and threading.get_ident() not in threads
+
+
+def test_rule_badges_cannot_be_self_awarded(client, database):
+    badges.seed_default_badges([*badges.DEFAULT_BADGES, {"code": "ARTIST", "name": "Artist"}])
+    me = headers("auth0|badges")
+    for code in badges.RULE_CODES:
+        assert client.post(f"/users/me/badges/{code}", headers=me).status_code == 403
+    assert client.post("/users/me/badges/ARTIST", headers=me).json() == {"status": "awarded", "code": "ARTIST"}
+    assert [badge["code"] for badge in client.get("/users/me/badges", headers=me).json()] == ["ARTIST"]
@@ -0,0 +1,65 @@
+"""Coin ledger: balance updates, idempotency and reconciliation."""
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.reconcile import reconcile
+from tests.helpers import headers
+
+
+def test_reconcile_reports_balances_that_drifted_from_the_ledger(client, database, caplog):
+    me = headers("auth0|coins")
+    client.post("/users/me/coins/increment", headers=me, json={"amount": 5})
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    assert asyncio.run(reconcile()) == []
+
+    with database.begin() as conn:
+        conn.execute(text("UPDATE users SET coins = 50 WHERE id = :id"), {"id": user_id})
+    with caplog.at_level(logging.WARNING, logger="app.reconcile"):
+        [mismatch] = asyncio.run(reconcile())
+    assert (mismatch.user_id, mismatch.balance, mismatch.ledger_total) == (user_id, 50, 5)
+    assert "mismatch for user" in caplog.text
+
+
+def _ledger(engine, user_id: int) -> list[tuple[int, str]]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT amount, reason FROM coin_transactions WHERE user_id = :id ORDER BY id"), {"id": user_id}
+        )
+        return [tuple(row) for row in rows]
+
+
+def test_increment_with_a_repeated_idempotency_key_applies_once(client, database):
+    me = headers("auth0|coins")
+    body = {"amount": 10, "idempotency_key": "reward:1"}
+    assert client.post("/users/me/coins/increment", headers=me, json=body).json() == {"coins": 10}
+    assert client.post("/users/me/coins/increment", headers=me, json=body).json() == {"coins": 10}
+    assert client.post("/users/me/coins/increment", headers=me, json={"amount": 3}).json() == {"coins": 13}
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    assert _ledger(database, user_id) == [(10, "increment"), (3, "increment")]
+
+
+def test_set_balance_records_the_difference(client, database):
+    me = headers("auth0|coins")
+    client.post("/users/me/coins/increment", headers=me, json={"amount": 40})
+    assert client.put("/users/me/coins", headers=me, json={"coins": 25}).json() == {"coins": 25}
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    assert _ledger(database, user_id) == [(40, "increment"), (-15, "set")]
+    assert asyncio.run(reconcile()) == []
+
+
+def test_purchase_never_overdraws_and_debits_once(client, database):
+    me = headers("auth0|coins")
+    client.post("/users/me/coins/increment", headers=me, json={"amount": 150})
+
+    short = client.post("/users/me/purchases", headers=me, json={"item_ids": ["pixel-brush", "rainbow-brush"]})
+    assert short.status_code == 409
+    assert client.get("/users/me/coins", headers=me).json() == {"coins": 150}
+
+    bought = client.post("/users/me/purchases", headers=me, json={"item_ids": ["pixel-brush"]}).json()
+    assert (bought["purchased"], bought["coins"]) == (["pixel-brush"], 50)
+    again = client.post("/users/me/purchases", headers=me, json={"item_ids": ["pixel-brush"]}).json()
+    assert (again["already_owned"], again["total"], again["coins"]) == (["pixel-brush"], 0, 50)
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    assert _ledger(database, user_id) == [(150, "increment"), (-100, "purchase")]
@@ -0,0 +1,62 @@
+"""Friend list revalidation and mutual-friend paging."""
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from tests.helpers import headers, queries
+
+
+def _sign_up(client, sub: str) -> tuple[dict, int]:
+    me = headers(sub, name=sub.split("|")[-1])
+    return me, client.get("/users/me/profile", headers=me).json()["id"]
+
+
+def _befriend(client, a: tuple[dict, int], b: tuple[dict, int]) -> None:
+    request_id = client.post(f"/users/friends/request/{b[1]}", headers=a[0]).json()["id"]
+    assert client.post(f"/users/friends/request/{request_id}/accept", headers=b[0]).status_code == 200
+
+
+def test_friend_list_revalidates_with_one_primary_key_read(client):
+    alice, bob, carol = (_sign_up(client, f"auth0|{name}") for name in ("alice", "bob", "carol"))
+    _befriend(client, alice, bob)
+
+    first = client.get("/users/me/friends", headers=alice[0])
+    etag = first.headers["etag"]
+    assert [f["id"] for f in first.json()] == [bob[1]]
+    cached = client.get("/users/me/friends", headers={**alice[0], "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert queries(cached) == 1
+
+    # A friend's edit and a new friendship both change the list, so both change the ETag
+    client.put("/users/me/profile", headers=bob[0], json={"bio": "new bio"})
+    edited = client.get("/users/me/friends", headers={**alice[0], "If-None-Match": etag})
+    assert edited.status_code == 200 and edited.json()[0]["bio"] == "new bio"
+    _befriend(client, carol, alice)
+    grown = client.get("/users/me/friends", headers={**alice[0], "If-None-Match": edited.headers["etag"]})
+    assert [f["id"] for f in grown.json()] == [bob[1], carol[1]]
+
+    # Someone who is not a friend editing their profile leaves the list alone
+    stranger = _sign_up(client, "auth0|dave")
+    client.put("/users/me/profile", headers=stranger[0], json={"bio": "hi"})
+    unchanged = client.get("/users/me/friends", headers={**alice[0], "If-None-Match": grown.headers["etag"]})
+    assert unchanged.status_code == 304
+
+    assert client.delete(f"/users/friends/{bob[1]}", headers=alice[0]).status_code == 200
+    shrunk = client.get("/users/me/friends", headers={**alice[0], "If-None-Match": grown.headers["etag"]})
+    assert [f["id"] for f in shrunk.json()] == [carol[1]]
+
+
+def test_mutual_friends_are_paged(client):
+    alice, bob = _sign_up(client, "auth0|alice"), _sign_up(client, "auth0|bob")
+    shared = [_sign_up(client, f"auth0|shared{i}") for i in range(5)]
+    for friend in shared:
+        _befriend(client, alice, friend)
+        _befriend(client, friend, bob)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/users/{bob[1]}/friends/mutual", headers=alice[0], params=params)
+        assert len(page.json()) <= 2
+        seen += [f["id"] for f in page.json()]
+        cursor = page.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert seen == sorted(friend[1] for friend in shared)
@@ -0,0 +1,62 @@
+"""Liveness and readiness probes around the startup warm-up."""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.routers import health
+
+
+def _wait_ready(client, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/readyz")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.02)
+
+
+def test_not_ready_until_the_warm_up_finishes(database, monkeypatch):
+    release = threading.Event()
+    catalog_loads = []
+
+    def slow_catalog_load():
+        release.wait(5)
+        catalog_loads.append(True)
+
+    monkeypatch.setattr(main, "refresh_badge_catalog", slow_catalog_load)
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        starting = client.get("/readyz")
+        assert (starting.status_code, starting.json()) == (503, {"status": "starting"})
+        release.set()
+        assert _wait_ready(client).json() == {"status": "ready"}
+    assert catalog_loads == [True]
+
+
+def test_warm_up_retries_until_the_database_answers(database, monkeypatch):
+    attempts = []
+
+    def flaky_catalog_load():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise ConnectionError("database is starting")
+
+    monkeypatch.setattr(main, "refresh_badge_catalog", flaky_catalog_load)
+    with TestClient(main.app) as client:
+        assert _wait_ready(client).status_code == 200
+    assert len(attempts) == 2
+
+
+def test_unreachable_database_is_not_ready(client, monkeypatch):
+    _wait_ready(client)
+
+    async def unreachable():
+        raise ConnectionError("no route to host")
+
+    monkeypatch.setattr(health, "_ping_database", unreachable)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "database unavailable"
+    assert client.get("/healthz").status_code == 200
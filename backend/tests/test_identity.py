@@ -0,0 +1,47 @@
+"""The cached identity must never hide another worker's write."""
+from sqlalchemy import text
+
+from tests.helpers import headers, queries
+
+
+def _write_elsewhere(engine, sql: str, **params) -> None:
+    # Straight to the database, as another worker would, leaving this one's cache alone
+    with engine.begin() as conn:
+        conn.execute(text(sql), params)
+
+
+def _stored_bio(engine, user_id: int) -> str | None:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT bio FROM users WHERE id = :id"), {"id": user_id}).scalar()
+
+
+def test_profile_update_back_to_a_cached_value_is_applied(client, database):
+    me = headers("auth0|ident", name="Ada")
+    user_id = client.put("/users/me/profile", headers=me, json={"bio": "first"}).json()["id"]
+    _write_elsewhere(database, "UPDATE users SET bio = 'second' WHERE id = :id", id=user_id)
+
+    assert client.put("/users/me/profile", headers=me, json={"bio": "first"}).json()["bio"] == "first"
+    assert _stored_bio(database, user_id) == "first"
+
+
+def test_single_field_update_back_to_a_cached_value_is_applied(client, database):
+    me = headers("auth0|ident", name="Ada")
+    client.put("/users/me/bio", headers=me, json={"bio": "first"})
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    _write_elsewhere(database, "UPDATE users SET bio = 'second' WHERE id = :id", id=user_id)
+
+    client.put("/users/me/bio", headers=me, json={"bio": "first"})
+    assert _stored_bio(database, user_id) == "first"
+
+
+def test_balance_is_read_fresh_in_one_bootstrap_query(client, database):
+    me = headers("auth0|ident")
+    client.post("/users/me/coins/increment", headers=me, json={"amount": 7})
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    _write_elsewhere(database, "UPDATE users SET coins = coins + 100 WHERE id = :id", id=user_id)
+
+    assert client.get("/users/me/coins", headers=me).json() == {"coins": 107}
+    response = client.get("/users/me/bootstrap", headers=me)
+    assert response.json()["coins"] == 107
+    assert response.json()["owned_items"] == []
+    assert queries(response) == 1
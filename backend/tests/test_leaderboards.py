@@ -0,0 +1,44 @@
+"""In-process leaderboard boards."""
+import asyncio
+
+from app.services.leaderboards import MemoryLeaderboards
+
+
+def test_updates_during_a_rebuild_are_kept():
+    boards = MemoryLeaderboards()
+
+    async def scenario():
+        await boards.load("coins:all", _scores({1: 10, 2: 4}), None)
+
+        async def read_while_players_earn():
+            # Committed after the read's snapshot; only the replay carries them over
+            await boards.incr("coins:all", 2, 5)
+            await boards.set_max("coins:all", 3, 7)
+            return {1: 12, 2: 4}
+
+        await boards.load("coins:all", read_while_players_earn, None)
+        return await boards.top("coins:all", 0, 10), await boards.rank("coins:all", 2)
+
+    top, rank = asyncio.run(scenario())
+    assert top == [(1, 12), (2, 9), (3, 7)]
+    assert rank == (1, 9)
+
+
+def test_updates_outside_a_rebuild_are_not_replayed():
+    boards = MemoryLeaderboards()
+
+    async def scenario():
+        await boards.incr("coins:all", 1, 3)  # no board yet: the next load reads it from the database
+        await boards.load("coins:all", _scores({1: 3}), None)
+        await boards.incr("coins:all", 1, 2)
+        await boards.load("coins:all", _scores({1: 5}), None)
+        return await boards.top("coins:all", 0, 10)
+
+    assert asyncio.run(scenario()) == [(1, 5)]
+
+
+def _scores(scores):
+    async def read():
+        return scores
+
+    return read
@@ -0,0 +1,68 @@
+"""Keyset cursors: the codec in ``app.utils.pagination`` and paging through list endpoints."""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from app.models import Badge, UserBadge
+from app.services import badges
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from tests.helpers import headers
+
+
+def test_cursor_round_trips_ids_and_timestamps():
+    at = datetime(2026, 10, 17, 12, 30, 5, 123456)
+    cursor = encode_cursor(t=at, id=42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, t=datetime, id=int) == {"t": at, "id": 42}
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode_cursor(other=1),
+        encode_cursor(id="42"),
+        encode_cursor(id=True),
+        encode_cursor(t="yesterday", id=1),
+    ],
+)
+def test_malformed_cursors_are_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor, t=datetime, id=int)
+    assert raised.value.status_code == 400
+
+
+def _pages(client, url: str, me: dict, **params) -> list[list]:
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, headers=me, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_browse_pages_cover_every_user_once(client, database):
+    ids = [client.get("/users/me/profile", headers=headers(f"auth0|page{i}")).json()["id"] for i in range(7)]
+    pages = _pages(client, "/users/browse", headers("auth0|page0"), limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2]
+    assert [user["id"] for page in pages for user in page] == sorted(ids[1:], reverse=True)
+
+
+def test_badge_pages_break_earned_at_ties_by_id(client, database):
+    codes = [f"EXTRA_{i}" for i in range(5)]
+    badges.seed_default_badges([{"code": code} for code in codes])
+    me = headers("auth0|pager")
+    user_id = client.get("/users/me/profile", headers=me).json()["id"]
+    earned_at = datetime(2026, 10, 17)
+    with Session(database) as session:
+        for badge in session.exec(select(Badge).order_by(Badge.code)).all():
+            session.add(UserBadge(user_id=user_id, badge_id=badge.id, earned_at=earned_at))
+        session.commit()
+
+    pages = _pages(client, "/users/me/badges", me, limit=2)
+    assert [badge["code"] for page in pages for badge in page] == codes
+    assert client.get("/users/me/badges", headers=me, params={"cursor": "garbage"}).status_code == 400
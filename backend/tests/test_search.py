@@ -0,0 +1,38 @@
+"""The in-process (SQLite) user search index and its dialect guard."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.search import UserSearchIndex, search_users
+
+
+def _index() -> UserSearchIndex:
+    index = UserSearchIndex()
+    index.load([
+        (1, "Alice", None),
+        (2, "Alicia", None),
+        (3, "Bob Alison", None),
+        (4, "Malice", None),
+        (5, "Zed", "friends with alice"),
+    ])
+    return index
+
+
+def test_results_are_ranked_by_tier_then_length_then_newest():
+    assert _index().search("alice") == [1, 4, 5]
+    assert _index().search("ali") == [1, 2, 3, 4, 5]
+    assert _index().search("ali", mode="prefix") == [1, 2, 3]
+
+
+def test_updates_move_a_row_between_postings():
+    index = _index()
+    index.update(5, "Alice Cooper", None)
+    assert index.search("alice") == [1, 5, 4]
+    assert index.search("friends") == []
+
+
+def test_other_dialects_are_refused():
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+    with pytest.raises(RuntimeError, match="PostgreSQL"):
+        asyncio.run(search_users(db, "alice"))
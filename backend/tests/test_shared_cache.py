@@ -0,0 +1,128 @@
+"""``TieredCache``: tier order, single-flight loads and invalidation during a load."""
+import asyncio
+
+from app.utils.cache import TTLCache
+from app.utils.shared_cache import MemoryBackend, TieredCache
+
+
+class FailingBackend:
+    async def get(self, key):
+        raise ConnectionError("down")
+
+    async def set(self, key, value, ttl):
+        raise ConnectionError("down")
+
+    async def delete(self, *keys):
+        raise ConnectionError("down")
+
+
+def _cache(backend=None, **kwargs) -> TieredCache:
+    return TieredCache(TTLCache(maxsize=100, ttl=60), backend, namespace="t:", **kwargs)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = _cache(MemoryBackend())
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"value"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [b"value"] * 10
+    assert calls == 1
+    assert (cache.loads, cache.coalesced) == (1, 9)
+    assert asyncio.run(cache.get("k")) == b"value"
+
+
+def test_other_process_reads_through_the_shared_tier():
+    shared = MemoryBackend()
+    writer, reader = _cache(shared), _cache(shared)
+
+    async def scenario():
+        await writer.set("k", b"v1")
+        first = await reader.get_or_load("k", _never)
+        await writer.invalidate("k")
+        reader.local.clear()  # its local TTL has run out
+        second = await reader.get_or_load("k", _returns(b"v2"))
+        return first, second
+
+    assert asyncio.run(scenario()) == (b"v1", b"v2")
+
+
+def test_invalidation_during_a_load_is_not_overwritten():
+    cache = _cache(MemoryBackend())
+
+    async def scenario():
+        loading = asyncio.Event()
+
+        async def load():
+            loading.set()
+            await asyncio.sleep(0.01)
+            return b"old"
+
+        pending = asyncio.ensure_future(cache.get_or_load("k", load))
+        await loading.wait()
+        await cache.invalidate("k")
+        waiter_result = await pending
+        return waiter_result, await cache.get("k")
+
+    # The waiter still gets its answer, but the superseded value is not cached
+    assert asyncio.run(scenario()) == (b"old", None)
+
+
+def test_a_cancelled_caller_does_not_abort_the_shared_load():
+    cache = _cache()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return b"value"
+
+        first = asyncio.ensure_future(cache.get_or_load("k", load))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get_or_load("k", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == b"value"
+
+
+def test_shared_tier_outage_degrades_to_loads():
+    cache = _cache(FailingBackend())
+
+    async def scenario():
+        value = await cache.get_or_load("k", _returns(b"value"))
+        await cache.invalidate("k")
+        return value, await cache.get_or_load("k", _returns(b"again"))
+
+    assert asyncio.run(scenario()) == (b"value", b"again")
+
+
+def test_none_results_are_not_cached():
+    cache = _cache(MemoryBackend())
+
+    async def scenario():
+        await cache.get_or_load("k", _returns(None))
+        return await cache.get_or_load("k", _returns(b"value"))
+
+    assert asyncio.run(scenario()) == b"value"
+
+
+async def _never():
+    raise AssertionError("loader should not run")
+
+
+def _returns(value):
+    async def load():
+        return value
+
+    return load
@@ -0,0 +1,55 @@
+"""``SkipList`` against a sorted Python list as the reference."""
+import random
+
+import pytest
+
+from app.utils.skiplist import SkipList
+
+
+@pytest.fixture
+def pair():
+    rng = random.Random(7)
+    keys = rng.sample(range(10_000), 500)
+    return SkipList(keys, seed=1), sorted(keys), rng
+
+
+def test_iterates_in_order(pair):
+    skiplist, reference, _ = pair
+    assert list(skiplist) == reference
+    assert len(skiplist) == len(reference)
+
+
+def test_rank_matches_position(pair):
+    skiplist, reference, _ = pair
+    for position, key in enumerate(reference):
+        assert skiplist.rank(key) == position
+    assert skiplist.rank(-1) is None
+    assert skiplist.rank(10_001) is None
+
+
+def test_slice_matches_list_slicing(pair):
+    skiplist, reference, rng = pair
+    for _ in range(200):
+        start, stop = rng.randrange(-5, 510), rng.randrange(-5, 510)
+        assert skiplist.slice(start, stop) == reference[max(start, 0):max(stop, 0)]
+
+
+def test_remove_keeps_ranks_and_slices_consistent(pair):
+    skiplist, reference, rng = pair
+    for key in rng.sample(reference, 300):
+        assert skiplist.remove(key)
+        reference.remove(key)
+    assert not skiplist.remove(reference[0] + 0.5)
+    assert list(skiplist) == reference
+    assert [skiplist.rank(key) for key in reference] == list(range(len(reference)))
+    assert skiplist.slice(10, 60) == reference[10:60]
+
+
+def test_tuple_keys_rank_like_the_leaderboards():
+    # (-score, user id): highest score first, ties broken by the lower id
+    skiplist = SkipList([(-5, 2), (-9, 3), (-5, 1)])
+    assert skiplist.slice(0, 3) == [(-9, 3), (-5, 1), (-5, 2)]
+    assert skiplist.rank((-5, 2)) == 2
+    skiplist.remove((-9, 3))
+    skiplist.insert((-1, 3))
+    assert list(skiplist) == [(-5, 1), (-5, 2), (-1, 3)]
@@ -0,0 +1,34 @@
+"""Verified-token cache in ``app.utils.auth0``."""
+import time
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.utils import auth0
+
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    monkeypatch.setattr(auth0, "auth0_settings", lambda: ("aud", "https://issuer/"))
+    auth0.token_cache.clear()
+    yield
+    auth0.token_cache.clear()
+
+
+def test_cached_claims_cannot_be_rewritten_by_callers():
+    payload = {"sub": "auth0|1", "exp": time.time() + 60, "permissions": ["read"]}
+    key = auth0._token_cache_key("tok")
+    auth0._remember_token(key, payload)
+    payload["sub"] = "auth0|changed-before-hit"
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="tok")
+    first = auth0.verify_token(credentials)
+    assert first["sub"] == "auth0|1"
+    first["sub"] = "auth0|attacker"
+    assert auth0.verify_token(credentials)["sub"] == "auth0|1"
+
+
+def test_tokens_without_exp_are_not_cached():
+    key = auth0._token_cache_key("tok")
+    auth0._remember_token(key, {"sub": "auth0|1"})
+    assert key not in auth0.token_cache
@@ -0,0 +1,98 @@
+"""Binary stroke format in ``trace_eval.codec`` and the ``/traces/validate/stroke`` endpoint."""
+import math
+
+import numpy as np
+import pytest
+
+from app.services.trace_eval.codec import (
+    CONTENT_TYPE,
+    StrokeDecodeError,
+    decode_stroke,
+    encode_stroke,
+    pack_varints,
+    unpack_varints,
+)
+from tests.helpers import headers
+
+CIRCLE = {"id": "circle", "type": "circle", "center": {"x": 200, "y": 200}, "radius": 80}
+
+
+def _circle_points(count: int = 64) -> np.ndarray:
+    angles = np.linspace(0, math.tau, count)
+    return np.column_stack((200 + 80 * np.cos(angles), 200 + 80 * np.sin(angles)))
+
+
+@pytest.mark.parametrize("varint", [True, False])
+def test_round_trip_within_quantization(varint):
+    points = _circle_points()
+    timestamps = np.cumsum(np.full(len(points), 16))
+    stroke = decode_stroke(encode_stroke(points, timestamps, varint=varint, meta={"shape": CIRCLE}))
+    assert np.abs(stroke.points - points).max() <= 1 / 8
+    assert stroke.timestamps.tolist() == (timestamps - timestamps[0]).tolist()
+    assert stroke.meta == {"shape": CIRCLE}
+
+
+def test_varints_round_trip_at_byte_boundaries():
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2**32 - 1], dtype=np.uint64)
+    packed = pack_varints(values)
+    assert len(packed) == 1 + 1 + 1 + 2 + 2 + 3 + 5
+    decoded, used = unpack_varints(memoryview(packed + b"\x00"), len(values))
+    assert decoded.tolist() == values.tolist()
+    assert used == len(packed)
+
+
+def test_varints_are_smaller_than_int16_for_small_moves():
+    points = _circle_points(count=400)
+    assert len(encode_stroke(points, varint=True)) < len(encode_stroke(points, varint=False))
+
+
+@pytest.mark.parametrize(
+    "mangle",
+    [
+        lambda data: b"XX" + data[2:],  # magic
+        lambda data: data[:2] + b"\x09" + data[3:],  # version
+        lambda data: data[:3] + b"\x80" + data[4:],  # unknown flag
+        lambda data: data[:-1],  # truncated
+        lambda data: data + b"\x00",  # trailing bytes
+        lambda data: data[:6],  # shorter than the header
+    ],
+)
+def test_malformed_payloads_are_rejected(mangle):
+    data = encode_stroke(_circle_points(), varint=False)
+    with pytest.raises(StrokeDecodeError):
+        decode_stroke(mangle(data))
+
+
+def test_point_limit_is_checked_before_decoding():
+    with pytest.raises(StrokeDecodeError, match="more than 10 points"):
+        decode_stroke(encode_stroke(_circle_points(count=11)), max_points=10)
+
+
+def test_binary_and_json_submissions_get_the_same_verdict(client):
+    me = headers("auth0|tracer")
+    for offset in (0, 150):
+        points = _circle_points() + offset
+        json_verdict = client.post(
+            "/traces/validate",
+            headers=me,
+            json={"shape": CIRCLE, "points": [{"x": x, "y": y} for x, y in points.tolist()]},
+        ).json()
+        binary_verdict = client.post(
+            "/traces/validate/stroke",
+            headers={**me, "Content-Type": CONTENT_TYPE},
+            content=encode_stroke(points, meta={"shape": CIRCLE}),
+        ).json()
+        assert binary_verdict == json_verdict
+        assert json_verdict["success"] is (offset == 0)
+
+
+def test_stroke_endpoint_rejects_bad_bodies(client):
+    def post(content: bytes, content_type: str = CONTENT_TYPE) -> int:
+        request_headers = {**headers("auth0|tracer"), "Content-Type": content_type}
+        return client.post("/traces/validate/stroke", headers=request_headers, content=content).status_code
+
+    stroke = encode_stroke(_circle_points(), meta={"shape": CIRCLE})
+    assert post(stroke, content_type="text/plain") == 415
+    assert post(b"not a stroke") == 400
+    assert post(b"\x00" * (257 * 1024)) == 413
+    assert post(encode_stroke(_circle_points())) == 422  # no shape in the metadata
@@ -0,0 +1,90 @@
+"""Grid index bounds and its fallbacks in ``trace_eval.geometry``."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.trace_eval import geometry, shape_from_dict
+from app.services.trace_eval.geometry import INDEX_MIN_SEGMENTS, PolygonGeometry, polygon_geometry
+from app.services.trace_eval.registry import SHAPE_SPECS
+
+
+def _zigzag(vertices: int, size: float = 1000.0):
+    points = [{"x": 0, "y": 0} if i % 2 == 0 else {"x": size, "y": size} for i in range(vertices)]
+    return shape_from_dict({"id": f"zigzag-{vertices}", "type": "polygon", "points": points})
+
+
+def _dense_nearest(geom: PolygonGeometry, points: np.ndarray):
+    _, dist = geom.distances(points)
+    closest = np.argmin(dist, axis=1)
+    return closest, dist[np.arange(len(points)), closest]
+
+
+def _near_points(geom: PolygonGeometry, count: int, spread: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    seg = rng.integers(0, geom.segment_count, count)
+    t = rng.random(count)[:, None]
+    return geom.starts[seg] + t * geom.vectors[seg] + rng.normal(0, spread, (count, 2))
+
+
+def test_grid_registers_only_cells_along_the_path():
+    # Every segment's bounding box covers the whole 1000x1000 grid; the path is ~1400 cells long
+    geom = polygon_geometry(_zigzag(40))
+    grid = geom.grid(1.0)
+    assert grid is not None
+    assert grid.segments.size < geom.segment_count * 10 * 1000
+
+
+def test_grid_nearest_matches_dense_on_long_diagonals():
+    geom = polygon_geometry(_zigzag(40))
+    points = _near_points(geom, 5000, spread=1.5)
+    closest, min_dist = geom.nearest(points, 1.0)
+    dense_closest, dense_min = _dense_nearest(geom, points)
+    near = dense_min <= 1.0
+    assert near.any() and (~near).any()
+    np.testing.assert_array_equal(min_dist[near], dense_min[near])
+    np.testing.assert_array_equal(closest[near], dense_closest[near])
+
+
+def test_over_budget_polygons_use_the_dense_path(monkeypatch):
+    monkeypatch.setattr(geometry, "MAX_GRID_ENTRIES", 1000)
+    geom = polygon_geometry(_zigzag(41))
+    assert geom.grid(1.0) is None
+    points = _near_points(geom, 2000, spread=3.0, seed=1)
+    closest, min_dist = geom.nearest(points, 1.0)
+    dense_closest, dense_min = _dense_nearest(geom, points)
+    np.testing.assert_array_equal(min_dist, dense_min)
+    np.testing.assert_array_equal(closest, dense_closest)
+
+
+@pytest.mark.parametrize("block_pairs", [1, 37, 1 << 20])
+def test_dense_path_in_blocks_matches_one_pass(monkeypatch, block_pairs):
+    monkeypatch.setattr(geometry, "DENSE_BLOCK_PAIRS", block_pairs)
+    geom = polygon_geometry(_zigzag(8, size=300.0))
+    points = _near_points(geom, 500, spread=20.0, seed=2)
+    closest, min_dist = geom.nearest(points, 0)  # radius 0 always takes the dense path
+    dense_closest, dense_min = _dense_nearest(geom, points)
+    np.testing.assert_array_equal(min_dist, dense_min)
+    np.testing.assert_array_equal(closest, dense_closest)
+
+
+def test_registered_shapes_take_the_dense_path():
+    # The index only serves outlines the game does not generate yet; see the geometry docstring
+    assert all(spec.vertices is not None and spec.vertices - 1 < INDEX_MIN_SEGMENTS
+               for spec in SHAPE_SPECS if spec.type == "polygon")
+
+
+def test_concurrent_grid_requests_build_one_index(monkeypatch):
+    geom = polygon_geometry(_zigzag(40))
+    builds = []
+    build = PolygonGeometry._build_grid
+
+    def counting_build(self, cell):
+        builds.append(cell)
+        return build(self, cell)
+
+    monkeypatch.setattr(PolygonGeometry, "_build_grid", counting_build)
+    with ThreadPoolExecutor(8) as pool:
+        grids = list(pool.map(lambda _: geom.grid(3.0), range(32)))
+    assert builds == [4.0]
+    assert all(grid is grids[0] for grid in grids)
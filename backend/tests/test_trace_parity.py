@@ -0,0 +1,58 @@
+"""The server evaluator must agree with the frontend's ``evaluateTrace`` on every recorded stroke.
+
+Verdicts in ``fixtures/trace_parity.json`` were produced by the JS function
+itself (see ``fixtures/record_trace_parity.py``).
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services.trace_eval import as_points, evaluate_trace, polygon_geometry, shape_from_dict
+from app.services.trace_eval.evaluate import _polygon_thresholds
+from app.services.trace_eval.geometry import INDEX_MIN_SEGMENTS
+
+RECORDED = json.loads((Path(__file__).parent / "fixtures" / "trace_parity.json").read_text(encoding="utf-8"))
+SHAPES = {shape["id"]: shape_from_dict(shape) for shape in RECORDED["shapes"]}
+CASES = RECORDED["cases"]
+
+
+def _uses_grid(shape) -> bool:
+    return shape.type == "polygon" and len(shape.points) - 1 >= INDEX_MIN_SEGMENTS
+
+
+def _case_id(case: dict) -> str:
+    return f"{case['shape']}-t{case['threshold']}-n{len(case['points'])}"
+
+
+def test_fixture_covers_dense_and_grid_paths():
+    polygons = [SHAPES[case["shape"]] for case in CASES if SHAPES[case["shape"]].type == "polygon"]
+    assert any(_uses_grid(shape) for shape in polygons)
+    assert any(not _uses_grid(shape) for shape in polygons)
+    assert {True, False} <= {case["expected"] for case in CASES if _uses_grid(SHAPES[case["shape"]])}
+    assert {True, False} <= {case["expected"] for case in CASES if not _uses_grid(SHAPES[case["shape"]])}
+
+
+@pytest.mark.parametrize("case", CASES, ids=_case_id)
+def test_matches_recorded_js_verdict(case):
+    points = as_points(case["points"])
+    assert evaluate_trace(points, SHAPES[case["shape"]], case["threshold"]) is case["expected"]
+
+
+@pytest.mark.parametrize("shape_id", sorted(sid for sid, shape in SHAPES.items() if _uses_grid(shape)))
+def test_grid_nearest_matches_dense_within_threshold(shape_id):
+    shape = SHAPES[shape_id]
+    geometry = polygon_geometry(shape)
+    cases = [case for case in CASES if case["shape"] == shape_id]
+    points = np.concatenate([as_points(case["points"]) for case in cases])
+    for threshold in sorted({case["threshold"] for case in cases}):
+        _, radius, _ = _polygon_thresholds(shape.id, threshold)
+        _, dense = geometry.distances(points)
+        dense_closest = np.argmin(dense, axis=1)
+        dense_min = dense[np.arange(len(points)), dense_closest]
+        closest, min_dist = geometry.nearest(points, radius)
+        near = dense_min <= radius
+        np.testing.assert_array_equal(min_dist[near], dense_min[near])
+        np.testing.assert_array_equal(closest[near], dense_closest[near])
+        assert np.all(min_dist[~near] > radius)
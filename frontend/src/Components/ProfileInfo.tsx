@@ -48,8 +48,11 @@ const ProfileInfo: React.FC<ProfileInfoProps> = ({ profileBackground, onBackgrou
     let cancelled = false;
     const load = async () => {
       try {
-        const [profileData, ownedItems, badges] = await Promise.all([api.getMyProfile(), api.getOwnedItems(), api.getMyBadges()]);
-        if (cancelled) return;
+        const data = await api.getBootstrap(["profile", "owned_items", "badges"]);
+        if (cancelled || !data.profile) return;
+        const profileData = data.profile;
+        const ownedItems = data.owned_items ?? [];
+        const badges = data.badges ?? [];
         setBio(profileData.bio || "");
         setDisplayName(profileData.display_name || user?.name || "");
         setPictureUrl(profileData.picture_url || user?.picture || null);
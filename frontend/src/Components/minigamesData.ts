@@ -1,6 +1,9 @@
 import type { Minigame, Point, Shape } from "./types";
 import { canvasDimensions } from "./canvasContext";
 
+// Shape ids, rewards and minigame thresholds are mirrored in backend/app/services/trace_eval/registry.py,
+// which is what the server scores traces against; keep the two in step.
+
 // Helper function to get random number within a range
 const random = (min: number, max: number) => Math.floor(Math.random() * (max - min + 1)) + min;
 
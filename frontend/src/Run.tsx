@@ -41,6 +41,13 @@ const readDifficultyLevel = (): string => {
   return localStorage.getItem("difficultyLevel") || "normal";
 };
 
+const newRunId = (): string =>
+  typeof crypto !== "undefined" && "randomUUID" in crypto
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+
+type MinigameResult = { success: boolean; reward: number; time_remaining: number | null };
+
 const Run = () => {
   const { user, isLoading, isAuthenticated } = useAuth0();
   const isGuest = !isAuthenticated;
@@ -51,11 +58,13 @@ const Run = () => {
   const [lives, setLives] = useState<number>(3);
   const [configuredMinigameTime, setConfiguredMinigameTime] = useState<number>(() => timeForDifficulty(readDifficultyLevel()));
   const [timeRemaining, setTimeRemaining] = useState<number>(() => timeForDifficulty(readDifficultyLevel()));
-  // Use refs for internal counters (no direct UI read required)
-  const completedCountRef = useRef<number>(0);
-  const streakRef = useRef<number>(0);
-  const [ownedBadges, setOwnedBadges] = useState<Set<string>>(new Set());
-  const [badgesLoaded, setBadgesLoaded] = useState<boolean>(false);
+  // The run is saved in one request when it ends (or the page is left); the server awards coins, stats and badges from it
+  const runIdRef = useRef<string>("");
+  const runResultsRef = useRef<MinigameResult[]>([]);
+  const livesRef = useRef<number>(3);
+  const runSubmittedRef = useRef<boolean>(true);
+  // Kept current during a run so the pagehide handler can send the summary without awaiting
+  const tokenRef = useRef<string | null>(null);
   const [minigamesCompleted, setMinigamesCompleted] = useState<number>(0);
   const [notification, setNotification] = useState<string>("");
   const notificationTimeoutRef = useRef<number | null>(null);
@@ -133,47 +142,73 @@ const Run = () => {
     return () => window.removeEventListener("settingsUpdated", onSettings as EventListener);
   }, []);
 
-  // Load user's badges on mount
-  useEffect(() => {
-    if (isGuest) {
-      setOwnedBadges(new Set());
-      setBadgesLoaded(true);
-      return;
+  const refreshToken = useCallback(() => {
+    if (!isGuest) {
+      api
+        .getToken()
+        .then((token) => {
+          tokenRef.current = token;
+        })
+        .catch(() => undefined);
     }
-    let cancelled = false;
-    api
-      .getMyBadges()
-      .then((badges) => {
-        if (!cancelled) {
-          setOwnedBadges(new Set(badges.map((badge) => badge.code)));
-          setBadgesLoaded(true);
-        }
-      })
-      .catch((err) => {
-        console.error("Failed to load badges:", err);
-        setBadgesLoaded(true);
-      });
-    return () => {
-      cancelled = true;
-    };
   }, [api, isGuest]);
 
-  const maybeAward = useCallback(
-    (code: string) => {
-      if (isGuest || ownedBadges.has(code)) {
+  // Marks the run as sent and returns its summary, or null when there is nothing to send
+  const takeRunSummary = useCallback(() => {
+    if (runSubmittedRef.current) {
+      return null;
+    }
+    runSubmittedRef.current = true;
+    if (isGuest || runResultsRef.current.length === 0) {
+      return null;
+    }
+    return { run_id: runIdRef.current, minigames: [...runResultsRef.current], lives_remaining: livesRef.current };
+  }, [isGuest]);
+
+  const submitRun = useCallback(() => {
+    const summary = takeRunSummary();
+    if (summary) {
+      api.submitRun(summary).catch((err) => console.error("Failed to save run:", err));
+    }
+  }, [api, takeRunSummary]);
+
+  // Latest submitRun for the unmount cleanup, so leaving mid-run still saves it
+  const submitRunRef = useRef(submitRun);
+  submitRunRef.current = submitRun;
+
+  useEffect(() => {
+    if (gameOver) {
+      submitRun();
+    }
+  }, [gameOver, submitRun]);
+
+  // Closing or reloading the tab unmounts nothing, so save the run on pagehide too
+  useEffect(() => {
+    const onPageHide = () => {
+      if (!tokenRef.current) {
         return;
       }
-      api
-        .awardBadge(code)
-        .then((res) => {
-          if (res.status === "awarded" || res.status === "exists") {
-            setOwnedBadges((prev) => new Set([...prev, code]));
-          }
-        })
-        .catch((err) => console.error(`Failed to award badge ${code}:`, err));
-    },
-    [api, isGuest, ownedBadges],
-  );
+      const summary = takeRunSummary();
+      if (summary) {
+        api.sendRunOnExit(tokenRef.current, summary);
+      }
+    };
+    // Back from the back/forward cache mid-run: the part already sent stays saved,
+    // what follows is recorded as a new run
+    const onPageShow = (event: PageTransitionEvent) => {
+      if (event.persisted && runSubmittedRef.current && runResultsRef.current.length > 0 && livesRef.current > 0) {
+        runIdRef.current = newRunId();
+        runResultsRef.current = [];
+        runSubmittedRef.current = false;
+      }
+    };
+    window.addEventListener("pagehide", onPageHide);
+    window.addEventListener("pageshow", onPageShow);
+    return () => {
+      window.removeEventListener("pagehide", onPageHide);
+      window.removeEventListener("pageshow", onPageShow);
+    };
+  }, [api, takeRunSummary]);
 
   const handleComplete = (success: boolean, reward: number) => {
     if (success) {
@@ -183,27 +218,9 @@ const Run = () => {
       const multiplier = multiplierForDifficulty(difficultyLevel);
       const adjustedReward = Math.round(reward * multiplier);
 
-      setCoins((c) => {
-        const next = c + adjustedReward;
-        if (next >= 50) {
-          maybeAward("COIN_COLLECTOR");
-        }
-        return next;
-      });
-      // Update counters & award badges
-      completedCountRef.current += 1;
-      if (completedCountRef.current === 1) maybeAward("FIRST_STEPS");
-      if (completedCountRef.current === 20) maybeAward("SURVIVOR");
-      streakRef.current += 1;
-      if (streakRef.current === 10) maybeAward("PERFECT_10");
-      // Check for speed demon badge (more than 5 seconds remaining)
-      if (timeRemaining > 5) {
-        maybeAward("SPEED_DEMON");
-      }
-      // Save coins to backend when signed in
-      if (!isGuest) {
-        api.incrementCoins(adjustedReward).catch((err) => console.error("Failed to save coins:", err));
-      }
+      setCoins((c) => c + adjustedReward);
+      runResultsRef.current.push({ success: true, reward: adjustedReward, time_remaining: timeRemaining });
+      refreshToken();
 
       // Speed up mechanic: every 5 minigames, reduce time by 1 second
       const newCount = minigamesCompleted + 1;
@@ -225,7 +242,9 @@ const Run = () => {
       }
     } else {
       void playLoseLifeSound();
-      streakRef.current = 0;
+      runResultsRef.current.push({ success: false, reward: 0, time_remaining: timeRemaining });
+      refreshToken();
+      livesRef.current = Math.max(0, livesRef.current - 1);
       setLives((l) => {
         const nextLives = l - 1;
         if (nextLives <= 0) {
@@ -259,8 +278,12 @@ const Run = () => {
     setGameOver(false);
     setCoins(0);
     setLives(3);
-    completedCountRef.current = 0;
-    streakRef.current = 0;
+    submitRun();
+    runIdRef.current = newRunId();
+    runResultsRef.current = [];
+    livesRef.current = 3;
+    runSubmittedRef.current = false;
+    refreshToken();
     setMinigamesCompleted(0);
     resetAvatarMood();
     if (notificationTimeoutRef.current !== null) {
@@ -277,6 +300,7 @@ const Run = () => {
 
   useEffect(() => {
     return () => {
+      submitRunRef.current();
       if (notificationTimeoutRef.current !== null) {
         window.clearTimeout(notificationTimeoutRef.current);
       }
@@ -286,7 +310,7 @@ const Run = () => {
     };
   }, []);
 
-  const ready = useDataReady([!isLoading, badgesLoaded]);
+  const ready = useDataReady([!isLoading]);
   if (!ready) return <Loading />;
 
   return (
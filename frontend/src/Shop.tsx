@@ -267,12 +267,14 @@ const Shop = () => {
     // Avoid refetch loop by guarding with ref
     if (fetchedBackendRef.current) return;
     fetchedBackendRef.current = true;
-    Promise.all([api.getCoins(), api.getOwnedItems()])
-      .then(([coinsData, ownedData]) => {
-        setCoins(coinsData.coins);
+    api
+      .getBootstrap(["coins", "owned_items"])
+      .then((data) => {
+        const coinsValue = data.coins ?? 0;
+        setCoins(coinsValue);
         setCoinsLoaded(true);
-        sessionStorage.setItem("shop_coins", String(coinsData.coins));
-        const ownedIds = ownedData.map((o) => o.item_id);
+        sessionStorage.setItem("shop_coins", String(coinsValue));
+        const ownedIds = (data.owned_items ?? []).map((o) => o.item_id);
         setOwned(ownedIds);
         setOwnedLoaded(true);
         sessionStorage.setItem("shop_owned", JSON.stringify(ownedIds));
@@ -303,12 +305,11 @@ const Shop = () => {
     if (isOwned(item.id) || !canAfford(item.price)) return;
 
     try {
-      // Deduct coins from backend
-      const result = await api.incrementCoins(-item.price);
-      await api.addOwnedItem(item.id);
+      // Server prices the item and debits coins in the same transaction
+      const result = await api.purchaseItems([item.id]);
       setCoins(result.coins);
       setOwned((prev) => {
-        const updated = [...prev, item.id];
+        const updated = prev.includes(item.id) ? prev : [...prev, item.id];
         sessionStorage.setItem("shop_coins", String(result.coins));
         sessionStorage.setItem("shop_owned", JSON.stringify(updated));
         return updated;
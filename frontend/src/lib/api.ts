@@ -1,5 +1,7 @@
 import type { GetTokenSilentlyOptions } from "@auth0/auth0-react";
 import { useAuth0 } from "@auth0/auth0-react";
+import type { Point, Shape } from "../Components/types";
+import { encodeStroke, STROKE_CONTENT_TYPE } from "./strokeCodec";
 
 const API_BASE = (import.meta as any).env?.VITE_API_URL || "http://localhost:8000";
 
@@ -7,7 +9,7 @@ async function fetchWithAuth(url: string, init: RequestInit, getToken: (options?
   const token = await getToken();
   const headers = new Headers(init.headers);
   headers.set("Authorization", `Bearer ${token}`);
-  headers.set("Content-Type", "application/json");
+  if (!headers.has("Content-Type")) headers.set("Content-Type", "application/json");
   const resp = await fetch(`${API_BASE}${url}`, { ...init, headers });
   if (!resp.ok) {
     const text = await resp.text();
@@ -16,6 +18,54 @@ async function fetchWithAuth(url: string, init: RequestInit, getToken: (options?
   return resp.json();
 }
 
+// Follow X-Next-Cursor until the last page and return every item
+async function fetchAllPages<T>(url: string, getToken: (options?: GetTokenSilentlyOptions) => Promise<string>): Promise<T[]> {
+  const token = await getToken();
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const sep = url.includes("?") ? "&" : "?";
+    const pageUrl: string = cursor ? `${url}${sep}cursor=${encodeURIComponent(cursor)}` : url;
+    const resp = await fetch(`${API_BASE}${pageUrl}`, { headers: { Authorization: `Bearer ${token}` } });
+    if (!resp.ok) {
+      const text = await resp.text();
+      throw new Error(`API ${resp.status}: ${text}`);
+    }
+    items.push(...((await resp.json()) as T[]));
+    cursor = resp.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return items;
+}
+
+type Profile = { id: number; display_name: string | null; bio: string | null; profile_background: string | null; showcased_badges: string | null; picture_url: string | null };
+type Badge = { code: string; name: string; description: string | null };
+type FriendRequest = { id: number; requester_id: number; receiver_id: number; status: string; created_at: string; responded_at: string | null };
+
+export type RunSummary = {
+  run_id: string;
+  minigames: Array<{ minigame?: string | null; success?: boolean; reward?: number; time_remaining?: number | null }>;
+  lives_remaining?: number;
+  time_remaining?: number | null;
+  badges?: string[];
+};
+
+export type BootstrapSection = "profile" | "coins" | "owned_items" | "badges" | "friend_requests";
+
+export type Bootstrap = {
+  profile?: Profile;
+  coins?: number;
+  owned_items?: Array<{ item_id: string; created_at: string }>;
+  badges?: Badge[];
+  friend_requests?: {
+    inbound: FriendRequest[];
+    outbound: FriendRequest[];
+    inbound_next_cursor: string | null;
+    outbound_next_cursor: string | null;
+  };
+  etags: Partial<Record<BootstrapSection, string>>;
+  not_modified: BootstrapSection[];
+};
+
 export function useApi() {
   const { getAccessTokenSilently } = useAuth0();
 
@@ -37,6 +87,11 @@ export function useApi() {
         getAccessTokenSilently
       );
     },
+    // Several start-up reads in one request; omit `fields` to get every section
+    async getBootstrap(fields?: BootstrapSection[]): Promise<Bootstrap> {
+      const query = fields && fields.length ? `?fields=${fields.join(",")}` : "";
+      return fetchWithAuth(`/users/me/bootstrap${query}`, { method: "GET" }, getAccessTokenSilently);
+    },
     async getOwnedItems(): Promise<Array<{ item_id: string; created_at: string }>> {
       return fetchWithAuth(
         "/users/me/owned-items",
@@ -51,6 +106,15 @@ export function useApi() {
         getAccessTokenSilently
       );
     },
+    async purchaseItems(
+      item_ids: string[]
+    ): Promise<{ purchased: string[]; already_owned: string[]; total: number; coins: number }> {
+      return fetchWithAuth(
+        "/users/me/purchases",
+        { method: "POST", body: JSON.stringify({ item_ids }) },
+        getAccessTokenSilently
+      );
+    },
     async getBio(): Promise<{ bio: string | null }> {
       return fetchWithAuth(
         "/users/me/bio",
@@ -97,7 +161,7 @@ export function useApi() {
       return fetchWithAuth("/badges", { method: "GET" }, getAccessTokenSilently);
     },
     async getMyBadges(): Promise<Array<{ code: string; name: string; description: string | null }>> {
-      return fetchWithAuth("/users/me/badges", { method: "GET" }, getAccessTokenSilently);
+      return fetchAllPages("/users/me/badges", getAccessTokenSilently);
     },
     async awardBadge(code: string): Promise<{ status: string; code: string }> {
       return fetchWithAuth(
@@ -146,9 +210,10 @@ export function useApi() {
         getAccessTokenSilently
       );
     },
-    async browseUsers(query: string, offset = 0, limit = 24): Promise<Array<{ id: number; display_name: string | null; bio: string | null; profile_background: string | null; picture_url: string | null; showcased_badges: string | null }>> {
+    async browseUsers(query: string, offset = 0, limit = 24, mode: "contains" | "prefix" = "contains"): Promise<Array<{ id: number; display_name: string | null; bio: string | null; profile_background: string | null; picture_url: string | null; showcased_badges: string | null }>> {
       const params = new URLSearchParams();
       if (query) params.set("query", query);
+      if (query && mode !== "contains") params.set("mode", mode);
       params.set("offset", String(offset));
       params.set("limit", String(limit));
       const qs = params.toString();
@@ -168,13 +233,60 @@ export function useApi() {
       return fetchWithAuth(`/users/friends/request/${requestId}/decline`, { method: "POST" }, getAccessTokenSilently);
     },
     async listFriends(): Promise<Array<{ id: number; display_name: string | null; bio: string | null; profile_background: string | null; picture_url: string | null; showcased_badges: string | null }>> {
-      return fetchWithAuth(`/users/me/friends`, { method: "GET" }, getAccessTokenSilently);
+      return fetchAllPages(`/users/me/friends`, getAccessTokenSilently);
+    },
+    async listMutualFriends(userId: number): Promise<Array<{ id: number; display_name: string | null; bio: string | null; profile_background: string | null; picture_url: string | null; showcased_badges: string | null }>> {
+      return fetchAllPages(`/users/${userId}/friends/mutual`, getAccessTokenSilently);
+    },
+    async suggestFriends(limit = 10): Promise<Array<{ id: number; display_name: string | null; bio: string | null; profile_background: string | null; picture_url: string | null; showcased_badges: string | null; mutual_friends: number }>> {
+      return fetchWithAuth(`/users/me/friends/suggestions?limit=${limit}`, { method: "GET" }, getAccessTokenSilently);
     },
     async removeFriend(friendUserId: number): Promise<{ status: string }> {
       return fetchWithAuth(`/users/friends/${friendUserId}`, { method: "DELETE" }, getAccessTokenSilently);
     },
+    async submitRun(payload: RunSummary): Promise<{ run_id: string; status: string; coins: number; coins_earned: number; minigames_completed: number; badges_awarded: string[] }> {
+      return fetchWithAuth(`/users/me/runs`, { method: "POST", body: JSON.stringify(payload) }, getAccessTokenSilently);
+    },
+    // For handlers that cannot await, e.g. sendRunOnExit below
+    async getToken(): Promise<string> {
+      return getAccessTokenSilently();
+    },
+    // pagehide cannot wait for a token, so this takes one fetched earlier; keepalive
+    // lets the request finish after the page is gone. Replays of a run_id are no-ops.
+    sendRunOnExit(token: string, payload: RunSummary): void {
+      void fetch(`${API_BASE}/users/me/runs`, {
+        method: "POST",
+        keepalive: true,
+        headers: { Authorization: `Bearer ${token}`, "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+      }).catch(() => undefined);
+    },
+    async getLeaderboard(
+      metric: "coins" | "longest_run",
+      { scope = "global", limit = 10, offset = 0 }: { scope?: "global" | "weekly" | "friends"; limit?: number; offset?: number } = {}
+    ): Promise<{
+      metric: string;
+      scope: string;
+      total: number;
+      entries: Array<{ rank: number; user_id: number; display_name: string | null; picture_url: string | null; score: number }>;
+      me: { rank: number; user_id: number; display_name: string | null; picture_url: string | null; score: number } | null;
+    }> {
+      return fetchWithAuth(`/leaderboards/${metric}?scope=${scope}&limit=${limit}&offset=${offset}`, { method: "GET" }, getAccessTokenSilently);
+    },
+    // Reward and threshold are decided by the server from shape.id
+    async validateStroke(shape: Shape, points: Point[]): Promise<{ shape_id: string; success: boolean; reward: number }> {
+      return fetchWithAuth(
+        "/traces/validate/stroke",
+        {
+          method: "POST",
+          headers: { "Content-Type": STROKE_CONTENT_TYPE },
+          body: encodeStroke(points, { meta: { shape } }),
+        },
+        getAccessTokenSilently
+      );
+    },
     async listOtherUserBadges(userId: number): Promise<Array<{ code: string; name: string; description: string | null }>> {
-      return fetchWithAuth(`/users/${userId}/badges`, { method: "GET" }, getAccessTokenSilently);
+      return fetchAllPages(`/users/${userId}/badges`, getAccessTokenSilently);
     },
   };
 }
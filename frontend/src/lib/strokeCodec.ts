@@ -0,0 +1,101 @@
+import type { Point } from "../Components/types";
+
+// Binary stroke format, version 1 (see backend/app/services/trace_eval/codec.py).
+const MAGIC = [0x53, 0x4b]; // "SK"
+const VERSION = 1;
+const FLAG_TIMESTAMPS = 0x01;
+const FLAG_VARINT = 0x02;
+const FLAG_META = 0x04;
+const HEADER_SIZE = 12;
+
+export const STROKE_CONTENT_TYPE = "application/octet-stream";
+
+const zigzag = (n: number) => (n >= 0 ? n * 2 : -n * 2 - 1);
+
+class ByteWriter {
+  private buf = new Uint8Array(256);
+  length = 0;
+
+  private reserve(extra: number) {
+    if (this.length + extra <= this.buf.length) return;
+    let size = this.buf.length * 2;
+    while (size < this.length + extra) size *= 2;
+    const next = new Uint8Array(size);
+    next.set(this.buf.subarray(0, this.length));
+    this.buf = next;
+  }
+
+  bytes(data: Uint8Array) {
+    this.reserve(data.length);
+    this.buf.set(data, this.length);
+    this.length += data.length;
+  }
+
+  varint(value: number) {
+    this.reserve(5);
+    while (value >= 0x80) {
+      this.buf[this.length++] = (value % 0x80) | 0x80;
+      value = Math.floor(value / 0x80);
+    }
+    this.buf[this.length++] = value;
+  }
+
+  result() {
+    return this.buf.slice(0, this.length);
+  }
+}
+
+/** Encode a stroke as zigzag varint deltas, optionally with timestamps (ms) and JSON metadata. */
+export function encodeStroke(
+  points: Point[],
+  options: { scale?: number; timestamps?: number[]; meta?: Record<string, unknown> } = {}
+): Uint8Array {
+  const scale = options.scale ?? 4;
+  const { timestamps, meta } = options;
+  if (timestamps && timestamps.length !== points.length) {
+    throw new Error("timestamps must have one entry per point");
+  }
+
+  const out = new ByteWriter();
+  const header = new Uint8Array(HEADER_SIZE);
+  const view = new DataView(header.buffer);
+  let flags = FLAG_VARINT;
+  if (timestamps) flags |= FLAG_TIMESTAMPS;
+  if (meta) flags |= FLAG_META;
+  header.set(MAGIC, 0);
+  view.setUint8(2, VERSION);
+  view.setUint8(3, flags);
+  view.setUint32(4, points.length, true);
+  view.setUint16(8, scale, true);
+  out.bytes(header);
+
+  if (meta) {
+    const blob = new TextEncoder().encode(JSON.stringify(meta));
+    const length = new Uint8Array(4);
+    new DataView(length.buffer).setUint32(0, blob.length, true);
+    out.bytes(length);
+    out.bytes(blob);
+  }
+
+  let prevX = 0;
+  let prevY = 0;
+  for (const pt of points) {
+    // Math.floor(v + 0.5) matches the backend's quantization
+    const x = Math.floor(pt.x * scale + 0.5);
+    const y = Math.floor(pt.y * scale + 0.5);
+    out.varint(zigzag(x - prevX));
+    out.varint(zigzag(y - prevY));
+    prevX = x;
+    prevY = y;
+  }
+
+  if (timestamps) {
+    let prev = Math.round(timestamps[0] ?? 0);
+    for (const t of timestamps) {
+      const ms = Math.round(t);
+      out.varint(Math.max(0, ms - prev));
+      prev = ms;
+    }
+  }
+  return out.result();
+}